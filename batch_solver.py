@@ -0,0 +1,136 @@
+from typing import Iterable, Iterator, Tuple, Union, Optional, Type
+from multiprocessing import Pool
+import pickle as pkl
+import numpy as np
+
+from grid_map import GridMap
+from grid_cell import WALL
+from grid_adjacency import GridAdjacency
+from path_solver_astar import PathSolverAStar, PathResult
+from reachability import ReachabilityIndex
+from hierarchical_solver import HierarchicalSolver
+from maze_tree import MazeTree
+from junction_graph import JunctionGraph
+from path_solver_hierarchical import PathSolverHierarchical
+from path_solver_tree import PathSolverTree
+from path_solver_junction import PathSolverJunction
+
+# the maze and solver settings of a worker process, set once by init_worker
+_worker = {}
+
+
+def load_grid_map(path: str) -> GridMap:
+    """
+    Loads the grid of a maze saved by BrickWall
+    :param path: the path to the .mz file
+    :return: the GridMap stored in the file
+    """
+    with open(path, 'rb') as fromfile:
+        return pkl.load(fromfile)['grid_map']
+
+
+def pack_maze(grid_map: GridMap) -> Tuple[int, int, bool, bytes, bytes]:
+    """
+    Packs the walls of a grid into a small picklable description. This is what gets sent to the worker processes
+    instead of the cell objects (which hold references to pygame surfaces)
+    :param grid_map: the grid to pack
+    :return: tuple of (rows, columns, maze_grid, open direction mask of every cell, wall flag of every cell)
+    """
+    adjacency = GridAdjacency.from_cell_store(grid_map.cells)
+    wall_cells = (grid_map.cells.type_array() == WALL).tobytes()
+    return grid_map.grid_size[0], grid_map.grid_size[1], grid_map.maze_grid, bytes(adjacency.open_dirs), wall_cells
+
+
+def unpack_maze(packed: Tuple[int, int, bool, bytes, bytes]) -> Tuple[GridMap, GridAdjacency]:
+    """
+    Rebuilds a grid without a drawing surface from the description made by pack_maze
+    :param packed: the packed maze
+    :return: tuple of (grid_map, adjacency table)
+    """
+    rows, cols, maze_grid, open_dirs, wall_cells = packed
+    grid_map = GridMap(None, [0, 0, cols, rows], [rows, cols], maze_grid=maze_grid)
+    adjacency = GridAdjacency(rows, cols)
+    adjacency.open_dirs[:] = open_dirs
+    types = grid_map.cells.type_array()
+    types[np.frombuffer(wall_cells, dtype=np.bool_).reshape(rows, cols)] = WALL
+    grid_map.adjacency = adjacency
+    return grid_map, adjacency
+
+
+def init_worker(packed: Tuple[int, int, bool, bytes, bytes], solver_class: Type[PathSolverAStar], heuristic: str,
+                movement: str, heuristic_weight: float):
+    """
+    Initialises a worker process. Runs once per worker so the maze is only sent and rebuilt once
+    :param packed: the packed maze (see pack_maze)
+    :param solver_class: the path solver to use for every query
+    :param heuristic: the heuristic distance measure
+    :param movement: the way the agent is allowed to move
+    :param heuristic_weight: the weight factor to multiply the heuristic by
+    :return: None
+    """
+    grid_map, adjacency = unpack_maze(packed)
+    _worker['grid_map'] = grid_map
+    _worker['adjacency'] = adjacency
+    # queries between different components are answered without running the solver
+    _worker['reachability'] = ReachabilityIndex(adjacency) if movement != 'euclidean' else None
+    # the solvers that search a prebuilt structure of the maze get one that is shared by all queries of the worker
+    shared = {}
+    if issubclass(solver_class, PathSolverHierarchical):
+        shared['hierarchy'] = HierarchicalSolver(adjacency)
+    elif issubclass(solver_class, PathSolverTree):
+        shared['maze_tree'] = MazeTree(adjacency)
+    elif issubclass(solver_class, PathSolverJunction):
+        shared['junction_graph'] = JunctionGraph(adjacency)
+    _worker['shared'] = shared
+    _worker['settings'] = (solver_class, heuristic, movement, heuristic_weight)
+
+
+def solve_query(query: Tuple[Tuple[int, int], Tuple[int, int]]) -> PathResult:
+    """
+    Solves a single (start, goal) query on the maze of this worker process
+    :param query: tuple of the (row, column) of the start cell and the goal cell
+    :return: the PathResult of the query
+    """
+    solver_class, heuristic, movement, heuristic_weight = _worker['settings']
+    cell_grid = _worker['grid_map'].cell_grid
+    start, goal = query
+    reachability = _worker['reachability']
+    if reachability is not None and not reachability.connected(start, goal):
+        return PathResult([], float('inf'), 0, 0, 0)
+    solver = solver_class(cell_grid, cell_grid[start[0]][start[1]], cell_grid[goal[0]][goal[1]],
+                          heuristic=heuristic, movement=movement, heuristic_weight=heuristic_weight,
+                          adjacency=_worker['adjacency'], **_worker['shared'])
+    return solver.solve()
+
+
+def solve_batch(maze: Union[GridMap, str], queries: Iterable[Tuple[Tuple[int, int], Tuple[int, int]]],
+                solver_class: Type[PathSolverAStar] = PathSolverAStar, heuristic: str = 'euclidean',
+                movement: Optional[str] = None, heuristic_weight: float = 1,
+                processes: Optional[int] = None, chunksize: int = 32) -> Iterator[PathResult]:
+    """
+    Solves many (start, goal) queries on the same maze using a pool of worker processes. The maze is sent to each
+    worker once when it starts and the results are streamed back in the order of the queries.
+    :param maze: the GridMap to solve or the path to a .mz file saved by BrickWall
+    :param queries: iterable of ((start_row, start_column), (goal_row, goal_column)) pairs
+    :param solver_class: the path solver to use (PathSolverAStar or one of its subclasses)
+    :param heuristic: The heuristic distance measure to use. One of {'euclidean', 'manhattan'}
+    :param movement: The way the agent is allowed to move. Defaults to 'walls' for walled mazes and 'manhattan' for
+    grids without cell walls.
+    :param heuristic_weight: The weight factor to multiply the heuristic by
+    :param processes: the number of worker processes. Defaults to the number of cores. With 1 the queries are solved
+    in this process without a pool.
+    :param chunksize: the number of queries sent to a worker at a time
+    :return: an iterator over the PathResult of each query
+    """
+    grid_map = load_grid_map(maze) if isinstance(maze, str) else maze
+    if movement is None:
+        movement = 'walls' if grid_map.maze_grid else 'manhattan'
+    init_args = (pack_maze(grid_map), solver_class, heuristic, movement, heuristic_weight)
+    if processes == 1:
+        init_worker(*init_args)
+        for query in queries:
+            yield solve_query(query)
+        return
+    with Pool(processes, initializer=init_worker, initargs=init_args) as pool:
+        for result in pool.imap(solve_query, queries, chunksize):
+            yield result
@@ -1,5 +1,6 @@
 import sys
-from typing import List, Any
+import time
+from typing import List, Any, Tuple
 import pickle as pkl
 import pathlib
 import pygame
@@ -7,10 +8,21 @@ import pygame_gui
 from screeninfo import get_monitors
 
 from grid_map import GridMap
-from path_solver_astar import PathSolverAStar
+from grid_cell import EMPTY, WALL, START, GOAL, PATH, VISITED, OPEN_SET
+from cell_store import CellView
+from path_solver_astar import PathSolverAStar, PathSolverBidirectional
+from path_solver_jps import PathSolverJPS
+from path_solver_lpastar import PathSolverLPAStar
+from path_solver_tree import PathSolverTree
+from path_solver_junction import PathSolverJunction
+from path_solver_arastar import PathSolverARAStar
+from path_solver_frontier import PathSolverFrontier
+from path_solver_hierarchical import PathSolverHierarchical
 from growing_tree_maze import GrowingTreeMaze
 from svg_render import render_to_svg, RENDER_SOLUTION, RENDER_VISITED
 from wilson_maze import WilsonMaze
+from dirty_rects import merge_rects
+from step_scheduler import StepScheduler
 
 
 class BrickWall:
@@ -18,6 +30,17 @@ class BrickWall:
     Demo app to teach pygame and A*
     """
 
+    # the path solvers that can be chosen in the engine drop down menu
+    ENGINES = {'A*': PathSolverAStar,
+               'bidirectional A*': PathSolverBidirectional,
+               'jump point search': PathSolverJPS,
+               'lifelong planning A*': PathSolverLPAStar,
+               'maze tree': PathSolverTree,
+               'junction graph': PathSolverJunction,
+               'anytime A*': PathSolverARAStar,
+               'memory-bounded A*': PathSolverFrontier,
+               'hierarchical A*': PathSolverHierarchical}
+
     # https://coolors.co/a90f33-f78c6b-ffd166-83d483-037758-118ab2-073b4c
     BACKGROUND_COLOUR = (255, 255, 255)  # (246, 240, 237)  # Isabelline
     TEXT_COLOUR = (7, 59, 76)  # Midnight green eagle green
@@ -34,6 +57,8 @@ class BrickWall:
     TEXT_GUTTER = TEXT_SIZE + 4
     # the max length of status messages
     T_SIZE = 60
+    # push the whole window to the display instead of the dirty rectangles when they cover more than this fraction
+    FULL_UPDATE_FRACTION = 0.5
 
     def __init__(self, width: int = 1640, height: int = 764,
                  fps: int = 120, rows: int = 60, random_walls: float = 0.35):
@@ -60,6 +85,10 @@ class BrickWall:
         self.heuristic_weight = 2
         self.twistiness = 0.6
         self.render_skip = 1
+        # if true the number of steps per frame is chosen by the scheduler to keep the frame rate, otherwise
+        # render_skip steps are run every frame
+        self.adaptive_skip = True
+        self.scheduler = StepScheduler(fps)
 
         self.font = pygame.font.SysFont('mono', self.TEXT_SIZE, bold=True)
 
@@ -76,6 +105,7 @@ class BrickWall:
         self.cur_path = pathlib.Path().absolute()
         self.solver = None
         self.heuristic = 'euclidean'
+        self.engine = 'A*'
         self.maze_type = 'Tree maze'
         self.grid_map = None
         self.s_cell = None
@@ -90,6 +120,10 @@ class BrickWall:
         self.draw_mode_walls = False
         self.maze_generator = None
         self.cleanup_required = False
+        # if true the whole window is pushed to the display at the end of the frame (see redraw_screen)
+        self.full_update = True
+        # the areas covered by the gui elements in the last frame
+        self.gui_rects = []
 
         # GUI elements
         self.save_dialog = None
@@ -100,6 +134,7 @@ class BrickWall:
         self.load_button = None
         self.toggle_cell_walls_button = None
         self.heuristic_menu = None
+        self.engine_menu = None
         self.maze_type_menu = None
         self.reset_button = None
         self.reset_search_button = None
@@ -140,12 +175,18 @@ class BrickWall:
                                                                      manager=self.manager)
         pos = (pos[0], pos[1] + 20)
         size = (196, self.TEXT_GUTTER - self.TEXT_BORDER)
-        self.heuristic_menu = pygame_gui.elements.UIDropDownMenu(['euclidean', 'manhattan'],
+        self.heuristic_menu = pygame_gui.elements.UIDropDownMenu(['euclidean', 'manhattan', 'landmarks'],
                                                                  relative_rect=pygame.Rect(pos, size),
                                                                  starting_option='euclidean',
                                                                  manager=self.manager)
         pos = (pos[0], pos[1] + 20)
         size = (196, self.TEXT_GUTTER - self.TEXT_BORDER)
+        self.engine_menu = pygame_gui.elements.UIDropDownMenu(list(self.ENGINES),
+                                                              relative_rect=pygame.Rect(pos, size),
+                                                              starting_option=self.engine,
+                                                              manager=self.manager)
+        pos = (pos[0], pos[1] + 20)
+        size = (196, self.TEXT_GUTTER - self.TEXT_BORDER)
         self.reset_button = pygame_gui.elements.UIButton(relative_rect=pygame.Rect(pos, size),
                                                          text='Reset maze',
                                                          manager=self.manager)
@@ -239,13 +280,13 @@ class BrickWall:
         pos = (pos[0], pos[1] + 50)
         size = (195, self.TEXT_GUTTER - self.TEXT_BORDER + 10)
         pygame_gui.elements.UILabel(relative_rect=pygame.Rect(pos, size),
-                                    text='Render every n frames',
+                                    text='Steps per frame (or auto)',
                                     manager=self.manager)
         pos = (pos[0], pos[1] + 30)
         size = (195, self.TEXT_GUTTER - self.TEXT_BORDER)
         self.render_skip_text_box = pygame_gui.elements.UITextEntryLine(relative_rect=pygame.Rect(pos, size),
                                                                         manager=self.manager)
-        self.render_skip_text_box.set_text(str(self.render_skip))
+        self.render_skip_text_box.set_text('auto' if self.adaptive_skip else str(self.render_skip))
 
     def reset_run(self) -> List[Any]:
         """
@@ -256,15 +297,54 @@ class BrickWall:
             # disable when generating maze
             return []
         updates = self.grid_map.reset_grid()
-        moves = 'walls' if self.walled_cells else 'manhattan'
-        self.solver = PathSolverAStar(self.grid_map.cell_grid, self.s_cell, self.g_cell,
-                                      heuristic=self.heuristic, movement=moves,
-                                      heuristic_weight=self.heuristic_weight)
+        self.new_solver()
         self.running = True
         self.paused = True
         self.step = False
         return updates
 
+    def solver_movement(self) -> str:
+        """
+        :return: the way the agent is allowed to move on the current grid
+        """
+        return 'walls' if self.walled_cells else 'manhattan'
+
+    def new_solver(self):
+        """
+        Creates a new path solver for the current grid, start cell and goal cell
+        :return:
+        """
+        moves = self.solver_movement()
+        # start measuring the steps of the new solver
+        self.scheduler.reset()
+        engine = self.ENGINES[self.engine]
+        if self.walled_cells and engine is PathSolverJPS:
+            print('Jump point search only works on grids without cell walls. Using A* instead.')
+            engine = PathSolverAStar
+        if not self.walled_cells and engine is PathSolverTree:
+            print('The maze tree only works on mazes with cell walls. Using A* instead.')
+            engine = PathSolverAStar
+        heuristic = self.heuristic
+        if heuristic == 'landmarks' and engine not in (PathSolverAStar, PathSolverBidirectional, PathSolverARAStar):
+            print('The landmarks heuristic only works with A*, bidirectional A* and anytime A*. '
+                  'Using manhattan instead.')
+            heuristic = 'manhattan'
+        kwargs = {}
+        if engine is PathSolverTree:
+            kwargs['maze_tree'] = self.grid_map.get_maze_tree()
+        elif engine is PathSolverJunction:
+            kwargs['junction_graph'] = self.grid_map.get_junction_graph()
+        elif engine is PathSolverHierarchical:
+            kwargs['hierarchy'] = self.grid_map.get_hierarchy()
+        elif engine in (PathSolverAStar, PathSolverBidirectional, PathSolverARAStar, PathSolverFrontier):
+            kwargs['reachability'] = self.grid_map.get_reachability()
+            if heuristic == 'landmarks':
+                kwargs['landmarks'] = self.grid_map.get_landmarks()
+        self.solver = engine(self.grid_map.cell_grid, self.s_cell, self.g_cell,
+                             heuristic=heuristic, movement=moves,
+                             heuristic_weight=self.heuristic_weight,
+                             adjacency=self.grid_map.get_adjacency() if self.walled_cells else None, **kwargs)
+
     def start_new_run(self):
         """
         Starts a new run on a new random grid
@@ -299,11 +379,8 @@ class BrickWall:
         else:
             self.draw_mode_walls = False
             self.toggle_draw_button.enable()
-        moves = 'walls' if self.walled_cells else 'manhattan'
-        self.solver = PathSolverAStar(self.grid_map.cell_grid, self.s_cell, self.g_cell,
-                                      heuristic=self.heuristic, movement=moves,
-                                      heuristic_weight=self.heuristic_weight)
-        self.screen.blit(self.background, (0, 0))
+        self.new_solver()
+        self.redraw_screen()
         self.running = True
         self.paused = True
         self.step = False
@@ -318,23 +395,41 @@ class BrickWall:
         self.background.convert()
         while self.running:
             tick = self.clock.tick(self.fps)
+            frame_start = time.perf_counter()
 
             self.process_events(bounds, tick / 1000.0)
             # pygame.event.pump()
+            render_skip = self.scheduler.steps if self.adaptive_skip else self.render_skip
+            steps = 0
+            step_time = 0.0
             if self.walled_cells and not self.maze_generator.done and not self.paused:
-                msg = self.maze_generator.next_step(bounds, self.render_skip)
+                steps = render_skip
+                step_start = time.perf_counter()
+                msg = self.maze_generator.next_step(bounds, render_skip)
+                step_time = time.perf_counter() - step_start
                 self.cleanup_required = True
                 self.heuristic_menu.disable()
+                self.engine_menu.disable()
                 self.maze_type_menu.disable()
                 self.toggle_draw_button.disable()
             elif self.cleanup_required and not self.paused:
                 self.cleanup_required = False
                 bounds = self.grid_map.post_maze_cleanup(self.s_cell.coord, self.g_cell.coord)
+                stats = self.grid_map.get_wall_planes().stats()
+                # shown on the status line until the solver starts
+                msg = f'maze generated: {stats.dead_ends} dead ends, {stats.junctions} junctions, ' \
+                      f'wall density {stats.density:.2f}'
+                # the solver needs the walls of the finished maze
+                self.new_solver()
                 self.paused = True
                 self.heuristic_menu.enable()
+                self.engine_menu.enable()
                 self.maze_type_menu.enable()
             elif not self.solver.done and not self.paused:
-                msg = self.solver.next_step(bounds, self.render_skip)
+                steps = render_skip
+                step_start = time.perf_counter()
+                msg = self.solver.next_step(bounds, render_skip)
+                step_time = time.perf_counter() - step_start
             if self.step:
                 self.paused = True
                 self.step = False
@@ -347,28 +442,43 @@ class BrickWall:
             mouse_x, mouse_y = self.grid_map.cell_coords_from_mouse_coords(pygame.mouse.get_pos())
             if self.paused:
                 h = self.solver.heuristic(self.grid_map.cell_grid[mouse_y][mouse_x], self.solver.goal_cell)
-                ui_msg += f' -- f#:{self.grid_map.cell_grid[mouse_y][mouse_x].f_score:.2f}, ' \
-                          f'g#:{self.grid_map.cell_grid[mouse_y][mouse_x].g_score:.2f}, ' \
-                          f'h#{h:.2f}'
+                f, g = self.solver.scores(self.grid_map.cell_grid[mouse_y][mouse_x])
+                ui_msg += f' -- f#:{f:.2f}, g#:{g:.2f}, h#{h:.2f}'
             bounds.append(self.draw_text(f"Cell: {(mouse_x, mouse_y)} " + ui_msg, 4, self.TEXT_COLOUR))
-            bounds.append(self.draw_text(f"FPS: {self.clock.get_fps():>5.2f}", 3, self.TEXT_COLOUR))
+            bounds.append(self.draw_text(f"steps/s: {self.scheduler.rate:>9.0f} ({render_skip}/frame) "
+                                         f"FPS: {self.clock.get_fps():>5.2f}", 3, self.TEXT_COLOUR))
             bounds.append(self.draw_text(msg, 1, self.TEXT_COLOUR))
             if self.walled_cells and not self.maze_generator.done:
                 bounds.append(self.draw_text(f'visited: {self.maze_generator.visited} ', 2, self.TEXT_COLOUR))
             else:
-                bounds.append(self.draw_text(f'visited: {self.solver.visited} candidates: {self.solver.openSet.size()}',
-                                             2, self.TEXT_COLOUR))
-
-            # pygame.display.update(bounds)
-            # add ui area to bounds
-            gui_borders = (self.TEXT_BORDER + self.BACKGROUND_SIZE[1], self.TEXT_BORDER,
-                           self.UI_SIZE[1], self.UI_SIZE[1])
-            bounds.append(gui_borders)
-            for r in bounds:
+                bounds.append(self.draw_text(f'visited: {self.solver.visited} '
+                                             f'candidates: {self.solver.open_set_size()}', 2, self.TEXT_COLOUR))
+
+            # the gui elements are drawn over the screen every frame, so the areas they cover now and the areas they
+            # covered in the last frame (closed drop down lists and dialogs) are redrawn as well. Containers have no
+            # image of their own and the root container spans the whole window.
+            gui_rects = [sprite.rect.copy() for sprite in self.manager.get_sprite_group().sprites()
+                         if sprite.visible and not isinstance(sprite, pygame_gui.core.UIContainer)]
+            bounds.extend(gui_rects)
+            bounds.extend(self.gui_rects)
+            self.gui_rects = gui_rects
+            screen_rect = self.screen.get_rect()
+            updates = merge_rects(bounds, screen_rect)
+            if self.full_update or \
+                    sum(r.w * r.h for r in updates) > self.FULL_UPDATE_FRACTION * screen_rect.w * screen_rect.h:
+                updates = [screen_rect]
+            for r in updates:
                 self.screen.blit(self.background, r, r)
             bounds = []
             self.manager.draw_ui(self.screen)
-            pygame.display.flip()
+            if updates == [screen_rect]:
+                pygame.display.flip()
+            else:
+                pygame.display.update(updates)
+            self.full_update = False
+            if steps and self.adaptive_skip:
+                self.scheduler.record(steps, step_time, time.perf_counter() - frame_start)
+            self.scheduler.tick(steps, tick / 1000.0)
 
         pygame.quit()
 
@@ -457,6 +567,12 @@ class BrickWall:
                         self.g_cell.f_score = float('inf')
                         self.g_cell.g_score = float('inf')
                         bounds.extend(self.reset_run())
+                    elif event.ui_element == self.engine_menu:
+                        self.engine = self.engine_menu.selected_option
+                        # reset the scores for the goal cell
+                        self.g_cell.f_score = float('inf')
+                        self.g_cell.g_score = float('inf')
+                        bounds.extend(self.reset_run())
                     elif event.ui_element == self.maze_type_menu:
                         self.maze_type = self.maze_type_menu.selected_option
                         self.start_new_run()
@@ -492,7 +608,11 @@ class BrickWall:
                         self.start_new_run()
                     elif event.ui_element == self.render_skip_text_box:
                         try:
-                            self.render_skip = int(self.render_skip_text_box.get_text())
+                            if self.render_skip_text_box.get_text().strip().lower() == 'auto':
+                                self.adaptive_skip = True
+                            else:
+                                self.render_skip = int(self.render_skip_text_box.get_text())
+                                self.adaptive_skip = False
                             if self.render_skip < 1:
                                 print('The render skip cannot be less than 1')
                                 self.render_skip = 1
@@ -511,13 +631,13 @@ class BrickWall:
                         self.in_dialog = False
                 elif event.user_type == pygame_gui.UI_WINDOW_CLOSE:
                     if event.ui_element == self.save_dialog:
-                        self.screen.blit(self.background, (0, 0))
+                        self.redraw_screen()
                         self.in_dialog = False
                     elif event.ui_element == self.load_dialog:
-                        self.screen.blit(self.background, (0, 0))
+                        self.redraw_screen()
                         self.in_dialog = False
                     elif event.ui_element == self.export_dialog:
-                        self.screen.blit(self.background, (0, 0))
+                        self.redraw_screen()
                         self.in_dialog = False
             # MOUSE EVENTS
             elif event.type == pygame.MOUSEBUTTONDOWN and not self.in_dialog:
@@ -529,12 +649,12 @@ class BrickWall:
                     # also reset the scores for the goal cell
                     self.g_cell.f_score = float('inf')
                     self.g_cell.g_score = float('inf')
-                    self.s_cell.cell_type = 'empty'
+                    self.s_cell.state = EMPTY
                     self.s_cell.f_score = float('inf')
                     self.s_cell.g_score = float('inf')
                     bounds.append(self.s_cell.draw_cell())
                     self.s_cell = self.grid_map.cell_grid[mouse_y][mouse_x]
-                    self.s_cell.cell_type = 'start'
+                    self.s_cell.state = START
                     self.s_cell.f_score = float('inf')
                     self.s_cell.g_score = float('inf')
                     bounds.append(self.s_cell.draw_cell())
@@ -544,12 +664,12 @@ class BrickWall:
                     if mouse_x == -1 or mouse_y == -1:
                         self.manager.process_events(event)
                         continue
-                    self.g_cell.cell_type = 'empty'
+                    self.g_cell.state = EMPTY
                     self.g_cell.f_score = float('inf')
                     self.g_cell.g_score = float('inf')
                     bounds.append(self.g_cell.draw_cell())
                     self.g_cell = self.grid_map.cell_grid[mouse_y][mouse_x]
-                    self.g_cell.cell_type = 'goal'
+                    self.g_cell.state = GOAL
                     self.g_cell.f_score = float('inf')
                     self.g_cell.g_score = float('inf')
                     bounds.append(self.g_cell.draw_cell())
@@ -563,18 +683,39 @@ class BrickWall:
                 mouse_x, mouse_y = self.grid_map.cell_coords_from_mouse_coords(pygame.mouse.get_pos())
                 if mouse_x == -1 or mouse_y == -1:
                     return
-                if self.grid_map.cell_grid[mouse_y][mouse_x].cell_type == 'empty':
-                    self.grid_map.cell_grid[mouse_y][mouse_x].cell_type = 'wall'
-                    bounds.append(self.grid_map.cell_grid[mouse_y][mouse_x].draw_cell())
+                bounds.extend(self.edit_wall((mouse_y, mouse_x), True))
             elif button3:
                 mouse_x, mouse_y = self.grid_map.cell_coords_from_mouse_coords(pygame.mouse.get_pos())
                 if mouse_x == -1 or mouse_y == -1:
                     return
-                if self.grid_map.cell_grid[mouse_y][mouse_x].cell_type == 'wall':
-                    self.grid_map.cell_grid[mouse_y][mouse_x].cell_type = 'empty'
-                    bounds.append(self.grid_map.cell_grid[mouse_y][mouse_x].draw_cell())
+                bounds.extend(self.edit_wall((mouse_y, mouse_x), False))
         self.manager.update(time_delta)
 
+    def edit_wall(self, coord: Tuple[int, int], wall: bool) -> List[Any]:
+        """
+        Draws or erases a wall on a cell. The LPA* solver is told about the change so it can replan from its current
+        search instead of starting over, and the old search is cleared from the grid.
+        :param coord: the (row, column) of the cell
+        :param wall: True to draw a wall, False to erase it
+        :return: list of rectangles to indicate which parts of the background needs redrawing
+        """
+        cell = self.grid_map.cell_grid[coord[0]][coord[1]]
+        incremental = isinstance(self.solver, PathSolverLPAStar)
+        if wall:
+            editable = cell.state == EMPTY or \
+                       (incremental and cell.state in (VISITED, OPEN_SET, PATH))
+        else:
+            editable = cell.state == WALL
+        if not editable:
+            return []
+        updates = []
+        if incremental:
+            updates.extend(self.grid_map.reset_grid())
+        updates.append(self.grid_map.set_wall(coord, wall))
+        if incremental:
+            self.solver.update_cell(cell)
+        return updates
+
     def save_maze(self, path: str):
         """
         saves the maze to file
@@ -584,9 +725,6 @@ class BrickWall:
         # temporarily remove surface to make object safe to pickle
         surf = self.background
         self.grid_map.surf = None
-        for i in range(self.grid_size[0]):
-            for j in range(self.grid_size[1]):
-                self.grid_map.cell_grid[i][j].surf = None
         to_save = {'grid_map': self.grid_map,
                    'g_cell': self.g_cell,
                    's_cell': self.s_cell,
@@ -597,13 +735,10 @@ class BrickWall:
         outfile.close()
         print("maze saved to:", path)
         self.cur_path = path
-        self.screen.blit(self.background, (0, 0))
+        self.redraw_screen()
 
         # now restore the surface
         self.grid_map.surf = surf
-        for i in range(self.grid_size[0]):
-            for j in range(self.grid_size[1]):
-                self.grid_map.cell_grid[i][j].surf = surf
 
     def load_maze(self, path: str):
         """
@@ -623,25 +758,38 @@ class BrickWall:
         self.grid_map.surf = surf
 
         self.grid_size = self.grid_map.grid_size
-        for i in range(self.grid_size[0]):
-            for j in range(self.grid_size[1]):
-                self.grid_map.cell_grid[i][j].surf = surf
+        if self.grid_map.maze_grid:
+            self.walled_cells = True
+        else:
+            self.walled_cells = False
+        if not isinstance(self.s_cell, CellView):
+            # mazes saved before the cells were kept in arrays hold cell objects that are not part of the loaded grid,
+            # so the search is restarted on the converted grid
+            self.s_cell = self.grid_map.cell_grid[self.s_cell.coord[0]][self.s_cell.coord[1]]
+            self.g_cell = self.grid_map.cell_grid[self.g_cell.coord[0]][self.g_cell.coord[1]]
+            self.maze_generator.cell_grid = self.grid_map.cell_grid
+            self.grid_map.reset_grid()
+            self.new_solver()
 
         print("maze loaded from:", path)
         self.grid_rows_label_text_box.set_text(str(self.grid_size[0]))
         self.cur_path = path
         self.grid_map.render_cells()
-        self.screen.blit(self.background, (0, 0))
+        self.redraw_screen()
         self.paused = True
-        if self.grid_map.maze_grid:
-            self.walled_cells = True
-        else:
-            self.walled_cells = False
         if self.walled_cells:
             self.toggle_draw_button.disable()
         else:
             self.toggle_draw_button.enable()
 
+    def redraw_screen(self):
+        """
+        Copies the whole background to the screen and pushes the whole window to the display at the end of the frame
+        :return: None
+        """
+        self.screen.blit(self.background, (0, 0))
+        self.full_update = True
+
     def draw_text(self, text, pos_index=0, col=(230, 230, 230)) -> pygame.Rect:
         """
         Draws text to the screen in the position index indicatred by pos_index
@@ -0,0 +1,108 @@
+import numpy as np
+import pygame
+
+from grid_cell import GridCell, WalledCell, Walls
+from cell_store import CellStore
+
+# the palette index of the pixels that are not drawn, the background of a walled cell and a wall line
+KEEP, BACKGROUND, WALL_LINE = 255, len(GridCell.FILLS), len(GridCell.FILLS) + 1
+# the transparent colour of the wall layer
+LAYER_KEY = (255, 0, 255)
+
+
+def _palette(surface: pygame.Surface, fills) -> np.ndarray:
+    """
+    utility function to build the pixel value of every palette index
+    :param surface: the surface that is drawn to
+    :param fills: the fill lookup table of the cell class (see GridCell.FILLS)
+    :return: array of 256 pixel values in the format of the surface
+    """
+    colours = [GridCell.BACKGROUND_COLOUR if fill is None else fill[0] for fill in fills]
+    colours += [GridCell.BACKGROUND_COLOUR, WalledCell.WALL_COLOUR]
+    palette = np.zeros(256, dtype=np.uint32)
+    palette[:len(colours)] = [surface.map_rgb(colour) for colour in colours]
+    return palette
+
+
+def _pixel_kinds(offsets: np.ndarray, size: int, border: int) -> np.ndarray:
+    """
+    utility function to classify the pixels of a row or column by where they fall inside their cell
+    :param offsets: the pixel offset of every pixel inside its cell
+    :param size: the cell size in pixels
+    :param border: the border size in pixels
+    :return: uint8 array of bit flags: 1 inside the fill square, 2 inside the inner fill square,
+        4 on the first line of the cell and 8 on its last line
+    """
+    kinds = ((offsets >= border) & (offsets <= size - border)).astype(np.uint8)
+    kinds |= ((offsets >= border + 2) & (offsets <= size - border - 2)) * np.uint8(2)
+    kinds |= (offsets == 0) * np.uint8(4)
+    kinds |= (offsets == size) * np.uint8(8)
+    return kinds
+
+
+def _draw_table(fills, maze_grid: bool) -> np.ndarray:
+    """
+    utility function to work out what draw_cell leaves in a pixel for every cell type, set of walls and pixel kind
+    :param fills: the fill lookup table of the cell class (see GridCell.FILLS)
+    :param maze_grid: True if the cells are WalledCells
+    :return: uint8 array of palette indices, indexed by ((code * 16 + walls) * 16 + row kind) * 16 + column kind
+    """
+    codes = np.arange(len(fills))[:, None, None, None]
+    walls = np.arange(16)[None, :, None, None]
+    row_kinds = np.arange(16)[None, None, :, None]
+    col_kinds = np.arange(16)[None, None, None, :]
+    valid = np.array([fill is not None for fill in fills])[codes]
+    inner = np.array([fill is not None and fill[1] for fill in fills])[codes]
+    in_fill = np.where(inner, row_kinds & col_kinds & 2, row_kinds & col_kinds & 1) != 0
+    table = np.where(valid & in_fill, codes, KEEP)
+    if maze_grid:
+        # walled cells clear their whole square first and draw their wall lines last. Cells with a type that can not
+        # be drawn only get the background.
+        table = np.where(table == KEEP, BACKGROUND, table)
+        line = ((row_kinds & 4 != 0) & (walls & Walls.NORTH.value != 0)) | \
+               ((row_kinds & 8 != 0) & (walls & Walls.SOUTH.value != 0)) | \
+               ((col_kinds & 4 != 0) & (walls & Walls.WEST.value != 0)) | \
+               ((col_kinds & 8 != 0) & (walls & Walls.EAST.value != 0))
+        table = np.where(valid & line, WALL_LINE, table)
+    return np.broadcast_to(table, (len(fills), 16, 16, 16)).astype(np.uint8).ravel()
+
+
+def render_grid(store: CellStore) -> pygame.Rect:
+    """
+    Draws every cell of the grid to the surface of the store in one go. The image is built with NumPy from the cell type
+    and wall arrays and gives the same pixels as calling draw_cell on every cell in row-major order, including the
+    pixels that an inner fill leaves untouched on a grid without cell walls.
+    On a maze grid the wall lines are also kept on their own in the wall layer of the store, which the cells that
+    change while solving are composited with (see WalledCellView.draw_cell).
+    :param store: the cell store of the grid
+    :return: rectangle that defines the bounds of the drawing
+    """
+    fills = WalledCell.FILLS if store.maze_grid else GridCell.FILLS
+    size = store.cell_size
+    # the cells of a maze grid overlap by one pixel on their east and south sides and are drawn in row-major order, so
+    # a pixel belongs to the last cell drawn over it
+    pixel_rows = np.arange(store.rows * size + 1)
+    pixel_cols = np.arange(store.cols * size + 1)
+    rows = np.minimum(pixel_rows // size, store.rows - 1)
+    cols = np.minimum(pixel_cols // size, store.cols - 1)
+    row_kinds = _pixel_kinds(pixel_rows - rows * size, size, store.border_size).astype(np.int32)
+    col_kinds = _pixel_kinds(pixel_cols - cols * size, size, store.border_size).astype(np.int32)
+
+    rect = pygame.Rect(store.origin, (len(pixel_cols), len(pixel_rows))).clip(store.surf.get_rect())
+    # surfarray works with (x, y) arrays
+    cells = (store.type_array().astype(np.int32) * 16 + store.wall_array()).T
+    cells = cells.take(cols[:rect.width], axis=0).take(rows[:rect.height], axis=1)
+    keys = cells * 256 + (col_kinds[:rect.width, None] + row_kinds[None, :rect.height] * 16)
+    image = _draw_table(fills, store.maze_grid).take(keys)
+
+    area = store.surf.subsurface(rect)
+    pixels = _palette(store.surf, fills).take(image)
+    if not store.maze_grid:
+        pixels = np.where(image == KEEP, pygame.surfarray.array2d(area), pixels)
+    pygame.surfarray.blit_array(area, pixels)
+    if store.maze_grid:
+        layer = pygame.Surface(rect.size, 0, store.surf)
+        pygame.surfarray.blit_array(layer, np.where(image == WALL_LINE, pixels, layer.map_rgb(LAYER_KEY)))
+        layer.set_colorkey(LAYER_KEY)
+        store.wall_layer = layer
+    return rect
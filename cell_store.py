@@ -0,0 +1,380 @@
+from array import array
+from typing import List, Tuple, Optional, Iterator
+from collections.abc import Sequence
+import numpy as np
+import pygame
+
+from grid_cell import GridCell, WalledCell, Walls, CELL_TYPES, TYPE_CODES, EMPTY
+
+ALL_WALLS = (Walls.NORTH | Walls.SOUTH | Walls.EAST | Walls.WEST).value
+
+
+class CellStore:
+    """
+    Keeps the state of every cell of a grid in flat arrays in row-major order (struct of arrays) instead of one
+    GridCell object per cell: one byte for the cell type code, one byte for the wall bits (the Walls flag values) and
+    one byte for the cost. The f_scores, g_scores and parents are only allocated once a solver or maze generator writes
+    them. The drawing bounds of a cell are calculated from its coordinate when they are needed.
+    The arrays are bytearrays so single cells can be read quickly, while type_array, wall_array and cost_array give
+    writable NumPy views of the same memory for whole-grid operations.
+    Every cell whose type or walls are written through a view is marked in the dirty map, so resets only have to look
+    at the cells the solvers and maze generators touched since the last reset (see take_dirty).
+    Code that works with cells gets them through CellGrid, which hands out CellView objects that read and write these
+    arrays and behave like GridCells and WalledCells. The views hold no state of their own, so a new one is made for
+    every lookup instead of keeping a view of every cell alive.
+    """
+
+    def __init__(self, surface: Optional[pygame.Surface], origin: Tuple[int, int], cell_size: int,
+                 grid_size: List[int], maze_grid: bool = False, border_size: int = 1):
+        """
+        Creates the arrays of an empty grid
+        :param surface: the background surface the cells draw to
+        :param origin: the (x, y) pixel position of the top-left corner of the grid
+        :param cell_size: the width and height of a cell in pixels
+        :param grid_size: number of cells as (rows, columns)
+        :param maze_grid: if true every cell starts with all four walls
+        :param border_size: the size in pixels of the border between cells. Not used for maze grids.
+        """
+        self.surf = surface
+        self.origin = tuple(origin)
+        self.cell_size = cell_size
+        self.rows = grid_size[0]
+        self.cols = grid_size[1]
+        self.maze_grid = maze_grid
+        self.border_size = 0 if maze_grid else border_size
+        n = self.rows * self.cols
+        self.types = bytearray(n)
+        self.walls = bytearray([ALL_WALLS]) * n if maze_grid else bytearray(n)
+        self.cost = bytearray([1]) * n
+        self.f_scores = None
+        self.g_scores = None
+        # the id of the cell each cell came from (-1 for none)
+        self.parents = None
+        # one byte per cell, set when the type or walls of the cell change and cleared by take_dirty
+        self.dirty = bytearray(n)
+        # the pre-rendered wall lines of a maze grid, built by bulk_render.render_grid and dropped when a wall changes
+        self.wall_layer = None
+
+    def __getstate__(self):
+        """
+        The surfaces can not be pickled
+        :return: the attribute dictionary to pickle
+        """
+        state = self.__dict__.copy()
+        state['surf'] = None
+        state['wall_layer'] = None
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restores a pickled store. Stores saved without a dirty map treat every cell as touched and the view cache of
+        older stores is dropped.
+        :param state: the pickled attribute dictionary
+        :return: None
+        """
+        self.wall_layer = None
+        self.__dict__.update(state)
+        self.__dict__.pop('views', None)
+        if 'dirty' not in state:
+            self.dirty = bytearray([1]) * (self.rows * self.cols)
+
+    @classmethod
+    def from_cell_grid(cls, cell_grid: List[List[GridCell]], surface: Optional[pygame.Surface],
+                       origin: Tuple[int, int], cell_size: int, maze_grid: bool) -> 'CellStore':
+        """
+        Copies the cell types, walls and costs of a grid of cell objects into a new store. Used for mazes that were
+        saved before the grid was kept in arrays.
+        :param cell_grid: the cell grid (either GridCells or WalledCells)
+        :param surface: the background surface the cells draw to
+        :param origin: the (x, y) pixel position of the top-left corner of the grid
+        :param cell_size: the width and height of a cell in pixels
+        :param maze_grid: True if the cells are WalledCells
+        :return: the new store
+        """
+        store = cls(surface, origin, cell_size, [len(cell_grid), len(cell_grid[0])], maze_grid)
+        store.types[:] = bytes(cell.state for row in cell_grid for cell in row)
+        store.cost[:] = bytes(cell.cost for row in cell_grid for cell in row)
+        if maze_grid:
+            store.walls[:] = bytes(cell.walls.value for row in cell_grid for cell in row)
+        # nothing is known about which cells the saved search touched
+        store.dirty[:] = bytearray([1]) * len(store.dirty)
+        return store
+
+    def type_array(self) -> np.ndarray:
+        """
+        :return: a writable (rows, columns) uint8 view of the cell type codes
+        """
+        return np.frombuffer(self.types, dtype=np.uint8).reshape(self.rows, self.cols)
+
+    def types_flat(self) -> np.ndarray:
+        """
+        :return: a writable flat uint8 view of the cell type codes indexed by cell id
+        """
+        return np.frombuffer(self.types, dtype=np.uint8)
+
+    def wall_array(self) -> np.ndarray:
+        """
+        :return: a writable (rows, columns) uint8 view of the wall bits
+        """
+        return np.frombuffer(self.walls, dtype=np.uint8).reshape(self.rows, self.cols)
+
+    def cost_array(self) -> np.ndarray:
+        """
+        :return: a writable (rows, columns) uint8 view of the cell costs
+        """
+        return np.frombuffer(self.cost, dtype=np.uint8).reshape(self.rows, self.cols)
+
+    def scores(self) -> Tuple[array, array]:
+        """
+        :return: the f_score and g_score arrays, allocated the first time a score is written
+        """
+        if self.f_scores is None:
+            self.f_scores = array('d', [float('inf')]) * (self.rows * self.cols)
+            self.g_scores = array('d', [float('inf')]) * (self.rows * self.cols)
+        return self.f_scores, self.g_scores
+
+    def parent_array(self) -> array:
+        """
+        :return: the parent array, allocated the first time a parent is written
+        """
+        if self.parents is None:
+            self.parents = array('q', [-1]) * (self.rows * self.cols)
+        return self.parents
+
+    def take_dirty(self) -> np.ndarray:
+        """
+        Returns the cells marked in the dirty map and clears the map
+        :return: array of the ids of the cells that changed since the last call
+        """
+        dirty = np.frombuffer(self.dirty, dtype=np.uint8)
+        indices = np.flatnonzero(dirty)
+        dirty[:] = 0
+        return indices
+
+    def reset_cells(self, indices: np.ndarray):
+        """
+        Clears the type, cost, scores and parent of a set of cells at once, like GridCell.reset_scores
+        :param indices: array of cell ids
+        :return: None
+        """
+        self.types_flat()[indices] = EMPTY
+        np.frombuffer(self.cost, dtype=np.uint8)[indices] = 1
+        if self.f_scores is not None:
+            np.frombuffer(self.f_scores, dtype=np.float64)[indices] = np.inf
+            np.frombuffer(self.g_scores, dtype=np.float64)[indices] = np.inf
+        if self.parents is not None:
+            np.frombuffer(self.parents, dtype=np.int64)[indices] = -1
+
+    def clear_search(self):
+        """
+        Drops the scores and parents of every cell
+        :return: None
+        """
+        self.f_scores = None
+        self.g_scores = None
+        self.parents = None
+
+    def view(self, row: int, col: int) -> 'CellView':
+        """
+        Creates a view of a cell. Views compare and hash by their coordinate, so two views of the same cell are
+        interchangeable.
+        :param row: the row of the cell
+        :param col: the column of the cell
+        :return: a new view of the cell
+        """
+        view = WalledCellView.__new__(WalledCellView) if self.maze_grid else CellView.__new__(CellView)
+        view.store = self
+        view.index = row * self.cols + col
+        view.coord = (row, col)
+        return view
+
+    def cell(self, index: int) -> 'CellView':
+        """
+        :param index: the id (row * columns + column) of a cell
+        :return: a new view of the cell
+        """
+        return self.view(*divmod(index, self.cols))
+
+    def bounding_rect(self, row: int, col: int) -> Tuple[int, int, int, int]:
+        """
+        :param row: the row of the cell
+        :param col: the column of the cell
+        :return: the drawing limits of the cell as (top_left_x, top_left_y, bottom_right_x, bottom_right_y)
+        """
+        x = self.origin[0] + col * self.cell_size
+        y = self.origin[1] + row * self.cell_size
+        return (x + self.border_size, y + self.border_size,
+                x + self.cell_size - self.border_size, y + self.cell_size - self.border_size)
+
+
+class CellView(GridCell):
+    """
+    A cell of a CellStore. It has the attributes and methods of a GridCell but keeps its state in the arrays of the
+    store, so a view only holds the store, the id of the cell and its coordinate.
+    """
+
+    @property
+    def surf(self) -> Optional[pygame.Surface]:
+        return self.store.surf
+
+    @surf.setter
+    def surf(self, surface: Optional[pygame.Surface]):
+        self.store.surf = surface
+
+    @property
+    def state(self) -> int:
+        return self.store.types[self.index]
+
+    @state.setter
+    def state(self, code: int):
+        self.store.types[self.index] = code
+        self.store.dirty[self.index] = 1
+
+    @property
+    def cell_type(self) -> str:
+        return CELL_TYPES[self.store.types[self.index]]
+
+    @cell_type.setter
+    def cell_type(self, cell_type: str):
+        self.store.types[self.index] = TYPE_CODES[cell_type]
+        self.store.dirty[self.index] = 1
+
+    @property
+    def walls(self) -> Walls:
+        return Walls(self.store.walls[self.index])
+
+    @walls.setter
+    def walls(self, walls: Walls):
+        self.store.walls[self.index] = walls.value
+        self.store.dirty[self.index] = 1
+        self.store.wall_layer = None
+
+    @property
+    def cost(self) -> int:
+        return self.store.cost[self.index]
+
+    @cost.setter
+    def cost(self, cost: int):
+        self.store.cost[self.index] = cost
+
+    @property
+    def f_score(self) -> float:
+        return float('inf') if self.store.f_scores is None else self.store.f_scores[self.index]
+
+    @f_score.setter
+    def f_score(self, f_score: float):
+        self.store.scores()[0][self.index] = f_score
+
+    @property
+    def g_score(self) -> float:
+        return float('inf') if self.store.g_scores is None else self.store.g_scores[self.index]
+
+    @g_score.setter
+    def g_score(self, g_score: float):
+        self.store.scores()[1][self.index] = g_score
+
+    @property
+    def comes_from(self) -> Optional['CellView']:
+        if self.store.parents is None or self.store.parents[self.index] < 0:
+            return None
+        return self.store.cell(self.store.parents[self.index])
+
+    @comes_from.setter
+    def comes_from(self, cell: Optional[GridCell]):
+        if cell is None:
+            if self.store.parents is not None:
+                self.store.parents[self.index] = -1
+        else:
+            self.store.parent_array()[self.index] = cell.coord[0] * self.store.cols + cell.coord[1]
+
+    @property
+    def bounding_rect(self) -> Tuple[int, int, int, int]:
+        return self.store.bounding_rect(*self.coord)
+
+    @property
+    def draw_bounds(self) -> Tuple[int, int, int, int]:
+        rect = self.store.bounding_rect(*self.coord)
+        return rect[0], rect[1], rect[2] - rect[0] + 1, rect[3] - rect[1] + 1
+
+    @property
+    def inner_bound(self) -> Tuple[int, int, int, int]:
+        # same inner border as GridCell
+        bounds = self.draw_bounds
+        return bounds[0] + 2, bounds[1] + 2, bounds[2] - 4, bounds[3] - 4
+
+
+class WalledCellView(CellView, WalledCell):
+    """
+    A cell of a CellStore of a maze grid. Draws its walls and tunnels through them like a WalledCell.
+    Once the walls are finished and the grid has been rendered the wall lines come from the wall layer of the store,
+    so a changed cell only draws its fill and copies the walls over it instead of drawing them line by line.
+    """
+
+    def draw_cell(self) -> pygame.Rect:
+        """
+        Draws the cell based on the cell type and return the bounds of the drawing
+        :return: rectangle that defines the bounds of the drawing
+        """
+        layer = self.store.wall_layer
+        fill = self.FILLS[self.store.types[self.index]]
+        if layer is None or fill is None:
+            return WalledCell.draw_cell(self)
+        bounds = pygame.Rect(self.draw_bounds)
+        colour, inner = fill
+        if inner:
+            pygame.draw.rect(self.surf, self.BACKGROUND_COLOUR, bounds)
+        pygame.draw.rect(self.surf, colour, self.inner_bound if inner else bounds)
+        self.surf.blit(layer, bounds, bounds.move(-self.store.origin[0], -self.store.origin[1]))
+        return bounds
+
+
+class CellRow(Sequence):
+    """
+    One row of a CellGrid
+    """
+
+    def __init__(self, store: CellStore, row: int):
+        """
+        :param store: the store that holds the cells
+        :param row: the index of the row
+        """
+        self.store = store
+        self.offset = row * store.cols
+
+    def __len__(self) -> int:
+        return self.store.cols
+
+    def __getitem__(self, col: int) -> CellView:
+        cols = self.store.cols
+        if col < 0:
+            col += cols
+        if not 0 <= col < cols:
+            raise IndexError('cell column out of range')
+        return self.store.cell(self.offset + col)
+
+    def __iter__(self) -> Iterator[CellView]:
+        for col in range(self.store.cols):
+            yield self[col]
+
+
+class CellGrid(Sequence):
+    """
+    Gives the cells of a CellStore as cell_grid[row][column], like the list of lists of cell objects it replaces.
+    A new view is created every time a cell is looked up.
+    """
+
+    def __init__(self, store: CellStore):
+        """
+        :param store: the store that holds the cells
+        """
+        self.store = store
+        self.rows = [CellRow(store, row) for row in range(store.rows)]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, row: int) -> CellRow:
+        return self.rows[row]
+
+    def __iter__(self) -> Iterator[CellRow]:
+        return iter(self.rows)
@@ -0,0 +1,168 @@
+import random
+import pickle as pkl
+from typing import List
+import numpy as np
+import pygame
+
+from grid_map import GridMap
+from grid_cell import EMPTY, WALL
+from hierarchical_solver import HierarchicalSolver
+from path_solver_astar import PathSolverAStar
+from path_solver_frontier import PathSolverFrontier
+from path_solver_lpastar import PathSolverLPAStar
+from wavefront_solver import WavefrontSolver
+
+
+def bfs_cost(grid_map: GridMap, start_coord, goal_coord) -> float:
+    """
+    Finds the cost of the shortest path with a breadth-first wavefront over the adjacency table of the grid
+    :param grid_map: the grid to search
+    :param start_coord: the (row, column) of the start cell
+    :param goal_coord: the (row, column) of the goal cell
+    :return: the number of steps from the start cell to the goal cell, inf if the goal cannot be reached
+    """
+    distance = WavefrontSolver(grid_map.get_adjacency()).distances(start_coord)[goal_coord]
+    return float('inf') if distance < 0 else float(distance)
+
+
+def check_lpastar(seeds: int = 20, edits: int = 15, shape=(30, 60), walls_ratio: float = 0.25) -> int:
+    """
+    Checks that LPA* finds the same path costs as a breadth-first search on random grids, both for the first search
+    and after every wall edit it replans for
+    :param seeds: the number of random grids to check
+    :param edits: the number of walls drawn or erased on every grid
+    :param shape: the (rows, columns) of the grids
+    :param walls_ratio: the fraction of the grid that is turned into walls
+    :return: the number of mismatched costs
+    """
+    rows, cols = shape
+    failures = 0
+    for seed in range(seeds):
+        np.random.seed(seed)
+        random.seed(seed)
+        # the wall edits are drawn, so the grid gets an off-screen surface with one pixel per cell
+        grid_map = GridMap(pygame.Surface((cols + 1, rows + 1)), [0, 0, cols, rows], [rows, cols])
+        start_cell, goal_cell = grid_map.init_grid(random_walls_ratio=walls_ratio)
+        solver = PathSolverLPAStar(grid_map.cell_grid, start_cell, goal_cell, heuristic='manhattan')
+        for edit in range(edits + 1):
+            label = 'fresh grid' if edit == 0 else f'edit {edit}'
+            if edit > 0:
+                row, col = random.randrange(rows), random.randrange(cols)
+                cell = grid_map.cell_grid[row][col]
+                if cell.state not in (EMPTY, WALL):
+                    continue
+                grid_map.set_wall((row, col), cell.state == EMPTY)
+                solver.update_cell(cell)
+            cost = solver.solve().cost
+            expected = bfs_cost(grid_map, start_cell.coord, goal_cell.coord)
+            if cost != expected:
+                failures += 1
+                print(f'LPA* seed {seed}, {label}: cost {cost}, breadth-first search {expected}')
+    return failures
+
+
+def check_frontier(seeds: int = 20, budgets=(30, 100, 1024, 2400), shape=(40, 60)) -> int:
+    """
+    Checks that the memory-bounded search finishes on random grids, never reports a path shorter than a breadth-first
+    search, stays within its node budget and finds the shortest path whenever the budget is large enough
+    :param seeds: the number of random grids to check
+    :param budgets: the node budgets to solve every grid with
+    :param shape: the (rows, columns) of the grids
+    :return: the number of failed checks
+    """
+    rows, cols = shape
+    failures = 0
+    for seed in range(seeds):
+        np.random.seed(seed)
+        grid_map = GridMap(None, [0, 0, cols, rows], [rows, cols])
+        start_cell, goal_cell = grid_map.init_grid(random_walls_ratio=0.1 * (seed % 4))
+        expected = bfs_cost(grid_map, start_cell.coord, goal_cell.coord)
+        for budget in budgets:
+            solver = PathSolverFrontier(grid_map.cell_grid, start_cell, goal_cell, heuristic='manhattan',
+                                        movement='manhattan', adjacency=grid_map.get_adjacency(), node_budget=budget)
+            cost = solver.solve().cost
+            if cost < expected or solver.peak_nodes > budget or (budget >= rows * cols and cost != expected):
+                failures += 1
+                print(f'memory-bounded seed {seed}, budget {budget}: cost {cost} with a peak of {solver.peak_nodes} '
+                      f'nodes, breadth-first search {expected}')
+    return failures
+
+
+def check_hierarchy(seeds: int = 10, edits: int = 20, shape=(40, 60)) -> int:
+    """
+    Checks that the hierarchical solver keeps its abstract graph up to date through wall edits and that its paths are
+    valid: every step is an open move, the path length is the reported cost and no path is shorter than a
+    breadth-first search
+    :param seeds: the number of random grids to check
+    :param edits: the number of walls drawn or erased on every grid
+    :param shape: the (rows, columns) of the grids
+    :return: the number of failed checks
+    """
+    rows, cols = shape
+    failures = 0
+    for seed in range(seeds):
+        np.random.seed(seed)
+        random.seed(seed)
+        grid_map = GridMap(pygame.Surface((cols + 1, rows + 1)), [0, 0, cols, rows], [rows, cols])
+        start_cell, goal_cell = grid_map.init_grid(random_walls_ratio=0.1 * (seed % 4))
+        hierarchy = grid_map.get_hierarchy(cluster_size=8)
+        for edit in range(edits):
+            row, col = random.randrange(rows), random.randrange(cols)
+            cell = grid_map.cell_grid[row][col]
+            if cell.state in (EMPTY, WALL):
+                grid_map.set_wall((row, col), cell.state == EMPTY)
+        fresh = HierarchicalSolver(grid_map.get_adjacency(), cluster_size=8)
+        if {node: sorted(edges) for node, edges in hierarchy.edges.items()} != \
+                {node: sorted(edges) for node, edges in fresh.edges.items()}:
+            failures += 1
+            print(f'hierarchical seed {seed}: the abstract graph differs from a fresh build after {edits} edits')
+        result = hierarchy.solve(start_cell.coord, goal_cell.coord)
+        expected = bfs_cost(grid_map, start_cell.coord, goal_cell.coord)
+        adjacency = grid_map.get_adjacency()
+        valid = all(step in adjacency.neighbours(coord) for coord, step in zip(result.path, result.path[1:]))
+        if not valid or result.cost < expected or (result.path and len(result.path) - 1 != result.cost) or \
+                (result.cost == float('inf')) != (expected == float('inf')):
+            failures += 1
+            print(f'hierarchical seed {seed}: cost {result.cost} over {len(result.path)} cells, breadth-first search '
+                  f'{expected}')
+    return failures
+
+
+def check_landmarks(paths: List[str]) -> int:
+    """
+    Compares A* with the landmarks heuristic against A* with the manhattan heuristic on saved mazes. Both heuristics are
+    admissible so the path costs must be the same, and the number of cells each search expanded is printed.
+    :param paths: the .mz files saved by BrickWall
+    :return: the number of mazes on which the path costs differ
+    """
+    failures = 0
+    for path in paths:
+        with open(path, 'rb') as fromfile:
+            saved = pkl.load(fromfile)
+        grid_map = saved['grid_map']
+        start_cell = grid_map.cell_grid[saved['s_cell'].coord[0]][saved['s_cell'].coord[1]]
+        goal_cell = grid_map.cell_grid[saved['g_cell'].coord[0]][saved['g_cell'].coord[1]]
+        movement = 'walls' if grid_map.maze_grid else 'manhattan'
+        adjacency = grid_map.get_adjacency() if grid_map.maze_grid else None
+        baseline = PathSolverAStar(grid_map.cell_grid, start_cell, goal_cell, heuristic='manhattan',
+                                   movement=movement, adjacency=adjacency).solve()
+        result = PathSolverAStar(grid_map.cell_grid, start_cell, goal_cell, heuristic='landmarks',
+                                 movement=movement, adjacency=adjacency, landmarks=grid_map.get_landmarks()).solve()
+        if result.cost != baseline.cost:
+            failures += 1
+            print(f'{path}: landmarks cost {result.cost}, manhattan cost {baseline.cost}')
+        elif baseline.expanded > 0:
+            print(f'{path}: landmarks expanded {result.expanded} cells against {baseline.expanded} with manhattan '
+                  f'({100 * (1 - result.expanded / baseline.expanded):.1f}% fewer)')
+    return failures
+
+
+if __name__ == '__main__':
+    failed = check_lpastar()
+    print('LPA* costs match breadth-first search' if not failed else f'{failed} LPA* costs do not match')
+    failed = check_frontier()
+    print('memory-bounded costs are valid' if not failed else f'{failed} memory-bounded checks failed')
+    failed = check_hierarchy()
+    print('hierarchical paths are valid' if not failed else f'{failed} hierarchical checks failed')
+    failed = check_landmarks(['mazes/maze_1_60x120.mz', 'mazes/maze_grid_60x120.mz', 'mazes/maze_wilson_120x240.mz'])
+    print('landmark costs match manhattan' if not failed else f'{failed} landmark costs do not match')
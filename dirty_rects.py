@@ -0,0 +1,71 @@
+from typing import List, Any
+import pygame
+
+# the size in pixels of the square tiles the dirty rectangles are snapped to
+TILE_SIZE = 32
+
+
+def merge_rects(rects: List[Any], bounds: pygame.Rect, tile_size: int = TILE_SIZE) -> List[pygame.Rect]:
+    """
+    Merges overlapping and adjacent rectangles into a small set of rectangles that covers all of them.
+    The rectangles are snapped to a grid of square tiles, the dirty tiles of every tile row are joined into runs and
+    runs that span the same columns in consecutive tile rows are joined into one rectangle. The result is slightly
+    larger than the exact union, but the number of rectangles only depends on the shape of the dirty area and not on
+    the number of rectangles that were drawn.
+    :param rects: the rectangles that were drawn, as pygame.Rect objects or (x, y, width, height) tuples
+    :param bounds: the area of the screen, the merged rectangles are clipped to it
+    :param tile_size: the size in pixels of the tiles
+    :return: list of non-overlapping rectangles
+    """
+    tiles = set()
+    for rect in rects:
+        rect = bounds.clip(rect)
+        if rect.width <= 0 or rect.height <= 0:
+            continue
+        columns = range(rect.left // tile_size, (rect.right - 1) // tile_size + 1)
+        for tile_row in range(rect.top // tile_size, (rect.bottom - 1) // tile_size + 1):
+            tiles.update((tile_row, column) for column in columns)
+
+    merged = []
+    # the rectangles that can still grow downwards, keyed by the first and last tile column of their run
+    open_rects = {}
+    last_row = None
+    for tile_row, column in sorted(tiles):
+        if tile_row != last_row:
+            if last_row is not None:
+                open_rects = _close_row(open_rects, runs, last_row, merged)
+            runs = []
+            last_row = tile_row
+        if runs and runs[-1][1] == column - 1:
+            runs[-1][1] = column
+        else:
+            runs.append([column, column])
+    if last_row is not None:
+        open_rects = _close_row(open_rects, runs, last_row, merged)
+    merged.extend(open_rects.values())
+    return [bounds.clip(pygame.Rect(first * tile_size, top * tile_size, (last - first + 1) * tile_size,
+                                    (bottom - top + 1) * tile_size))
+            for top, bottom, first, last in merged]
+
+
+def _close_row(open_rects: dict, runs: List[List[int]], tile_row: int, merged: List[tuple]) -> dict:
+    """
+    utility function to extend the open rectangles with the runs of a tile row
+    :param open_rects: the rectangles that ended on the previous tile row, keyed by (first column, last column)
+    :param runs: the [first column, last column] runs of dirty tiles on this tile row
+    :param tile_row: the index of the tile row
+    :param merged: the finished rectangles as (top row, bottom row, first column, last column). Open rectangles that
+        can not be extended are added to it.
+    :return: the open rectangles that end on this tile row
+    """
+    extended = {}
+    for first, last in runs:
+        top = tile_row
+        previous = open_rects.pop((first, last), None)
+        if previous is not None and previous[1] == tile_row - 1:
+            top = previous[0]
+        elif previous is not None:
+            merged.append(previous)
+        extended[(first, last)] = (top, tile_row, first, last)
+    merged.extend(open_rects.values())
+    return extended
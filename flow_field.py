@@ -0,0 +1,106 @@
+from typing import List, Tuple
+from collections import OrderedDict
+import numpy as np
+
+from grid_adjacency import DIRECTIONS
+from grid_map import GridMap
+from wavefront_solver import WavefrontSolver
+
+
+class FlowField:
+    """
+    The shortest distance to a single goal cell and the direction of the next step towards it for every cell of the
+    grid. It is built with one wavefront expansion from the goal cell, after which the path of any agent can be read
+    off in O(path length) without searching.
+    """
+
+    def __init__(self, solver: WavefrontSolver, goal: Tuple[int, int]):
+        """
+        Builds the flow field for a goal cell
+        :param solver: a wavefront solver of the grid
+        :param goal: the (row, column) of the goal cell
+        """
+        self.goal = goal
+        self.cols = solver.cols
+        # every move can be reversed so the distances from the goal are the distances to the goal
+        self.dist = solver.distances(goal)
+        flat = self.dist.reshape(-1)
+        # index into DIRECTIONS of the next step of every cell, -1 for the goal and unreachable cells
+        self.next_step = np.full(flat.size, -1, dtype=np.int8)
+        for k, (bit, offset) in enumerate(solver.moves):
+            cells = np.flatnonzero(((solver.open_dirs & bit) != 0) & (flat > 0) & (self.next_step < 0))
+            closer = flat[cells + offset] == flat[cells] - 1
+            self.next_step[cells[closer]] = k
+        self.next_step = self.next_step.reshape(self.dist.shape)
+
+    def distance(self, coord: Tuple[int, int]) -> int:
+        """
+        :param coord: the (row, column) of a cell
+        :return: the number of steps from the cell to the goal (-1 if the goal cannot be reached)
+        """
+        return int(self.dist[coord])
+
+    def path(self, start: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Follows the flow field from a cell to the goal
+        :param start: the (row, column) of the cell the agent is in
+        :return: the cells from the start cell to the goal (empty if the goal cannot be reached)
+        """
+        if self.dist[start] < 0:
+            return []
+        row, col = start
+        path = [(row, col)]
+        direction = self.next_step[row, col]
+        while direction >= 0:
+            row += DIRECTIONS[direction][2]
+            col += DIRECTIONS[direction][3]
+            path.append((row, col))
+            direction = self.next_step[row, col]
+        return path
+
+
+class FlowFieldCache:
+    """
+    Keeps the flow fields of a grid for the most recently used goal cells. All fields are dropped as soon as the walls
+    of the grid change (tracked with GridMap.walls_version).
+    """
+
+    def __init__(self, grid_map: GridMap, max_fields: int = 16):
+        """
+        Creates an empty cache for a grid
+        :param grid_map: the grid the flow fields are built for
+        :param max_fields: the number of goal cells to keep fields for before the least recently used one is dropped
+        """
+        self.grid_map = grid_map
+        self.max_fields = max_fields
+        self.fields = OrderedDict()
+        self.solver = None
+        self.walls_version = None
+
+    def get(self, goal: Tuple[int, int]) -> FlowField:
+        """
+        Returns the flow field for a goal cell, building it if it is not cached
+        :param goal: the (row, column) of the goal cell
+        :return: the FlowField of the goal
+        """
+        if self.walls_version != self.grid_map.walls_version:
+            self.fields.clear()
+            self.solver = WavefrontSolver(self.grid_map.get_adjacency())
+            self.walls_version = self.grid_map.walls_version
+        goal = tuple(goal)
+        if goal in self.fields:
+            self.fields.move_to_end(goal)
+        else:
+            self.fields[goal] = FlowField(self.solver, goal)
+            if len(self.fields) > self.max_fields:
+                self.fields.popitem(last=False)
+        return self.fields[goal]
+
+    def path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Returns the shortest path of an agent to a goal cell using the cached flow field of the goal
+        :param start: the (row, column) of the agent
+        :param goal: the (row, column) of the goal cell
+        :return: the cells from the start cell to the goal (empty if the goal cannot be reached)
+        """
+        return self.get(goal).path(start)
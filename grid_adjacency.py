@@ -0,0 +1,143 @@
+from typing import List, Tuple
+import numpy as np
+from grid_cell import GridCell, WalledCell, Walls, WALL
+from cell_store import CellStore, CellGrid
+
+# bit values of the open directions in the adjacency table (the same bits used by the Walls flags)
+NORTH = Walls.NORTH.value
+SOUTH = Walls.SOUTH.value
+EAST = Walls.EAST.value
+WEST = Walls.WEST.value
+ALL_DIRECTIONS = NORTH | SOUTH | EAST | WEST
+
+# (bit, opposite bit, row offset, column offset) in the order the solvers visit neighbours
+DIRECTIONS = ((NORTH, SOUTH, -1, 0), (WEST, EAST, 0, -1), (EAST, WEST, 0, 1), (SOUTH, NORTH, 1, 0))
+
+# lookup table from a 4-bit open direction mask to the (row, column) offsets of the reachable neighbours
+STEPS = tuple(tuple((d[2], d[3]) for d in DIRECTIONS if mask & d[0]) for mask in range(ALL_DIRECTIONS + 1))
+
+
+class GridAdjacency:
+    """
+    A compact adjacency table for the 4-connected cell grid. Every cell stores a 4-bit mask of the directions that
+    can be moved in from that cell, so enumerating neighbours is a table lookup instead of a 3x3 window scan with
+    wall flag tests. For WalledCell grids a direction is open if the walls on both sides of the passage are open and
+    for GridCell grids it is open if neither cell is a wall.
+    """
+
+    def __init__(self, rows: int, cols: int):
+        """
+        Creates a new table with all directions closed
+        :param rows: the number of rows in the grid
+        :param cols: the number of columns in the grid
+        """
+        self.rows = rows
+        self.cols = cols
+        # the open direction mask of each cell in row-major order
+        self.open_dirs = bytearray(rows * cols)
+
+    @classmethod
+    def from_cell_grid(cls, cell_grid: List[List[GridCell]]) -> 'GridAdjacency':
+        """
+        Builds the table for a grid of cells
+        :param cell_grid: the cell grid (either GridCells or WalledCells)
+        :return: a new GridAdjacency
+        """
+        if isinstance(cell_grid, CellGrid):
+            return cls.from_cell_store(cell_grid.store)
+        adjacency = cls(len(cell_grid), len(cell_grid[0]))
+        if isinstance(cell_grid[0][0], WalledCell):
+            # read the flags once into plain integers, the flag operations are slow
+            open_walls = [[ALL_DIRECTIONS & ~cell.walls.value for cell in row] for row in cell_grid]
+        else:
+            open_walls = [[0 if cell.state == WALL else ALL_DIRECTIONS for cell in row] for row in cell_grid]
+        for r in range(adjacency.rows):
+            for c in range(adjacency.cols):
+                adjacency.open_dirs[r * adjacency.cols + c] = adjacency.__mask(open_walls, r, c)
+        return adjacency
+
+    @classmethod
+    def from_cell_store(cls, store: CellStore) -> 'GridAdjacency':
+        """
+        Builds the table for a grid kept in a CellStore with array operations over the whole grid
+        :param store: the cell store of the grid
+        :return: a new GridAdjacency
+        """
+        adjacency = cls(store.rows, store.cols)
+        if store.maze_grid:
+            open_walls = ALL_DIRECTIONS & ~store.wall_array()
+        else:
+            open_walls = np.where(store.type_array() == WALL, 0, ALL_DIRECTIONS).astype(np.uint8)
+        mask = np.zeros_like(open_walls)
+        # a direction is open if the sides of both cells of the passage are open
+        mask[1:, :] |= open_walls[1:, :] & NORTH & np.where(open_walls[:-1, :] & SOUTH, NORTH, 0).astype(np.uint8)
+        mask[:-1, :] |= open_walls[:-1, :] & SOUTH & np.where(open_walls[1:, :] & NORTH, SOUTH, 0).astype(np.uint8)
+        mask[:, 1:] |= open_walls[:, 1:] & WEST & np.where(open_walls[:, :-1] & EAST, WEST, 0).astype(np.uint8)
+        mask[:, :-1] |= open_walls[:, :-1] & EAST & np.where(open_walls[:, 1:] & WEST, EAST, 0).astype(np.uint8)
+        adjacency.open_dirs[:] = mask.tobytes()
+        return adjacency
+
+    def __mask(self, open_walls: List[List[int]], row: int, col: int) -> int:
+        """
+        utility function to calculate the open direction mask of a single cell
+        :param open_walls: the open sides of each cell as a grid of 4-bit masks
+        :param row: the row of the cell
+        :param col: the column of the cell
+        :return: the open direction mask
+        """
+        mask = 0
+        sides = open_walls[row][col]
+        for bit, opposite, d_row, d_col in DIRECTIONS:
+            r = row + d_row
+            c = col + d_col
+            if sides & bit and 0 <= r < self.rows and 0 <= c < self.cols and open_walls[r][c] & opposite:
+                mask |= bit
+        return mask
+
+    def update_cell(self, cell_grid: List[List[GridCell]], coord: Tuple[int, int]):
+        """
+        Recalculates the table around a single cell after its walls or cell type changed
+        :param cell_grid: the cell grid the table was built from
+        :param coord: the (row, column) of the cell that changed
+        :return: None
+        """
+        row_lim = (max(coord[0] - 1, 0), min(coord[0] + 2, self.rows))
+        col_lim = (max(coord[1] - 1, 0), min(coord[1] + 2, self.cols))
+        # the masks depend on the neighbours of each updated cell so read a 5x5 window
+        read_rows = range(max(coord[0] - 2, 0), min(coord[0] + 3, self.rows))
+        read_cols = range(max(coord[1] - 2, 0), min(coord[1] + 3, self.cols))
+        open_walls = {}
+        for r in read_rows:
+            for c in read_cols:
+                cell = cell_grid[r][c]
+                if isinstance(cell, WalledCell):
+                    open_walls[r, c] = ALL_DIRECTIONS & ~cell.walls.value
+                else:
+                    open_walls[r, c] = 0 if cell.state == WALL else ALL_DIRECTIONS
+        for r in range(row_lim[0], row_lim[1]):
+            for c in range(col_lim[0], col_lim[1]):
+                if r != coord[0] and c != coord[1]:
+                    continue
+                mask = 0
+                sides = open_walls[r, c]
+                for bit, opposite, d_row, d_col in DIRECTIONS:
+                    if sides & bit and open_walls.get((r + d_row, c + d_col), 0) & opposite:
+                        mask |= bit
+                self.open_dirs[r * self.cols + c] = mask
+
+    def neighbours(self, coord: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Returns the coordinates of the cells that can be reached from a cell in one step
+        :param coord: the (row, column) of the cell
+        :return: a list of neighbour coordinates
+        """
+        return [(coord[0] + d_row, coord[1] + d_col)
+                for d_row, d_col in STEPS[self.open_dirs[coord[0] * self.cols + coord[1]]]]
+
+    def is_open(self, coord: Tuple[int, int], direction: int) -> bool:
+        """
+        :param coord: the (row, column) of the cell
+        :param direction: one of the direction bits NORTH, SOUTH, EAST or WEST
+        :return: True if the cell can be left in the given direction
+        """
+        return bool(self.open_dirs[coord[0] * self.cols + coord[1]] & direction)
@@ -2,6 +2,13 @@ from typing import Tuple
 import pygame
 from enum import Flag, auto
 
+# the cell type codes. CellStore keeps one code per cell and the codes index the fill tables of the renderers
+EMPTY, WALL, START, GOAL, PATH, VISITED, OPEN_SET = range(7)
+# the cell type names of the string API in the order of their codes
+CELL_TYPES = ('empty', 'wall', 'start', 'goal', 'path', 'visited', 'open_set')
+TYPE_CODES = {name: code for code, name in enumerate(CELL_TYPES)}
+
+
 class GridCell:
     # https://coolors.co/a90f33-f78c6b-ffd166-83d483-037758-118ab2-073b4c
     BACKGROUND_COLOUR = (246, 240, 237)  # Isabelline
@@ -11,6 +18,9 @@ class GridCell:
     OPEN_SET_COLOUR = (131, 212, 131)  # Mantis
     START_COLOUR = (3, 119, 88)  # Tropical rain forest
     GOAL_COLOUR = (169, 15, 51)  # Cromson UA
+    # the fill colour of each cell type code and whether only the inner square is filled
+    FILLS = ((BACKGROUND_COLOUR, False), (WALL_COLOUR, False), (START_COLOUR, False), (GOAL_COLOUR, False),
+             (PATH_COLOUR, False), (VISITED_COLOUR, True), (OPEN_SET_COLOUR, True))
 
     def __init__(self, surface: pygame.Surface, cell_type: str,
                  bounding_rect: Tuple[int, int, int, int], coord: Tuple[int, int]):
@@ -72,28 +82,28 @@ class GridCell:
     def __hash__(self):
         return hash(self.coord)
 
+    @property
+    def state(self) -> int:
+        """
+        :return: the code of the cell type (see CELL_TYPES). None if the cell type is not valid
+        """
+        return TYPE_CODES.get(self.cell_type)
+
+    @state.setter
+    def state(self, code: int):
+        self.cell_type = CELL_TYPES[code]
+
     def draw_cell(self) -> pygame.Rect:
         """
         Draws the cell based on the cell type and return the bounds of the drawing
         :return: rectangle that defines the bounds of the drawing
         """
-        if self.cell_type == 'path':
-            return pygame.draw.rect(self.surf, GridCell.PATH_COLOUR, self.draw_bounds)
-        elif self.cell_type == 'visited':
-            return pygame.draw.rect(self.surf, GridCell.VISITED_COLOUR, self.inner_bound)
-        elif self.cell_type == 'open_set':
-            return pygame.draw.rect(self.surf, GridCell.OPEN_SET_COLOUR, self.inner_bound)
-        elif self.cell_type == 'wall':
-            return pygame.draw.rect(self.surf, GridCell.WALL_COLOUR, self.draw_bounds)
-        elif self.cell_type == 'start':
-            return pygame.draw.rect(self.surf, GridCell.START_COLOUR, self.draw_bounds)
-        elif self.cell_type == 'goal':
-            return pygame.draw.rect(self.surf, GridCell.GOAL_COLOUR, self.draw_bounds)
-        elif self.cell_type == 'empty':
-            return pygame.draw.rect(self.surf, GridCell.BACKGROUND_COLOUR, self.draw_bounds)
-        else:
+        code = self.state
+        if code is None:
             print(f'Invalid Cell type: {self.cell_type}')
             return pygame.Rect(0, 0, 0, 0)
+        colour, inner = self.FILLS[code]
+        return pygame.draw.rect(self.surf, colour, self.inner_bound if inner else self.draw_bounds)
 
 
 class Walls(Flag):
@@ -110,6 +120,8 @@ class WalledCell(GridCell):
     # don't use an even number here
     WALL_THICKNESS = 1
     WALL_COLOUR = (0, 0, 0)
+    # the cells of a maze have walls on their sides so a whole cell can not be a wall
+    FILLS = GridCell.FILLS[:WALL] + (None,) + GridCell.FILLS[WALL + 1:]
 
     def __init__(self, surface: pygame.Surface, cell_type: str,
                  bounding_rect: Tuple[int, int, int, int], coord: Tuple[int, int]):
@@ -145,22 +157,15 @@ class WalledCell(GridCell):
         Draws the cell based on the cell type and return the bounds of the drawing
         :return: rectangle that defines the bounds of the drawing
         """
-        pygame.draw.rect(self.surf, GridCell.BACKGROUND_COLOUR, self.draw_bounds)
-        if self.cell_type == 'path':
-            rect = pygame.draw.rect(self.surf, GridCell.PATH_COLOUR, self.draw_bounds)
-        elif self.cell_type == 'visited':
-            rect = pygame.draw.rect(self.surf, GridCell.VISITED_COLOUR, self.inner_bound)
-        elif self.cell_type == 'open_set':
-            rect = pygame.draw.rect(self.surf, GridCell.OPEN_SET_COLOUR, self.inner_bound)
-        elif self.cell_type == 'start':
-            rect = pygame.draw.rect(self.surf, GridCell.START_COLOUR, self.draw_bounds)
-        elif self.cell_type == 'goal':
-            rect = pygame.draw.rect(self.surf, GridCell.GOAL_COLOUR, self.draw_bounds)
-        elif self.cell_type == 'empty':
-            rect = pygame.draw.rect(self.surf, GridCell.BACKGROUND_COLOUR, self.draw_bounds)
-        else:
+        # the background covers the whole cell, so that is the area that changed even if only an inner fill is drawn
+        rect = pygame.draw.rect(self.surf, GridCell.BACKGROUND_COLOUR, self.draw_bounds)
+        code = self.state
+        fill = None if code is None else self.FILLS[code]
+        if fill is None:
             print(f'Invalid Cell type: {self.cell_type}')
             return pygame.Rect(0, 0, 0, 0)
+        colour, inner = fill
+        pygame.draw.rect(self.surf, colour, self.inner_bound if inner else self.draw_bounds)
 
         # draw the walls
         # start with a background of no walls
@@ -168,18 +173,14 @@ class WalledCell(GridCell):
         if Walls.NORTH in self.walls:
             pygame.draw.line(self.surf, self.WALL_COLOUR, self.bounding_rect[0:2], self.bounding_rect[-2:0:-1],
                              self.WALL_THICKNESS)
-            rect = self.draw_bounds
         if Walls.SOUTH in self.walls:
             pygame.draw.line(self.surf, self.WALL_COLOUR, self.bounding_rect[0:4:3], self.bounding_rect[-2:4],
                              self.WALL_THICKNESS)
-            rect = self.draw_bounds
         if Walls.WEST in self.walls:
             pygame.draw.line(self.surf, self.WALL_COLOUR, self.bounding_rect[0:2], self.bounding_rect[0:4:3],
                              self.WALL_THICKNESS)
-            rect = self.draw_bounds
         if Walls.EAST in self.walls:
             pygame.draw.line(self.surf, self.WALL_COLOUR, self.bounding_rect[-2:0:-1], self.bounding_rect[-2:4],
                              self.WALL_THICKNESS)
-            rect = self.draw_bounds
         return rect
 
@@ -1,6 +1,15 @@
 from typing import Tuple, List, Any
-from random import random
-from grid_cell import GridCell, WalledCell
+import numpy as np
+from grid_cell import GridCell, EMPTY, WALL, START, GOAL, PATH, VISITED, OPEN_SET
+from cell_store import CellStore, CellGrid
+from grid_adjacency import GridAdjacency
+from hierarchical_solver import HierarchicalSolver
+from maze_tree import MazeTree
+from junction_graph import JunctionGraph
+from reachability import ReachabilityIndex
+from landmarks import LandmarkTable
+from wall_planes import WallPlanes
+from bulk_render import render_grid
 import pygame
 
 
@@ -10,18 +19,21 @@ class GridMap:
     """
     # the size in pixels of borders between cells
     BORDER_SIZE = 1
+    # redraw the whole grid in one go instead of cell by cell when more than this fraction of the cells changed.
+    # A walled cell takes up to five draw calls, so bulk rendering pays off much sooner on maze grids.
+    BULK_RENDER_FRACTION = 0.5
+    MAZE_BULK_RENDER_FRACTION = 0.1
 
     def __init__(self, surface: pygame.Surface, bounding_rect: List[int],
                  grid_size: List[int], maze_grid: bool = False):
         """
-        Initialises the grid as a list of GridCell objects
+        Initialises the grid with all cells empty
         :param surface: the background surface to draw on
         :param bounding_rect: draw the grid only within these bounds
         (top_left_x, top_left_y, bottom_right_x, bottom_right_y)
         :param grid_size: number of cells as (rows, columns)
         :param maze_grid: if true then this grid consists of WalledCell objects with walls as part of the cell
         """
-        self.surf = surface
         self.bounds = bounding_rect
         self.grid_size = grid_size
         self.maze_grid = maze_grid
@@ -30,28 +42,60 @@ class GridMap:
         # update the bounds based on square sells
         self.bounds[2] = self.bounds[0] + self.cell_size * self.grid_size[1]
         self.bounds[3] = self.bounds[1] + self.cell_size * self.grid_size[0]
-        self.cell_grid = []
-        for i in range(grid_size[0]):
-            row_list = []
-            for j in range(grid_size[1]):
-
-                if self.maze_grid:
-                    x_min = j * self.cell_size
-                    x_max = (j + 1) * self.cell_size
-                    y_min = i * self.cell_size
-                    y_max = (i + 1) * self.cell_size
-                    row_list.append(WalledCell(self.surf, 'empty', (self.bounds[0] + x_min, self.bounds[1] + y_min,
-                                                                    self.bounds[0] + x_max, self.bounds[1] + y_max),
-                                               (i, j)))
-                else:
-                    x_min = j * self.cell_size + self.BORDER_SIZE
-                    x_max = (j + 1) * self.cell_size - self.BORDER_SIZE
-                    y_min = i * self.cell_size + self.BORDER_SIZE
-                    y_max = (i + 1) * self.cell_size - self.BORDER_SIZE
-                    row_list.append(GridCell(self.surf, 'empty', (self.bounds[0] + x_min, self.bounds[1] + y_min,
-                                                                  self.bounds[0] + x_max, self.bounds[1] + y_max),
-                                             (i, j)))
-            self.cell_grid.append(row_list)
+        # adjacency table of the cells, built on demand by get_adjacency
+        self.adjacency = None
+        # hierarchical path-finding data, built on demand by get_hierarchy
+        self.hierarchy = None
+        # rooted spanning tree of a perfect maze, built by post_maze_cleanup or on demand by get_maze_tree
+        self.maze_tree = None
+        # corridors contracted onto junctions and dead ends, built on demand by get_junction_graph
+        self.junction_graph = None
+        # connected component labels of the cells, built on demand by get_reachability
+        self.reachability = None
+        # landmark distance tables for the ALT heuristic, built on demand by get_landmarks and saved with the maze
+        self.landmarks = None
+        # the walls as two bit-planes for whole-grid flood fills and statistics, built on demand by get_wall_planes
+        self.wall_planes = None
+        # incremented every time the walls change so that cached search data can be invalidated
+        self.walls_version = 0
+        # the cell states are kept in flat arrays and cell_grid hands out views of them
+        self.cells = CellStore(surface, (self.bounds[0], self.bounds[1]), self.cell_size, grid_size, maze_grid,
+                               self.BORDER_SIZE)
+        self.cell_grid = CellGrid(self.cells)
+
+    def __setstate__(self, state):
+        """
+        Restores a pickled grid and fills in attributes that older saved mazes do not have
+        :param state: the pickled attribute dictionary
+        :return: None
+        """
+        self.adjacency = None
+        self.hierarchy = None
+        self.maze_tree = None
+        self.junction_graph = None
+        self.reachability = None
+        self.landmarks = None
+        self.wall_planes = None
+        self.walls_version = 0
+        surface = state.pop('surf', None)
+        self.__dict__.update(state)
+        if 'cells' not in state:
+            # mazes saved before the cells were kept in arrays store a list of cell objects
+            self.cells = CellStore.from_cell_grid(self.cell_grid, surface, (self.bounds[0], self.bounds[1]),
+                                                  self.cell_size, self.maze_grid)
+            self.cell_grid = CellGrid(self.cells)
+        self.cells.surf = surface
+
+    @property
+    def surf(self) -> pygame.Surface:
+        """
+        :return: the background surface the grid draws to
+        """
+        return self.cells.surf
+
+    @surf.setter
+    def surf(self, surface: pygame.Surface):
+        self.cells.surf = surface
 
     def __get_cell_size(self) -> int:
         """
@@ -102,16 +146,120 @@ class GridMap:
                                  (self.bounds[0] + i * self.cell_size, y_max),
                                  self.BORDER_SIZE)
 
-    def render_cells(self):
+    def get_adjacency(self) -> GridAdjacency:
+        """
+        Returns the adjacency table of the grid. The table is built the first time it is needed and reused until the
+        walls change (see set_wall and post_maze_cleanup)
+        :return: the GridAdjacency of this grid
+        """
+        if self.adjacency is None:
+            self.adjacency = GridAdjacency.from_cell_store(self.cells)
+        return self.adjacency
+
+    def get_hierarchy(self, cluster_size: int = 16) -> HierarchicalSolver:
+        """
+        Returns the hierarchical solver of the grid. The abstract graph of the whole grid is built the first time it
+        is needed, the clusters are kept up to date by set_wall and the solver is dropped when the maze is regenerated
+        (see post_maze_cleanup)
+        :param cluster_size: the number of rows and columns in a cluster
+        :return: the HierarchicalSolver of this grid
+        """
+        if self.hierarchy is None or self.hierarchy.cluster_size != cluster_size:
+            self.hierarchy = HierarchicalSolver(self.get_adjacency(), cluster_size)
+        return self.hierarchy
+
+    def get_maze_tree(self) -> MazeTree:
+        """
+        Returns the rooted spanning tree of the maze. The tree is built the first time it is needed and dropped when
+        the walls change
+        :return: the MazeTree of this grid
+        """
+        if self.maze_tree is None:
+            self.maze_tree = MazeTree(self.get_adjacency())
+        return self.maze_tree
+
+    def get_junction_graph(self) -> JunctionGraph:
+        """
+        Returns the junction graph of the grid. The graph is built the first time it is needed and dropped when the
+        walls change
+        :return: the JunctionGraph of this grid
+        """
+        if self.junction_graph is None:
+            self.junction_graph = JunctionGraph(self.get_adjacency())
+        return self.junction_graph
+
+    def get_reachability(self) -> ReachabilityIndex:
         """
-        Renders the list of grid cells based on their type to the background surface
-        :return:
+        Returns the connected components of the grid. The components are kept up to date by set_wall and dropped when
+        the maze is regenerated (see post_maze_cleanup)
+        :return: the ReachabilityIndex of this grid
         """
-        self.surf.lock()
-        for i in range(self.grid_size[0]):
-            for j in range(self.grid_size[1]):
-                self.cell_grid[i][j].draw_cell()
-        self.surf.unlock()
+        if self.reachability is None:
+            self.reachability = ReachabilityIndex(self.get_adjacency())
+        return self.reachability
+
+    def get_landmarks(self, count: int = 8) -> LandmarkTable:
+        """
+        Returns the landmark distance tables of the grid. The tables are built the first time they are needed, stored
+        with the maze when it is saved and dropped when the walls change
+        :param count: the number of landmarks
+        :return: the LandmarkTable of this grid
+        """
+        if self.landmarks is None or self.landmarks.count != count:
+            self.landmarks = LandmarkTable(self.get_adjacency(), count)
+        return self.landmarks
+
+    def get_wall_planes(self) -> WallPlanes:
+        """
+        Returns the walls of the grid as bit-planes. The planes are built the first time they are needed and dropped
+        when the walls change
+        :return: the WallPlanes of this grid
+        """
+        if self.wall_planes is None:
+            self.wall_planes = WallPlanes.from_adjacency(self.get_adjacency())
+        return self.wall_planes
+
+    def set_wall(self, coord: Tuple[int, int], wall: bool) -> pygame.Rect:
+        """
+        Turns a cell into a wall or clears it again and keeps the adjacency table up to date.
+        Only meaningful for grids without cell walls.
+        :param coord: the (row, column) of the cell
+        :param wall: True to make the cell a wall, False to make it empty
+        :return: rectangle that defines the bounds of the drawing
+        """
+        cell = self.cell_grid[coord[0]][coord[1]]
+        cell.state = WALL if wall else EMPTY
+        self.walls_version += 1
+        if self.adjacency is not None:
+            self.adjacency.update_cell(self.cell_grid, coord)
+        if self.hierarchy is not None:
+            self.hierarchy.update_cell(coord)
+        if self.reachability is not None:
+            self.reachability.update_cell(coord)
+        self.maze_tree = None
+        self.junction_graph = None
+        self.landmarks = None
+        self.wall_planes = None
+        return cell.draw_cell()
+
+    def render_cells(self) -> pygame.Rect:
+        """
+        Renders the list of grid cells based on their type to the background surface. The whole grid image is built
+        from the cell arrays at once (see bulk_render.render_grid).
+        :return: rectangle that defines the bounds of the drawing
+        """
+        return render_grid(self.cells)
+
+    def __draw_changed(self, indices: np.ndarray) -> List[Any]:
+        """
+        utility function to redraw a set of changed cells. Many changed cells are drawn by redrawing the whole grid.
+        :param indices: array of the ids of the changed cells
+        :return: list of rectangles to indicate which parts of the background needs redrawing
+        """
+        fraction = self.MAZE_BULK_RENDER_FRACTION if self.maze_grid else self.BULK_RENDER_FRACTION
+        if len(indices) > fraction * self.grid_size[0] * self.grid_size[1]:
+            return [self.render_cells()]
+        return [self.cells.cell(index).draw_cell() for index in indices.tolist()]
 
     # noinspection PyUnresolvedReferences
     def test_grid(self):
@@ -123,63 +271,63 @@ class GridMap:
         # for i in range(self.grid_size[0]):
         #     for j in range(self.grid_size[1]):
         #         print(f'{i},{j} -- {self.cell_grid[i][j].bounds}')
-        self.cell_grid[5][5].cell_type = 'start'
-        self.cell_grid[15][15].cell_type = 'goal'
+        self.cell_grid[5][5].state = START
+        self.cell_grid[15][15].state = GOAL
 
         # the path
-        self.cell_grid[5][6].cell_type = 'path'
-        self.cell_grid[5][7].cell_type = 'path'
-        self.cell_grid[6][7].cell_type = 'path'
-        self.cell_grid[7][8].cell_type = 'path'
-        self.cell_grid[8][9].cell_type = 'path'
-        self.cell_grid[9][9].cell_type = 'path'
-        self.cell_grid[10][9].cell_type = 'path'
-        self.cell_grid[10][10].cell_type = 'path'
-        self.cell_grid[10][11].cell_type = 'path'
-        self.cell_grid[10][12].cell_type = 'path'
-        self.cell_grid[11][12].cell_type = 'path'
-        self.cell_grid[12][13].cell_type = 'path'
-        self.cell_grid[13][14].cell_type = 'path'
-        self.cell_grid[14][14].cell_type = 'path'
-        self.cell_grid[15][14].cell_type = 'path'
+        self.cell_grid[5][6].state = PATH
+        self.cell_grid[5][7].state = PATH
+        self.cell_grid[6][7].state = PATH
+        self.cell_grid[7][8].state = PATH
+        self.cell_grid[8][9].state = PATH
+        self.cell_grid[9][9].state = PATH
+        self.cell_grid[10][9].state = PATH
+        self.cell_grid[10][10].state = PATH
+        self.cell_grid[10][11].state = PATH
+        self.cell_grid[10][12].state = PATH
+        self.cell_grid[11][12].state = PATH
+        self.cell_grid[12][13].state = PATH
+        self.cell_grid[13][14].state = PATH
+        self.cell_grid[14][14].state = PATH
+        self.cell_grid[15][14].state = PATH
 
         # visited
-        self.cell_grid[6][6].cell_type = 'visited'
-        self.cell_grid[7][6].cell_type = 'visited'
-        self.cell_grid[8][6].cell_type = 'visited'
-        self.cell_grid[7][7].cell_type = 'visited'
-        self.cell_grid[8][7].cell_type = 'visited'
-        self.cell_grid[8][8].cell_type = 'visited'
-        self.cell_grid[11][11].cell_type = 'visited'
-        self.cell_grid[12][11].cell_type = 'visited'
-        self.cell_grid[12][12].cell_type = 'visited'
-        self.cell_grid[13][12].cell_type = 'visited'
-        self.cell_grid[13][13].cell_type = 'visited'
-        self.cell_grid[14][13].cell_type = 'visited'
-        self.cell_grid[15][13].cell_type = 'visited'
-        self.cell_grid[10][13].cell_type = 'visited'
-        self.cell_grid[11][13].cell_type = 'visited'
-        self.cell_grid[12][14].cell_type = 'visited'
-        self.cell_grid[14][15].cell_type = 'visited'
+        self.cell_grid[6][6].state = VISITED
+        self.cell_grid[7][6].state = VISITED
+        self.cell_grid[8][6].state = VISITED
+        self.cell_grid[7][7].state = VISITED
+        self.cell_grid[8][7].state = VISITED
+        self.cell_grid[8][8].state = VISITED
+        self.cell_grid[11][11].state = VISITED
+        self.cell_grid[12][11].state = VISITED
+        self.cell_grid[12][12].state = VISITED
+        self.cell_grid[13][12].state = VISITED
+        self.cell_grid[13][13].state = VISITED
+        self.cell_grid[14][13].state = VISITED
+        self.cell_grid[15][13].state = VISITED
+        self.cell_grid[10][13].state = VISITED
+        self.cell_grid[11][13].state = VISITED
+        self.cell_grid[12][14].state = VISITED
+        self.cell_grid[14][15].state = VISITED
 
         # walls
-        self.cell_grid[9][8].cell_type = 'wall'
-        self.cell_grid[10][8].cell_type = 'wall'
-        self.cell_grid[11][8].cell_type = 'wall'
-        self.cell_grid[12][8].cell_type = 'wall'
-        self.cell_grid[13][8].cell_type = 'wall'
-        self.cell_grid[14][8].cell_type = 'wall'
-        self.cell_grid[9][10].cell_type = 'wall'
-        self.cell_grid[9][11].cell_type = 'wall'
-        self.cell_grid[9][12].cell_type = 'wall'
-        self.cell_grid[9][13].cell_type = 'wall'
-        self.cell_grid[9][14].cell_type = 'wall'
-        self.cell_grid[9][15].cell_type = 'wall'
-        self.cell_grid[12][9].cell_type = 'wall'
-        self.cell_grid[12][10].cell_type = 'wall'
-        self.cell_grid[13][10].cell_type = 'wall'
-        self.cell_grid[14][10].cell_type = 'wall'
-        self.cell_grid[15][10].cell_type = 'wall'
+        self.cell_grid[9][8].state = WALL
+        self.cell_grid[10][8].state = WALL
+        self.cell_grid[11][8].state = WALL
+        self.cell_grid[12][8].state = WALL
+        self.cell_grid[13][8].state = WALL
+        self.cell_grid[14][8].state = WALL
+        self.cell_grid[9][10].state = WALL
+        self.cell_grid[9][11].state = WALL
+        self.cell_grid[9][12].state = WALL
+        self.cell_grid[9][13].state = WALL
+        self.cell_grid[9][14].state = WALL
+        self.cell_grid[9][15].state = WALL
+        self.cell_grid[12][9].state = WALL
+        self.cell_grid[12][10].state = WALL
+        self.cell_grid[13][10].state = WALL
+        self.cell_grid[14][10].state = WALL
+        self.cell_grid[15][10].state = WALL
 
     def init_grid(self, start_coords: Tuple[int, int] = (1, 1),
                   goal_coords: Tuple[int, int] = (-2, -2),
@@ -194,29 +342,23 @@ class GridMap:
         :return: Tuple of (start_cell, goal_cell)
         """
         if random_walls_ratio > 0 and not self.maze_grid:
-            for i in range(self.grid_size[0]):
-                for j in range(self.grid_size[1]):
-                    if random() < random_walls_ratio:
-                        self.cell_grid[i][j].cell_type = 'wall'
+            types = self.cells.type_array()
+            types[np.random.random(types.shape) < random_walls_ratio] = WALL
 
-        self.cell_grid[start_coords[0]][start_coords[1]].cell_type = 'start'
-        self.cell_grid[goal_coords[0]][goal_coords[1]].cell_type = 'goal'
+        self.cell_grid[start_coords[0]][start_coords[1]].state = START
+        self.cell_grid[goal_coords[0]][goal_coords[1]].state = GOAL
         return self.cell_grid[start_coords[0]][start_coords[1]], self.cell_grid[goal_coords[0]][goal_coords[1]]
 
     def reset_grid(self) -> List[Any]:
         """
-        Cleans all non-wall, non-goal, and non-start cells and redraws the grid
+        Cleans all non-wall, non-goal, and non-start cells and redraws them. Only the cells that changed since the
+        last reset (the dirty cells of the store) are looked at.
         :return: list of rectangles to indicate which parts of the background needs redrawing
         """
-        updates = []
-        for i in range(self.grid_size[0]):
-            for j in range(self.grid_size[1]):
-                if self.cell_grid[i][j].cell_type == 'path' or self.cell_grid[i][j].cell_type == 'visited' or \
-                        self.cell_grid[i][j].cell_type == 'open_set':
-                    self.cell_grid[i][j].reset_scores()
-                    updates.append(self.cell_grid[i][j].draw_cell())
-
-        return updates
+        dirty = self.cells.take_dirty()
+        dirty = dirty[np.isin(self.cells.types_flat()[dirty], [PATH, VISITED, OPEN_SET])]
+        self.cells.reset_cells(dirty)
+        return self.__draw_changed(dirty)
 
     def post_maze_cleanup(self, start_coords: Tuple[int, int] = (1, 1),
                           goal_coords: Tuple[int, int] = (-2, -2)) -> List[Any]:
@@ -227,15 +369,27 @@ class GridMap:
             backwards from the end of the grid
         :return: list of rectangles to indicate which parts of the background needs redrawing
         """
-        updates = []
-        for i in range(self.grid_size[0]):
-            for j in range(self.grid_size[1]):
-                self.cell_grid[i][j].comes_from = None
-                if (i, j) == start_coords:
-                    self.cell_grid[i][j].cell_type = 'start'
-                elif (i, j) == goal_coords:
-                    self.cell_grid[i][j].cell_type = 'goal'
-                else:
-                    self.cell_grid[i][j].cell_type = 'empty'
-                updates.append(self.cell_grid[i][j].draw_cell())
+        # the walls were changed by the maze generator
+        self.adjacency = None
+        self.hierarchy = None
+        self.maze_tree = None
+        self.junction_graph = None
+        self.reachability = None
+        self.landmarks = None
+        self.wall_planes = None
+        self.walls_version += 1
+        self.cells.clear_search()
+        # the generator drew every cell it touched, so only the cells whose type changes need to be drawn again
+        types = self.cells.types_flat()
+        dirty = self.cells.take_dirty()
+        start = np.ravel_multi_index(start_coords, self.grid_size, mode='wrap')
+        goal = np.ravel_multi_index(goal_coords, self.grid_size, mode='wrap')
+        changed = np.union1d(dirty[types[dirty] != EMPTY], [start, goal]).astype(np.intp)
+        types[changed] = EMPTY
+        types[start] = START
+        types[goal] = GOAL
+        updates = self.__draw_changed(changed)
+        if self.maze_grid:
+            # the generated mazes are perfect so every query can be answered from the maze tree
+            self.get_maze_tree()
         return updates
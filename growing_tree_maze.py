@@ -1,5 +1,5 @@
 from typing import List, Any
-from grid_cell import WalledCell
+from grid_cell import WalledCell, VISITED
 from random import sample, random
 from collections import deque
 
@@ -22,7 +22,7 @@ class GrowingTreeMaze:
         # pick a random cell to initialise the generator
         row = sample(cell_grid, 1)[0]
         last_insert = sample(row, 1)[0]
-        last_insert.cell_type = 'visited'
+        last_insert.state = VISITED
         self.working_set.append(last_insert)
 
         self.done = False
@@ -54,7 +54,7 @@ class GrowingTreeMaze:
             else:
                 next_cell = sample(neighbours, 1)[0]
                 cell.tunnel_to(next_cell)
-                next_cell.cell_type = 'visited'
+                next_cell.state = VISITED
                 self.visited += 1
                 self.working_set.append(next_cell)
                 updates.append(cell.draw_cell())
@@ -75,6 +75,6 @@ class GrowingTreeMaze:
         for r in range(row_lim[0], row_lim[1]):
             for c in range(col_lim[0], col_lim[1]):
                 if (r, c) != cell.coord and (r == cell.coord[0] or c == cell.coord[1]) \
-                        and self.cell_grid[r][c].cell_type != 'visited':
+                        and self.cell_grid[r][c].state != VISITED:
                     lst.append(self.cell_grid[r][c])
         return lst
@@ -0,0 +1,353 @@
+from typing import List, Tuple, Dict, Iterable
+import numpy as np
+
+from grid_adjacency import GridAdjacency, DIRECTIONS, NORTH, WEST, EAST, SOUTH, ALL_DIRECTIONS
+from path_solver_astar import PathResult
+from priority_queue import IndexedHeap
+
+# border runs of open passages at least this long get a transition at each end instead of one in the middle
+LONG_ENTRANCE = 6
+
+
+class HierarchicalSolver:
+    """
+    Hierarchical path-finding A* (HPA*) for very large 4-connected grids. The grid is split into square clusters and
+    the open passages on the border between two clusters are grouped into entrances. Every entrance gets one or two
+    transitions (a pair of cells on either side of the border) and the distances between the transition cells of a
+    cluster are precomputed with a breadth first search inside the cluster. A query is an A* search over this small
+    abstract graph which is then refined into a cell path one cluster at a time.
+    The abstract graph of the whole grid is built when the solver is created and is rebuilt per cluster when walls
+    change (see update_cell), so a query only has to link its start and goal cells to the graph. Paths are optimal
+    within the abstract graph and usually within a few percent of the shortest path.
+    see Botea, Mueller and Schaeffer, "Near Optimal Hierarchical Path-Finding", Journal of Game Development 1 (2004)
+    """
+
+    def __init__(self, adjacency: GridAdjacency, cluster_size: int = 16):
+        """
+        Creates a new hierarchical solver for a grid and builds the abstract graph
+        :param adjacency: the adjacency table of the grid (see GridMap.get_adjacency). The table is read directly, so
+        changes to it are seen once update_cell has been called for the changed cell
+        :param cluster_size: the number of rows and columns in a cluster
+        """
+        self.adjacency = adjacency
+        self.cluster_size = cluster_size
+        self.cols = adjacency.cols
+        # the open direction masks as a (rows, columns) array that shares its memory with the adjacency table
+        self.open_dirs = np.frombuffer(adjacency.open_dirs, dtype=np.uint8).reshape(adjacency.rows, adjacency.cols)
+        self.cluster_rows = (adjacency.rows + cluster_size - 1) // cluster_size
+        self.cluster_cols = (adjacency.cols + cluster_size - 1) // cluster_size
+        # lookup table from an open direction mask to the offsets of the reachable neighbours in the flat grid
+        self.moves = tuple(tuple(d_row * self.cols + d_col for bit, opposite, d_row, d_col in DIRECTIONS if mask & bit)
+                           for mask in range(ALL_DIRECTIONS + 1))
+        # (cluster row, cluster column, EAST or SOUTH) -> list of (cell, cell on the other side) transitions
+        self.borders = {}
+        # (cluster row, cluster column) -> {transition cell: [(neighbour cell, distance), ...]}
+        self.graphs = {}
+        # the edges of the graphs of all clusters, keyed by transition cell
+        self.edges = {}
+        self.build()
+
+    def cluster_of(self, index: int) -> Tuple[int, int]:
+        """
+        :param index: the flat (row * columns + column) index of a cell
+        :return: the (cluster row, cluster column) of the cluster that contains the cell
+        """
+        row, col = divmod(index, self.cols)
+        return row // self.cluster_size, col // self.cluster_size
+
+    def border(self, cluster: Tuple[int, int], direction: int) -> List[Tuple[int, int]]:
+        """
+        Returns the transitions across the east or south border of a cluster, finding them if they are not cached
+        :param cluster: the (cluster row, cluster column)
+        :param direction: EAST or SOUTH
+        :return: list of (cell in this cluster, cell in the neighbouring cluster) flat index pairs
+        """
+        key = (cluster[0], cluster[1], direction)
+        if key in self.borders:
+            return self.borders[key]
+        size = self.cluster_size
+        open_dirs = self.adjacency.open_dirs
+        if direction == EAST:
+            col = (cluster[1] + 1) * size - 1
+            cells = [r * self.cols + col for r in range(cluster[0] * size, min((cluster[0] + 1) * size,
+                                                                                   self.adjacency.rows))]
+            step = 1
+            along = SOUTH
+        else:
+            row = (cluster[0] + 1) * size - 1
+            cells = [row * self.cols + c for c in range(cluster[1] * size, min((cluster[1] + 1) * size, self.cols))]
+            step = self.cols
+            along = EAST
+        transitions = []
+        runs = []
+        for cell in cells:
+            if not open_dirs[cell] & direction:
+                continue
+            # a run only continues if the cells on both sides of the border are connected along it, so every
+            # crossing of an entrance can be reached from its transitions without leaving the clusters
+            previous = runs[-1][-1] if runs else None
+            if previous is not None and cell - previous == (self.cols if direction == EAST else 1) and \
+                    open_dirs[previous] & along and open_dirs[previous + step] & along:
+                runs[-1].append(cell)
+            else:
+                runs.append([cell])
+        for run in runs:
+            if len(run) >= LONG_ENTRANCE:
+                transitions.append((run[0], run[0] + step))
+                transitions.append((run[-1], run[-1] + step))
+            else:
+                middle = run[len(run) // 2]
+                transitions.append((middle, middle + step))
+        self.borders[key] = transitions
+        return transitions
+
+    def transitions(self, cluster: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Collects the transitions across all four borders of a cluster
+        :param cluster: the (cluster row, cluster column)
+        :return: list of (cell in this cluster, cell in the neighbouring cluster) flat index pairs
+        """
+        c_row, c_col = cluster
+        lst = []
+        if c_col + 1 < self.cluster_cols:
+            lst.extend(self.border(cluster, EAST))
+        if c_row + 1 < self.cluster_rows:
+            lst.extend(self.border(cluster, SOUTH))
+        if c_col > 0:
+            lst.extend((inside, outside) for outside, inside in self.border((c_row, c_col - 1), EAST))
+        if c_row > 0:
+            lst.extend((inside, outside) for outside, inside in self.border((c_row - 1, c_col), SOUTH))
+        return lst
+
+    def local_search(self, source: int, targets: Iterable[int] = None) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        Breadth first search that does not leave the cluster of the source cell
+        :param source: the flat index of the cell to search from
+        :param targets: if given the search stops as soon as all of these cells have been reached
+        :return: tuple of (distance to every reached cell, parent of every reached cell)
+        """
+        size = self.cluster_size
+        c_row, c_col = self.cluster_of(source)
+        row_lim = (c_row * size, (c_row + 1) * size)
+        col_lim = (c_col * size, (c_col + 1) * size)
+        remaining = None if targets is None else set(targets) - {source}
+        open_dirs = self.adjacency.open_dirs
+        moves = self.moves
+        cols = self.cols
+        dist = {source: 0}
+        parent = {source: source}
+        frontier = [source]
+        step = 0
+        while frontier and remaining != set():
+            step += 1
+            reached = []
+            for cell in frontier:
+                for offset in moves[open_dirs[cell]]:
+                    neighbour = cell + offset
+                    if neighbour in dist:
+                        continue
+                    row, col = divmod(neighbour, cols)
+                    if row_lim[0] <= row < row_lim[1] and col_lim[0] <= col < col_lim[1]:
+                        dist[neighbour] = step
+                        parent[neighbour] = cell
+                        reached.append(neighbour)
+                        if remaining is not None:
+                            remaining.discard(neighbour)
+            frontier = reached
+        return dist, parent
+
+    def cluster_planes(self, cluster: Tuple[int, int]) -> Tuple[int, int, Tuple[int, int], List[int]]:
+        """
+        Packs the moves that stay inside a cluster into bit-planes held in Python integers, with one bit per cell of
+        the cluster in row-major order (see WallPlanes)
+        :param cluster: the (cluster row, cluster column)
+        :return: tuple of (first row, first column, (height, width) of the cluster, [north, west, east, south] planes).
+        A bit is set if the cell can be left in that direction without leaving the cluster
+        """
+        row = cluster[0] * self.cluster_size
+        col = cluster[1] * self.cluster_size
+        block = self.open_dirs[row:row + self.cluster_size, col:col + self.cluster_size]
+        planes = []
+        for bit in (NORTH, WEST, EAST, SOUTH):
+            moves = (block & bit) != 0
+            # the moves across the cluster border
+            if bit == NORTH:
+                moves[0, :] = False
+            elif bit == WEST:
+                moves[:, 0] = False
+            elif bit == EAST:
+                moves[:, -1] = False
+            else:
+                moves[-1, :] = False
+            planes.append(int.from_bytes(np.packbits(moves, bitorder='little').tobytes(), 'little'))
+        return row, col, block.shape, planes
+
+    def graph(self, cluster: Tuple[int, int]) -> Dict[int, List[Tuple[int, int]]]:
+        """
+        Returns the abstract graph edges of the transition cells of a cluster, building them if they are not cached.
+        Each transition cell is linked to the transition cells of the same cluster it can reach and to the cell on
+        the other side of its border. The distances are found with breadth first searches on the bit-planes of the
+        cluster. The searches from all transition cells run at once, each in its own copy of the planes laid out one
+        after the other in the same integers, so a few shifts and masks move every wavefront one step.
+        :param cluster: the (cluster row, cluster column)
+        :return: dictionary from transition cell to a list of (neighbour cell, distance)
+        """
+        if cluster in self.graphs:
+            return self.graphs[cluster]
+        edges = {}
+        for inside, outside in self.transitions(cluster):
+            edges.setdefault(inside, []).append((outside, 1))
+        nodes = list(edges)
+        row, col, (height, width), planes = self.cluster_planes(cluster)
+        cells = height * width
+        bits = [(node // self.cols - row) * width + node % self.cols - col for node in nodes]
+        owners = dict(zip(bits, range(len(nodes))))
+        # a 1 bit at the start of every copy, multiplying a plane by it repeats the plane in every copy
+        repeat = ((1 << cells * len(nodes)) - 1) // ((1 << cells) - 1)
+        north, west, east, south = (plane * repeat for plane in planes)
+        frontier = 0
+        remaining = 0
+        later = 0
+        for i in reversed(range(len(nodes))):
+            frontier |= 1 << i * cells + bits[i]
+            # distances are symmetric so each search only looks for the transition cells after its own
+            remaining |= later << i * cells
+            later |= 1 << bits[i]
+        reached = frontier
+        step = 0
+        while frontier and remaining:
+            step += 1
+            frontier = ((frontier & east) << 1 | (frontier & west) >> 1 | (frontier & south) << width |
+                        (frontier & north) >> width) & ~reached
+            reached |= frontier
+            found = frontier & remaining
+            remaining ^= found
+            while found:
+                low = found & -found
+                i, bit = divmod(low.bit_length() - 1, cells)
+                node, other = nodes[i], nodes[owners[bit]]
+                edges[node].append((other, step))
+                edges[other].append((node, step))
+                found ^= low
+        self.graphs[cluster] = edges
+        self.edges.update(edges)
+        return edges
+
+    def build(self):
+        """
+        Builds the borders and graphs of every cluster
+        :return: None
+        """
+        for c_row in range(self.cluster_rows):
+            for c_col in range(self.cluster_cols):
+                self.graph((c_row, c_col))
+
+    def update_cell(self, coord: Tuple[int, int]):
+        """
+        Rebuilds the graphs around a cell after its walls changed (the adjacency table must already be updated).
+        The open direction masks of the cell and its four neighbours may have changed, which can move the
+        transitions on the borders of their clusters and with them the graphs of the clusters on both sides.
+        :param coord: the (row, column) of the cell that changed
+        :return: None
+        """
+        size = self.cluster_size
+        changed = set()
+        for d_row, d_col in ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)):
+            row = coord[0] + d_row
+            col = coord[1] + d_col
+            if 0 <= row < self.adjacency.rows and 0 <= col < self.cols:
+                changed.add((row // size, col // size))
+        clusters = set()
+        for c_row, c_col in changed:
+            for key in ((c_row, c_col, EAST), (c_row, c_col, SOUTH), (c_row, c_col - 1, EAST),
+                        (c_row - 1, c_col, SOUTH)):
+                self.borders.pop(key, None)
+            for cluster in ((c_row, c_col), (c_row - 1, c_col), (c_row + 1, c_col), (c_row, c_col - 1),
+                            (c_row, c_col + 1)):
+                if 0 <= cluster[0] < self.cluster_rows and 0 <= cluster[1] < self.cluster_cols:
+                    clusters.add(cluster)
+        for cluster in clusters:
+            for node in self.graphs.pop(cluster, {}):
+                del self.edges[node]
+        for cluster in clusters:
+            self.graph(cluster)
+
+    def refine(self, source: int, target: int) -> List[int]:
+        """
+        Finds the cells between two cells of the same cluster
+        :param source: the flat index of the first cell
+        :param target: the flat index of the second cell
+        :return: the cells after the source cell up to and including the target cell
+        """
+        parent = self.local_search(source, (target,))[1]
+        cells = []
+        while target != source:
+            cells.append(target)
+            target = parent[target]
+        cells.reverse()
+        return cells
+
+    def solve(self, start: Tuple[int, int], goal: Tuple[int, int]) -> PathResult:
+        """
+        Finds a path from the start cell to the goal cell
+        :param start: the (row, column) of the start cell
+        :param goal: the (row, column) of the goal cell
+        :return: a PathResult with the path and its cost. The expanded, inserted and updated counts are for the
+        abstract graph
+        """
+        cols = self.cols
+        source = start[0] * cols + start[1]
+        target = goal[0] * cols + goal[1]
+        start_cluster = self.cluster_of(source)
+        goal_cluster = self.cluster_of(target)
+        # link the start and goal cells to the transition cells of their clusters
+        start_nodes = list(self.graph(start_cluster))
+        dist = self.local_search(source, start_nodes + [target] if start_cluster == goal_cluster else start_nodes)[0]
+        start_links = [(node, dist[node]) for node in start_nodes if node in dist]
+        if start_cluster == goal_cluster and target in dist:
+            start_links.append((target, dist[target]))
+        dist = self.local_search(target, self.graph(goal_cluster))[0]
+        goal_links = {node: dist[node] for node in self.graph(goal_cluster) if node in dist}
+
+        g_score = {source: 0}
+        came_from = {}
+        open_set = IndexedHeap()
+        open_set.insert(source, (abs(start[0] - goal[0]) + abs(start[1] - goal[1]), 0))
+        expanded = inserted = updated = 0
+        while not open_set.is_empty():
+            current = open_set.pop_min()[0]
+            if current == target:
+                break
+            expanded += 1
+            edges = list(self.edges.get(current, []))
+            if current == source:
+                edges.extend(start_links)
+            if current in goal_links:
+                edges.append((target, goal_links[current]))
+            for neighbour, cost in edges:
+                tentative = g_score[current] + cost
+                if tentative < g_score.get(neighbour, float('inf')):
+                    if neighbour in open_set:
+                        updated += 1
+                    else:
+                        inserted += 1
+                    came_from[neighbour] = current
+                    g_score[neighbour] = tentative
+                    row, col = divmod(neighbour, cols)
+                    # ties are broken towards the larger distance travelled, which is closer to the goal
+                    open_set.insert(neighbour, (tentative + abs(row - goal[0]) + abs(col - goal[1]), -tentative))
+        if target not in g_score:
+            return PathResult([], float('inf'), expanded, inserted, updated)
+
+        nodes = [target]
+        while nodes[-1] != source:
+            nodes.append(came_from[nodes[-1]])
+        nodes.reverse()
+        path = [source]
+        for node in nodes[1:]:
+            if self.cluster_of(node) == self.cluster_of(path[-1]):
+                path.extend(self.refine(path[-1], node))
+            else:
+                # a step across a cluster border
+                path.append(node)
+        return PathResult([divmod(index, cols) for index in path], g_score[target], expanded, inserted, updated)
@@ -0,0 +1,150 @@
+from typing import List, Tuple
+
+from grid_adjacency import GridAdjacency, DIRECTIONS, ALL_DIRECTIONS
+
+# number of open directions of every 4-bit mask
+DEGREE = tuple(bin(mask).count('1') for mask in range(ALL_DIRECTIONS + 1))
+
+
+class JunctionGraph:
+    """
+    The cells of a maze contracted onto its junctions and dead ends. Every cell that does not have exactly two open
+    directions is a node and every chain of two-way corridor cells between two nodes becomes a single edge weighted
+    by its length, so a search only has to expand the nodes. Corridor cells remember which corridor they are on and
+    how far along it they are, which is all that is needed to connect a start or goal cell inside a corridor to the
+    graph and to expand an edge back into cells.
+    """
+
+    def __init__(self, adjacency: GridAdjacency):
+        """
+        Contracts the corridors of a grid
+        :param adjacency: the adjacency table of the grid (see GridMap.get_adjacency)
+        """
+        self.rows = adjacency.rows
+        self.cols = adjacency.cols
+        self.open_dirs = adjacency.open_dirs
+        # flat offset of the neighbour in each of the DIRECTIONS
+        self.offsets = [d_row * self.cols + d_col for bit, opposite, d_row, d_col in DIRECTIONS]
+        # node -> list of (neighbour node, length, corridor index)
+        self.edges = {}
+        # list of (node the corridor starts at, node it ends at, length, direction index it leaves the start in)
+        self.corridors = []
+        # corridor cell -> (corridor index, number of steps from the start node of the corridor)
+        self.corridor_cells = {}
+        open_dirs = self.open_dirs
+        for index in range(self.rows * self.cols):
+            if DEGREE[open_dirs[index]] != 2 and open_dirs[index]:
+                self.edges[index] = []
+        for node in list(self.edges):
+            self.walk_corridors(node)
+        # corridors that loop back on themselves without a junction get one of their cells as a node
+        for index in range(self.rows * self.cols):
+            if DEGREE[open_dirs[index]] == 2 and index not in self.corridor_cells and index not in self.edges:
+                self.edges[index] = []
+                self.walk_corridors(index)
+
+    def step(self, index: int, came_from: int) -> Tuple[int, int]:
+        """
+        Moves one cell along a corridor
+        :param index: the flat index of a corridor cell
+        :param came_from: the direction index (into DIRECTIONS) the cell was entered by, it is not left that way again
+        :return: tuple of (the next cell, the direction index it was entered by)
+        """
+        mask = self.open_dirs[index]
+        for k, (bit, opposite, d_row, d_col) in enumerate(DIRECTIONS):
+            if mask & bit and k != 3 - came_from:
+                return index + self.offsets[k], k
+
+    def walk_corridors(self, node: int):
+        """
+        Follows every corridor that leaves a node to the node at its other end and adds the edges
+        :param node: the flat index of the node
+        :return: None
+        """
+        mask = self.open_dirs[node]
+        for k, (bit, opposite, d_row, d_col) in enumerate(DIRECTIONS):
+            if not mask & bit:
+                continue
+            index = node + self.offsets[k]
+            if index in self.corridor_cells:
+                # walked from the other end already
+                continue
+            came_from = k
+            length = 1
+            cells = []
+            while index not in self.edges:
+                cells.append(index)
+                index, came_from = self.step(index, came_from)
+                length += 1
+            if not cells and index < node:
+                # a direct link between two nodes, added when the other node was walked
+                continue
+            corridor = len(self.corridors)
+            self.corridors.append((node, index, length, k))
+            for position, cell in enumerate(cells):
+                self.corridor_cells[cell] = (corridor, position + 1)
+            self.edges[node].append((index, length, corridor))
+            if index != node:
+                self.edges[index].append((node, length, corridor))
+
+    def links(self, index: int) -> List[Tuple[int, int]]:
+        """
+        Returns the nodes a cell can reach without passing another node
+        :param index: the flat index of the cell
+        :return: list of (node, distance). A node is only linked to itself
+        """
+        if index in self.edges:
+            return [(index, 0)]
+        if index not in self.corridor_cells:
+            return []
+        corridor, position = self.corridor_cells[index]
+        start, end, length, k = self.corridors[corridor]
+        return [(start, position), (end, length - position)]
+
+    def corridor_path(self, corridor: int, first: int, last: int) -> List[int]:
+        """
+        Lists the cells of a corridor between two positions along it
+        :param corridor: the corridor index
+        :param first: the number of steps from the start node of the corridor to begin at
+        :param last: the number of steps from the start node of the corridor to end at
+        :return: the cells from the first position to the last position (inclusive) in that order
+        """
+        start, end, length, came_from = self.corridors[corridor]
+        index = start + self.offsets[came_from]
+        cells = [start, index]
+        for position in range(2, max(first, last) + 1):
+            index, came_from = self.step(index, came_from)
+            cells.append(index)
+        if first <= last:
+            return cells[first:last + 1]
+        return cells[last:first + 1][::-1]
+
+    def path_between(self, a: int, b: int, corridor: int) -> List[int]:
+        """
+        Expands a step of a contracted path back into cells
+        :param a: the flat index of the cell the step starts at (a node or a corridor cell on the corridor)
+        :param b: the flat index of the cell the step ends at (a node or a corridor cell on the corridor)
+        :param corridor: the corridor the step follows
+        :return: the cells from a to b (inclusive)
+        """
+        first = self.position(a, corridor)
+        last = self.position(b, corridor)
+        start, end, length, k = self.corridors[corridor]
+        if start == end:
+            # a corridor that loops back to its node, leave the node by the closer end
+            if a == start and b != start:
+                first = 0 if last <= length - last else length
+            elif b == start and a != start:
+                last = 0 if first <= length - first else length
+        return self.corridor_path(corridor, first, last)
+
+    def position(self, index: int, corridor: int) -> int:
+        """
+        :param index: the flat index of a cell on a corridor or one of its end nodes
+        :param corridor: the corridor index
+        :return: the number of steps from the start node of the corridor to the cell
+        """
+        start, end, length, k = self.corridors[corridor]
+        if index in self.corridor_cells:
+            return self.corridor_cells[index][1]
+        return 0 if index == start else length
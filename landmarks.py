@@ -0,0 +1,89 @@
+from typing import List, Tuple
+import numpy as np
+
+from grid_adjacency import GridAdjacency
+from grid_cell import GridCell
+from wavefront_solver import WavefrontSolver
+
+
+class LandmarkTable:
+    """
+    Precomputed exact distances from a few landmark cells to every cell of a 4-connected grid, used for the ALT
+    (A*, landmarks and triangle inequality) heuristic. For any landmark L the triangle inequality gives
+    |d(L, a) - d(L, b)| <= d(a, b), so the largest of these differences over all landmarks is a lower bound on the
+    distance between a and b that takes the walls into account. The landmarks are spread out with farthest point
+    selection so that most queries have a landmark roughly behind the start or the goal.
+    Every cell costs 1 to enter so the distances are found with a WavefrontSolver expansion per landmark. They are
+    stored in a single (cells, landmarks) array of 16 bit integers when the grid is small enough and 32 bit integers
+    otherwise. The table is only valid until the walls change.
+    """
+
+    def __init__(self, adjacency: GridAdjacency, count: int = 8):
+        """
+        Picks the landmarks and calculates their distance tables
+        :param adjacency: the adjacency table of the grid (see GridMap.get_adjacency)
+        :param count: the number of landmarks
+        """
+        self.rows = adjacency.rows
+        self.cols = adjacency.cols
+        self.count = count
+        n = self.rows * self.cols
+        # the solver is only needed to build the tables so it is not kept (or saved with the maze)
+        solver = WavefrontSolver(adjacency)
+        dtype = np.uint16 if n < np.iinfo(np.uint16).max else np.uint32
+        # the stored distance of cells that a landmark can not reach
+        self.unreached = int(np.iinfo(dtype).max)
+        # the landmarks as flat (row * columns + column) indices
+        self.landmarks = []
+        distances = []
+        open_cells = np.flatnonzero(solver.open_dirs)
+        if open_cells.size > 0:
+            # the first landmark is the cell farthest from an open cell near the middle of the grid
+            seed = solver.distances(divmod(int(open_cells[open_cells.size // 2]), self.cols)).reshape(-1)
+            index = int(np.argmax(seed))
+            # the smallest distance from any landmark, only cells in the component of the landmarks are candidates
+            nearest = None
+            while len(self.landmarks) < count:
+                dist = solver.distances(divmod(index, self.cols)).reshape(-1)
+                self.landmarks.append(index)
+                distances.append(dist)
+                nearest = dist if nearest is None else np.minimum(nearest, dist)
+                index = int(np.argmax(nearest))
+                if nearest[index] <= 0:
+                    # every reachable cell is already a landmark
+                    break
+        # landmark distances of every cell in row-major order
+        self.table = np.full((n, len(distances)), self.unreached, dtype=dtype)
+        for i, dist in enumerate(distances):
+            self.table[dist >= 0, i] = dist[dist >= 0]
+
+    def coords(self) -> List[Tuple[int, int]]:
+        """
+        :return: the (row, column) of every landmark
+        """
+        return [divmod(index, self.cols) for index in self.landmarks]
+
+    def lower_bound(self, a: Tuple[int, int], b: Tuple[int, int]) -> int:
+        """
+        Calculates the triangle inequality lower bound on the distance between two cells
+        :param a: the (row, column) of the first cell
+        :param b: the (row, column) of the second cell
+        :return: the largest difference between the landmark distances of the cells. 0 if either cell can not be
+        reached from the landmarks
+        """
+        d_a = self.table[a[0] * self.cols + a[1]].tolist()
+        d_b = self.table[b[0] * self.cols + b[1]].tolist()
+        if not d_a or d_a[0] == self.unreached or d_b[0] == self.unreached:
+            return 0
+        return max(abs(x - y) for x, y in zip(d_a, d_b))
+
+    def heuristic(self, c_1: GridCell, c_2: GridCell) -> float:
+        """
+        calculates the landmark lower bound between the two cells to use as distance heuristic. The manhattan distance
+        is also a lower bound for 4-connected moves so the larger of the two is used
+        :param c_1: a GridCell object
+        :param c_2: a GridCell object
+        :return: the distance as a float
+        """
+        return max(self.lower_bound(c_1.coord, c_2.coord),
+                   abs(c_1.coord[0] - c_2.coord[0]) + abs(c_1.coord[1] - c_2.coord[1]))
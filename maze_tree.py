@@ -0,0 +1,119 @@
+from typing import List, Tuple
+import numpy as np
+
+from grid_adjacency import GridAdjacency, DIRECTIONS
+
+
+class MazeTree:
+    """
+    The passages of a perfect maze form a spanning tree of the cells, so there is exactly one path between any two
+    cells. This class roots that tree once (with a breadth first search from the root cell) and builds a binary
+    lifting table of ancestors. The distance between two cells is then found from their depths and lowest common
+    ancestor in O(log n) and the path by walking up from both cells in O(path length), without any search.
+    Cells that cannot be reached from the root have a depth of -1 and no path to any other cell. If the passages
+    contain loops (see perfect) the tree paths are still valid paths but not necessarily the shortest ones.
+    """
+
+    def __init__(self, adjacency: GridAdjacency, root: Tuple[int, int] = (0, 0)):
+        """
+        Roots the maze tree and builds the ancestor table
+        :param adjacency: the adjacency table of the maze (see GridMap.get_adjacency)
+        :param root: the (row, column) of the root cell
+        """
+        self.rows = adjacency.rows
+        self.cols = adjacency.cols
+        n = self.rows * self.cols
+        open_dirs = np.frombuffer(bytes(adjacency.open_dirs), dtype=np.uint8)
+        moves = [(bit, d_row * self.cols + d_col) for bit, opposite, d_row, d_col in DIRECTIONS]
+        root_index = root[0] * self.cols + root[1]
+        # cells that are not reached are their own parent so the ancestor table can always be indexed
+        self.parent = np.arange(n, dtype=np.int32)
+        self.depth = np.full(n, -1, dtype=np.int32)
+        self.depth[root_index] = 0
+        frontier = np.array([root_index], dtype=np.int32)
+        level = 0
+        while frontier.size > 0:
+            level += 1
+            reached = []
+            for bit, offset in moves:
+                cells = frontier[(open_dirs[frontier] & bit) != 0]
+                children = cells + offset
+                new = self.depth[children] < 0
+                self.depth[children[new]] = level
+                self.parent[children[new]] = cells[new]
+                reached.append(children[new])
+            frontier = np.concatenate(reached)
+        reachable = self.depth >= 0
+        # a tree has one passage less than it has cells. Every passage is counted from both of its cells
+        passages = int(np.unpackbits(open_dirs[reachable, np.newaxis], axis=1).sum()) // 2
+        # True if the passages of the reachable cells form a tree
+        self.perfect = passages == int(np.count_nonzero(reachable)) - 1
+        # ancestors[k][i] is the 2**k-th ancestor of cell i (the root is its own ancestor)
+        self.ancestors = [self.parent]
+        for k in range(1, max(int(self.depth.max()), 1).bit_length()):
+            self.ancestors.append(self.ancestors[-1][self.ancestors[-1]])
+
+    def lowest_common_ancestor(self, a: int, b: int) -> int:
+        """
+        :param a: the flat (row * columns + column) index of a reachable cell
+        :param b: the flat index of another reachable cell
+        :return: the flat index of the deepest cell that is an ancestor of both cells
+        """
+        depth = self.depth
+        if depth[a] < depth[b]:
+            a, b = b, a
+        # lift the deeper cell to the depth of the other one
+        diff = int(depth[a] - depth[b])
+        k = 0
+        while diff:
+            if diff & 1:
+                a = int(self.ancestors[k][a])
+            diff >>= 1
+            k += 1
+        if a == b:
+            return a
+        for k in range(len(self.ancestors) - 1, -1, -1):
+            up_a = int(self.ancestors[k][a])
+            up_b = int(self.ancestors[k][b])
+            if up_a != up_b:
+                a = up_a
+                b = up_b
+        return int(self.parent[a])
+
+    def distance(self, start: Tuple[int, int], goal: Tuple[int, int]) -> float:
+        """
+        :param start: the (row, column) of the first cell
+        :param goal: the (row, column) of the second cell
+        :return: the number of steps between the cells (inf if they are not connected)
+        """
+        a = start[0] * self.cols + start[1]
+        b = goal[0] * self.cols + goal[1]
+        if self.depth[a] < 0 or self.depth[b] < 0:
+            return float('inf')
+        return int(self.depth[a] + self.depth[b] - 2 * self.depth[self.lowest_common_ancestor(a, b)])
+
+    def path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Finds the path between two cells by walking up the tree from both of them until they meet
+        :param start: the (row, column) of the start cell
+        :param goal: the (row, column) of the goal cell
+        :return: the cells from the start cell to the goal cell (empty if they are not connected)
+        """
+        a = start[0] * self.cols + start[1]
+        b = goal[0] * self.cols + goal[1]
+        if self.depth[a] < 0 or self.depth[b] < 0:
+            return []
+        parent = self.parent
+        depth = self.depth
+        from_start = []
+        from_goal = []
+        while a != b:
+            if depth[a] >= depth[b]:
+                from_start.append(a)
+                a = int(parent[a])
+            else:
+                from_goal.append(b)
+                b = int(parent[b])
+        from_start.append(a)
+        from_start.extend(reversed(from_goal))
+        return [divmod(index, self.cols) for index in from_start]
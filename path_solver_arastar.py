@@ -0,0 +1,312 @@
+from typing import List, Any, Tuple, NamedTuple, Callable, Iterator, Optional
+from time import perf_counter
+
+from grid_cell import GridCell, START, GOAL, PATH, VISITED, OPEN_SET
+from grid_adjacency import GridAdjacency
+from path_solver_astar import PathSolverAStar, PathResult
+from priority_queue import IndexedHeap
+from reachability import ReachabilityIndex
+from landmarks import LandmarkTable
+
+
+class AnytimeSolution(NamedTuple):
+    """
+    A path published by the anytime search
+    path: the cell coordinates from the start cell to the goal cell (empty if no path was found)
+    cost: the total cost of the path (inf if no path was found)
+    bound: the path is at most this factor longer than the shortest path (1 if it is the shortest path)
+    weight: the heuristic weight of the search that found the path
+    elapsed: the time in seconds since the search started
+    expanded: the number of cells expanded since the search started
+    """
+    path: List[Tuple[int, int]]
+    cost: float
+    bound: float
+    weight: float
+    elapsed: float
+    expanded: int
+
+
+class AnytimeSearch:
+    """
+    The state of an anytime repairing A* search. It is kept between the passes at decreasing heuristic weights so
+    every pass only expands the cells whose g_score improved since the previous one.
+    """
+
+    def __init__(self, start_cell: GridCell, goal_cell: GridCell, heuristic: Callable[[GridCell, GridCell], float],
+                 weight: float):
+        """
+        Creates the search state with the start cell in the open set
+        :param start_cell: The starting cell
+        :param goal_cell: The goal cell
+        :param heuristic: the heuristic distance measure
+        :param weight: the heuristic weight of the first pass
+        """
+        self.start_cell = start_cell
+        self.goal_cell = goal_cell
+        self.heuristic = heuristic
+        self.weight = weight
+        self.g_score = {start_cell: 0}
+        self.comes_from = {}
+        self.open_set = IndexedHeap()
+        self.open_set.insert(start_cell, self.f_score(start_cell))
+        # cells expanded in the current pass
+        self.closed = set()
+        # closed cells whose g_score improved during the current pass. They are expanded again in the next pass
+        self.incons = set()
+        self.expanded = 0
+        self.inserted = 0
+        self.updated = 0
+
+    def f_score(self, cell: GridCell) -> float:
+        """
+        :param cell: a cell with a g_score
+        :return: the g_score plus the weighted heuristic of the cell
+        """
+        return self.g_score[cell] + self.heuristic(cell, self.goal_cell) * self.weight
+
+    def improved(self) -> bool:
+        """
+        A pass is finished when no cell in the open set has a smaller f_score than the g_score of the goal cell
+        :return: True if the path to the goal cell can not be improved at the current weight
+        """
+        if self.open_set.is_empty():
+            return True
+        return self.open_set.peek_min()[1] >= self.g_score.get(self.goal_cell, float('inf'))
+
+    def bound(self, cost: float) -> float:
+        """
+        Calculates the suboptimality bound of the current path. Every path that is shorter has to pass through a cell
+        in the open set or the inconsistent set, so the smallest unweighted f_score among them is a lower bound on the
+        shortest distance.
+        :param cost: the cost of the current path
+        :return: the factor by which the current path can at most be longer than the shortest path
+        """
+        if cost == float('inf'):
+            return float('inf')
+        lower = min((self.g_score[cell] + self.heuristic(cell, self.goal_cell)
+                     for cell in list(self.open_set.index) + list(self.incons)), default=cost)
+        if lower >= cost:
+            return 1
+        return min(self.weight, cost / lower)
+
+    def lower_weight(self, weight: float):
+        """
+        Starts the next pass at a lower weight. The inconsistent cells are moved back into the open set and the open
+        set is reordered with the new weight.
+        :param weight: the new heuristic weight
+        :return: None
+        """
+        self.weight = weight
+        cells = list(self.open_set.index) + list(self.incons)
+        self.open_set = IndexedHeap()
+        for cell in cells:
+            self.open_set.insert(cell, self.f_score(cell))
+        self.incons = set()
+        self.closed = set()
+
+    def path(self) -> List[GridCell]:
+        """
+        :return: the cells from the start cell to the goal cell (empty if the goal has not been reached)
+        """
+        if self.goal_cell not in self.g_score:
+            return []
+        path = [self.goal_cell]
+        while path[-1] in self.comes_from:
+            path.append(self.comes_from[path[-1]])
+        path.reverse()
+        return path
+
+    @staticmethod
+    def path_cost(path: List[GridCell]) -> float:
+        """
+        The g_score of the goal cell can be higher than the cost of its path, because cells on the path may have been
+        reached by a shorter route after the goal was
+        :param path: the cells from the start cell to the goal cell
+        :return: the cost of following the path (inf for an empty path)
+        """
+        if not path:
+            return float('inf')
+        return sum(cell.cost for cell in path[1:])
+
+
+class PathSolverARAStar(PathSolverAStar):
+    """
+    Finds a path between the start and end point with Anytime Repairing A* (ARA*). A first path is found quickly with
+    a large heuristic weight, then the weight is lowered step by step and each pass reuses the g_scores of the
+    previous ones, so only the cells whose distance improved are expanded again. Every pass publishes a path with a
+    bound on how much longer it can be than the shortest path, until the shortest path is found or the time budget
+    runs out. The heuristic has to be consistent for the bound to hold.
+    see Likhachev, Gordon and Thrun, "ARA*: Anytime A* with Provable Bounds on Sub-Optimality", NIPS 2003
+    """
+
+    def __init__(self, cell_grid: List[List[GridCell]], start_cell: GridCell, goal_cell: GridCell,
+                 heuristic: str = 'euclidean', movement: str = 'manhattan', heuristic_weight: float = 1,
+                 adjacency: GridAdjacency = None, reachability: ReachabilityIndex = None,
+                 landmarks: LandmarkTable = None, weight_step: float = 0.5, time_budget: Optional[float] = None):
+        """
+        Creates a new anytime path solver and initialises the start and end point
+        :param cell_grid: The cell grid
+        :param start_cell: The starting cell
+        :param goal_cell:  The goal cell
+        :param heuristic:  The heuristic distance measure to use. One of {'euclidean', 'manhattan', 'landmarks'}
+        :param movement: The way the agent is allowed to move. One of {'euclidean', 'manhattan', 'walls'}
+        :param heuristic_weight: The heuristic weight of the first pass. Values of 1 or less give a single A* pass.
+        :param adjacency: A prebuilt adjacency table of the maze (see GridMap.get_adjacency). Only used with 'walls'
+        movement. If it is not provided the table is built from the cell grid.
+        :param reachability: The connected components of the grid (see GridMap.get_reachability). If provided, a goal
+        that is not connected to the start cell is rejected without searching. Ignored with 'euclidean' movement.
+        :param landmarks: The landmark distance tables of the grid (see GridMap.get_landmarks). Required by the
+        'landmarks' heuristic.
+        :param weight_step: The amount the heuristic weight is lowered by after every pass
+        :param time_budget: The number of seconds solve and solutions may run for before they stop with the best path
+        found so far. None for no limit. The animated search is not limited.
+        """
+        super().__init__(cell_grid, start_cell, goal_cell, heuristic=heuristic, movement=movement,
+                         heuristic_weight=heuristic_weight, adjacency=adjacency, reachability=reachability,
+                         landmarks=landmarks)
+        self.weight_step = weight_step
+        self.time_budget = time_budget
+        self.search = AnytimeSearch(start_cell, goal_cell, self.heuristic, max(heuristic_weight, 1))
+        # the path drawn by the last finished pass of the animation
+        self.path = []
+        # the suboptimality bound of the last published path
+        self.bound = float('inf')
+
+    def open_set_size(self) -> int:
+        """
+        :return: the number of candidate cells waiting in the open set
+        """
+        return self.search.open_set.size()
+
+    def expand(self, search: AnytimeSearch, updates: List[Any] = None) -> GridCell:
+        """
+        Expands the cell with the smallest f_score in the current pass
+        :param search: the search state to advance
+        :param updates: a list of rectangles that represent limits of the background that need to be updated at the
+        next draw. If None nothing is drawn and the cells are not modified.
+        :return: the cell that was expanded
+        """
+        current = search.open_set.pop_min()[0]
+        search.closed.add(current)
+        search.expanded += 1
+        if updates is not None and current.state != START and current.state != GOAL:
+            current.state = VISITED
+            updates.append(current.draw_cell())
+            self.visited += 1
+        current_g = search.g_score[current]
+        for neighbour in self.neighbours(current):
+            t_score = current_g + neighbour.cost
+            if t_score < search.g_score.get(neighbour, float('inf')):
+                search.comes_from[neighbour] = current
+                search.g_score[neighbour] = t_score
+                f_score = search.f_score(neighbour)
+                if updates is not None:
+                    neighbour.g_score = t_score
+                    neighbour.f_score = f_score
+                if neighbour in search.closed:
+                    # a cell is only expanded once per pass
+                    search.incons.add(neighbour)
+                elif neighbour not in search.open_set:
+                    search.open_set.insert(neighbour, f_score)
+                    search.inserted += 1
+                    if updates is not None and neighbour.state != START and neighbour.state != GOAL:
+                        neighbour.state = OPEN_SET
+                        updates.append(neighbour.draw_cell())
+                else:
+                    search.open_set.decrease_key(neighbour, f_score)
+                    search.updated += 1
+        return current
+
+    def solutions(self) -> Iterator[AnytimeSolution]:
+        """
+        Runs the anytime search without drawing anything and publishes the path of every pass. Stops once the
+        shortest path is found, the goal turns out to be unreachable or the time budget runs out.
+        :return: an iterator over the improving solutions
+        """
+        if self.unreachable():
+            return
+        start_time = perf_counter()
+        search = AnytimeSearch(self.start_cell, self.goal_cell, self.heuristic, max(self.heuristic_weight, 1))
+        while True:
+            while not search.improved():
+                if self.time_budget is not None and perf_counter() - start_time > self.time_budget:
+                    return
+                self.expand(search)
+            path = search.path()
+            cost = search.path_cost(path)
+            bound = search.bound(cost)
+            yield AnytimeSolution([cell.coord for cell in path], cost, bound, search.weight,
+                                  perf_counter() - start_time, search.expanded)
+            if bound <= 1 or cost == float('inf'):
+                return
+            search.lower_weight(max(search.weight - self.weight_step, 1))
+
+    def solve(self) -> PathResult:
+        """
+        Runs the anytime search until the shortest path is found or the time budget runs out, without drawing
+        anything. The bound of the returned path is stored in bound.
+        :return: a PathResult with the best path found, its cost and the expansion counts of all passes
+        """
+        self.bound = float('inf')
+        result = PathResult([], float('inf'), 0, 0, 0)
+        for solution in self.solutions():
+            self.bound = solution.bound
+            result = PathResult(solution.path, solution.cost, solution.expanded, 0, 0)
+        return result
+
+    def publish(self, updates: List[Any]) -> str:
+        """
+        Draws the path found by the pass that just finished and starts the next pass at a lower weight
+        :param updates: a list of rectangles that represent limits of the background that need to be updated at the
+        next draw
+        :return: a status message
+        """
+        search = self.search
+        path = search.path()
+        if not path:
+            self.done = True
+            return 'No path found'
+        for cell in self.path:
+            if cell.state == PATH:
+                cell.state = VISITED
+                updates.append(cell.draw_cell())
+        for cell in path:
+            if cell.state != START and cell.state != GOAL:
+                cell.state = PATH
+                updates.append(cell.draw_cell())
+        self.path = path
+        cost = search.path_cost(path)
+        self.bound = search.bound(cost)
+        if self.bound <= 1:
+            self.done = True
+            return f'goal reached at {self.goal_cell.coord}. Total distance: {cost} (shortest)'
+        msg = f'weight {search.weight:.2f}: total distance {cost} (at most {self.bound:.2f}x shortest)'
+        search.lower_weight(max(search.weight - self.weight_step, 1))
+        return msg
+
+    def next_step(self, updates: List[Any], render_steps: int) -> str:
+        """
+        performs the next step in the algorithm and updates the cells accordingly
+        :param updates: a list of rectangles that represent limits of the background that need to be updated at the
+        next draw
+        :param render_steps: the number of steps to process before returning. This is used to speed up the the animation
+        by not rendering every generation step
+        :return: a status message
+        """
+        search = self.search
+        msg = ''
+        if not self.done and self.unreachable():
+            self.done = True
+            return 'No path found (the goal is not connected to the start)'
+        for i in range(render_steps):
+            if search.improved():
+                # the pass is finished, the next one starts on the following step
+                return self.publish(updates)
+            inserted = search.inserted
+            updated = search.updated
+            current = self.expand(search, updates)
+            # we want the reverse printed
+            msg = f'current = {current.coord[-1::-1]} -- ({search.updated - updated} updated: ' \
+                  f'{search.inserted - inserted} inserted)'
+        return msg
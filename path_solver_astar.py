@@ -1,8 +1,15 @@
 from math import sqrt
-from typing import List, Any
-from depq import DEPQ
+from typing import List, Any, Tuple, NamedTuple, Callable, TYPE_CHECKING
 
-from grid_cell import GridCell, WalledCell, Walls
+from grid_cell import GridCell, WalledCell, Walls, WALL, START, GOAL, PATH, VISITED, OPEN_SET
+from grid_adjacency import GridAdjacency, STEPS
+from priority_queue import IndexedHeap
+from reachability import ReachabilityIndex
+from search_state import SearchState, acquire_state, release_state
+
+if TYPE_CHECKING:
+    # the landmark tables are built with the wavefront solver, which imports PathResult from this module
+    from landmarks import LandmarkTable
 
 
 def euclidean_heuristic(c_1: GridCell, c_2: GridCell) -> float:
@@ -25,6 +32,22 @@ def manhattan_heuristic(c_1: GridCell, c_2: GridCell) -> float:
     return abs(c_1.coord[0] - c_2.coord[0]) + abs(c_1.coord[1] - c_2.coord[1])
 
 
+class PathResult(NamedTuple):
+    """
+    The outcome of a headless solve
+    path: the cell coordinates from the start cell to the goal cell (empty if no path was found)
+    cost: the total cost of the path (inf if no path was found)
+    expanded: the number of cells removed from the open set and expanded
+    inserted: the number of cells inserted into the open set
+    updated: the number of times a cell already in the open set had its score lowered
+    """
+    path: List[Tuple[int, int]]
+    cost: float
+    expanded: int
+    inserted: int
+    updated: int
+
+
 class PathSolverAStar:
     """
     Finds the shortest path between the start and end point in the grid using the A* algorithm
@@ -32,32 +55,43 @@ class PathSolverAStar:
     """
 
     def __init__(self, cell_grid: List[List[GridCell]], start_cell: GridCell, goal_cell: GridCell,
-                 heuristic: str = 'euclidean', movement: str = 'manhattan', heuristic_weight: float = 1):
+                 heuristic: str = 'euclidean', movement: str = 'manhattan', heuristic_weight: float = 1,
+                 adjacency: GridAdjacency = None, reachability: ReachabilityIndex = None,
+                 landmarks: 'LandmarkTable' = None):
         """
         Creates a new path solver and initialises the start and end point
         :param cell_grid: The cell grid
         :param start_cell: The starting cell
         :param goal_cell:  The goal cell
-        :param heuristic:  The heuristic distance measure to use. One of {'euclidean', 'manhattan'}
+        :param heuristic:  The heuristic distance measure to use. One of {'euclidean', 'manhattan', 'landmarks'}
         :param movement: The way the agent is allowed to move. One of {'euclidean', 'manhattan', 'walls'}
         :param heuristic_weight: The weight factor to multiply the heuristic by.
         Larger values make the algorithm more greedy. Values >1 will not guarantee the shortest path.
+        :param adjacency: A prebuilt adjacency table of the maze (see GridMap.get_adjacency). Only used with 'walls'
+        movement. If it is not provided the table is built from the cell grid.
+        :param reachability: The connected components of the grid (see GridMap.get_reachability). If provided, a goal
+        that is not connected to the start cell is rejected without searching. Ignored with 'euclidean' movement.
+        :param landmarks: The landmark distance tables of the grid (see GridMap.get_landmarks). Required by the
+        'landmarks' heuristic, which is only a lower bound for 'manhattan' and 'walls' movement.
         """
         self.cell_grid = cell_grid
-        self.openSet = DEPQ(maxlen=len(cell_grid)*len(cell_grid[0]))
+        self.adjacency = adjacency
+        # the components only describe 4-connected moves
+        self.reachability = reachability if movement != 'euclidean' else None
+        self.openSet = IndexedHeap()
         self.start_cell = start_cell
         self.goal_cell = goal_cell
         self.heuristic_weight = heuristic_weight
-        self.openSet.insert(start_cell, start_cell.f_score)
-        # a hash table to keep track of nodes in the Fibonacci heap
-        # self.nodes_table = {start_cell.coord: elem}
 
         if heuristic == 'euclidean':
             self.heuristic = euclidean_heuristic
         elif heuristic == 'manhattan':
             self.heuristic = manhattan_heuristic
+        elif heuristic == 'landmarks' and landmarks is not None:
+            self.heuristic = landmarks.heuristic
         else:
-            print(f'Invalid choice for heuristic. Must be either euclidean or manhattan not {heuristic}')
+            print(f'Invalid choice for heuristic. Must be either euclidean, manhattan or landmarks (with a landmark '
+                  f'table) not {heuristic}')
             exit(0)
 
         if movement == 'euclidean':
@@ -65,17 +99,81 @@ class PathSolverAStar:
         elif movement == 'manhattan':
             self.neighbours = self.manhattan_neighbours
         elif movement == 'walls':
-            self.neighbours = self.walls_neighbours
+            if self.adjacency is None:
+                self.adjacency = GridAdjacency.from_cell_grid(cell_grid)
+            self.neighbours = self.adjacency_neighbours
         else:
             print(f'Invalid choice for movement. Must be either euclidean or manhattan not {heuristic}')
             exit(0)
-                        
-        self.start_cell.f_score = self.heuristic(self.start_cell, self.goal_cell)
-        self.start_cell.g_score = 0
+
+        # the scores of the animated search. They are kept off the cells so other searches can use the same grid, and
+        # are only allocated once the animated search takes its first step (see search_state)
+        self.state = None
+        self.openSet.insert(start_cell, self.heuristic(self.start_cell, self.goal_cell))
 
         self.done = False
         self.visited = 0
 
+    def __setstate__(self, state):
+        """
+        Restores a pickled solver. Mazes saved before the open set was an IndexedHeap stored a DEPQ, so the open set is
+        converted here to keep those files loadable
+        :param state: the pickled attribute dictionary
+        :return: None
+        """
+        self.adjacency = None
+        self.reachability = None
+        self.__dict__.update(state)
+        if 'state' not in state:
+            # solvers saved before the search state was separate kept their scores on the cells
+            self.state = SearchState.from_cell_grid(self.cell_grid)
+        if not isinstance(self.openSet, IndexedHeap):
+            open_set = IndexedHeap()
+            # the DEPQ keeps (item, priority) pairs sorted from the highest to the lowest priority
+            for item, priority in self.openSet.data:
+                open_set.insert(item, priority)
+            self.openSet = open_set
+
+    def search_state(self) -> SearchState:
+        """
+        Creates the search state of the animated search the first time it is needed. Solvers that never animate an
+        A* search (or that keep their scores elsewhere) never allocate the full-grid tables.
+        :return: the search state of the animated search
+        """
+        if self.state is None:
+            self.state = SearchState(len(self.cell_grid), len(self.cell_grid[0]))
+            start_f_score = self.heuristic(self.start_cell, self.goal_cell)
+            self.state.set(self.state.index(self.start_cell.coord), 0, start_f_score, -1)
+        return self.state
+
+    def open_set_size(self) -> int:
+        """
+        :return: the number of candidate cells waiting in the open set
+        """
+        return self.openSet.size()
+
+    def scores(self, cell: GridCell) -> Tuple[float, float]:
+        """
+        Looks up the scores the animated search has given a cell. Solvers that draw their scores onto the cells
+        instead are read from the cell.
+        :param cell: a cell of the grid
+        :return: the f_score and g_score of the cell
+        """
+        if self.state is None:
+            return cell.f_score, cell.g_score
+        index = self.state.index(cell.coord)
+        if self.state.seen(index):
+            return self.state.f[index], self.state.g[index]
+        return cell.f_score, cell.g_score
+
+    def unreachable(self) -> bool:
+        """
+        Looks up the components of the start cell and the goal cell in the reachability index
+        :return: True if the goal is known to be unreachable from the start cell
+        """
+        return self.reachability is not None and \
+            not self.reachability.connected(self.start_cell.coord, self.goal_cell.coord)
+
     def euclidean_neighbours(self, cell: GridCell) -> List[GridCell]:
         """
         Returns a list of neighbours of the cell provided. In this case it's the 8 adjacent cells
@@ -87,7 +185,7 @@ class PathSolverAStar:
         lst = []
         for r in range(row_lim[0], row_lim[1]):
             for c in range(col_lim[0], col_lim[1]):
-                if (r, c) != cell.coord and self.cell_grid[r][c].cell_type != 'wall':
+                if (r, c) != cell.coord and self.cell_grid[r][c].state != WALL:
                     lst.append(self.cell_grid[r][c])
         return lst
 
@@ -104,7 +202,7 @@ class PathSolverAStar:
         for r in range(row_lim[0], row_lim[1]):
             for c in range(col_lim[0], col_lim[1]):
                 if (r, c) != cell.coord and (r == cell.coord[0] or c == cell.coord[1]) \
-                        and self.cell_grid[r][c].cell_type != 'wall':
+                        and self.cell_grid[r][c].state != WALL:
                     lst.append(self.cell_grid[r][c])
         return lst
 
@@ -126,6 +224,18 @@ class PathSolverAStar:
                     lst.append(self.cell_grid[r][c])
         return lst
 
+    def adjacency_neighbours(self, cell: GridCell) -> List[GridCell]:
+        """
+        Returns a list of neighbours of the cell provided by looking up the open directions of the cell in the
+        adjacency table. Gives the same neighbours in the same order as walls_neighbours.
+        :param cell: the GridCell we want the neighbours for
+        :return: a list of neighbours
+        """
+        row, col = cell.coord
+        cell_grid = self.cell_grid
+        return [cell_grid[row + d_row][col + d_col]
+                for d_row, d_col in STEPS[self.adjacency.open_dirs[row * self.adjacency.cols + col]]]
+
     @staticmethod
     def check_path(cell_1: WalledCell, cell_2: WalledCell):
         """
@@ -147,6 +257,64 @@ class PathSolverAStar:
             # tunnel to the EAST
             return Walls.EAST not in cell_1.walls and Walls.WEST not in cell_2.walls
         
+    def solve(self) -> PathResult:
+        """
+        Runs the A* search from the start cell to the goal cell to completion without drawing anything. The scores are
+        kept in a search state from the pool of the calling thread, so the cells of the grid are not modified, no reset
+        is needed between calls and several threads can solve on the same grid at once. The same cells are expanded in
+        the same order as when the search is animated with next_step.
+        :return: a PathResult with the path, its cost and the expansion counts
+        """
+        if self.unreachable():
+            return PathResult([], float('inf'), 0, 0, 0)
+        state = acquire_state(len(self.cell_grid), len(self.cell_grid[0]))
+        try:
+            return self.solve_with(state)
+        finally:
+            release_state(state)
+
+    def solve_with(self, state: SearchState) -> PathResult:
+        """
+        Runs the A* search to completion with the scores kept in the given search state
+        :param state: a search state that was just started (see SearchState.begin)
+        :return: a PathResult with the path, its cost and the expansion counts
+        """
+        heuristic = self.heuristic
+        neighbours = self.neighbours
+        goal = self.goal_cell
+        weight = self.heuristic_weight
+        cols = state.cols
+        g_score = state.g
+        stamp = state.stamp
+        generation = state.generation
+        start_f_score = heuristic(self.start_cell, goal)
+        state.set(state.index(self.start_cell.coord), 0, start_f_score, -1)
+        open_set = IndexedHeap()
+        open_set.insert(self.start_cell, start_f_score)
+        expanded = 0
+        inserted = 0
+        updated = 0
+        while not open_set.is_empty():
+            current = open_set.pop_min()[0]
+            expanded += 1
+            index = current.coord[0] * cols + current.coord[1]
+            if current == goal:
+                return PathResult(state.path(index), g_score[index], expanded, inserted, updated)
+            current_g = g_score[index]
+            for neighbour in neighbours(current):
+                t_score = current_g + neighbour.cost
+                n_index = neighbour.coord[0] * cols + neighbour.coord[1]
+                if stamp[n_index] != generation or t_score < g_score[n_index]:
+                    f_score = t_score + heuristic(neighbour, goal) * weight
+                    state.set(n_index, t_score, f_score, index)
+                    if neighbour not in open_set:
+                        open_set.insert(neighbour, f_score)
+                        inserted += 1
+                    else:
+                        open_set.decrease_key(neighbour, f_score)
+                        updated += 1
+        return PathResult([], float('inf'), expanded, inserted, updated)
+
     def next_step(self, updates: List[Any], render_steps: int) -> str:
         """
         performs the next step in the algorithm and updates the cells accordingly
@@ -159,53 +327,260 @@ class PathSolverAStar:
         updated = 0
         inserted = 0
         msg = ''
+        if not self.done and self.unreachable():
+            self.done = True
+            return 'No path found (the goal is not connected to the start)'
         for i in range(render_steps):
             if self.done or self.openSet.is_empty():
                 self.done = True
                 return 'No path found'
             # remove the smallest f_score
-            current = self.openSet.poplast()[0]
+            current = self.openSet.pop_min()[0]
+            state = self.search_state()
+            index = state.index(current.coord)
             # we want the reverse printed
             msg = f'current = {current.coord[-1::-1]}'
             if current.coord == self.goal_cell.coord:
-                current.cell_type = 'goal'
+                current.state = GOAL
                 updates.append(current.draw_cell())
-                msg = f'goal reached at {self.goal_cell.coord}. Total distance: {current.f_score}'
+                msg = f'goal reached at {self.goal_cell.coord}. Total distance: {state.g_score(index)}'
                 # trace the path
-                while current.comes_from is not None:
-                    current = current.comes_from
-                    if current.cell_type != 'start':
-                        current.cell_type = 'path'
-                    updates.append(current.draw_cell())
+                for row, col in state.path(index)[:-1]:
+                    cell = self.cell_grid[row][col]
+                    if cell.state != START:
+                        cell.state = PATH
+                    updates.append(cell.draw_cell())
                 self.done = True
                 return msg
 
-            if current.cell_type != 'start':
-                current.cell_type = 'visited'
+            if current.state != START:
+                current.state = VISITED
                 updates.append(current.draw_cell())
                 self.visited += 1
+            current_g = state.g_score(index)
             for neighbour in self.neighbours(current):
-                t_score = current.g_score + neighbour.cost
+                t_score = current_g + neighbour.cost
+                n_index = state.index(neighbour.coord)
                 updated = 0
                 inserted = 0
-                if t_score < neighbour.g_score:
+                if t_score < state.g_score(n_index):
                     # this is a better path to the neighbour so update the g_score
-                    neighbour.comes_from = current
-                    neighbour.g_score = t_score
-                    neighbour.f_score = t_score + self.heuristic(neighbour, self.goal_cell) * self.heuristic_weight
+                    f_score = t_score + self.heuristic(neighbour, self.goal_cell) * self.heuristic_weight
+                    state.set(n_index, t_score, f_score, index)
                     # only add the neighbour to the open set if it is not already in the open set
                     if neighbour not in self.openSet:
-                        self.openSet.insert(neighbour, neighbour.f_score)
-                        # self.nodes_table[neighbour.coord] = elem
-                        neighbour.cell_type = 'open_set'
+                        self.openSet.insert(neighbour, f_score)
+                        neighbour.state = OPEN_SET
                         updates.append(neighbour.draw_cell())
                         inserted += 1
                     else:
-                        # elem = Node(neighbour)
-                        self.openSet.remove(neighbour)
-                        self.openSet.insert(neighbour, neighbour.f_score)
-                        # self.openSet.decrease_key(self.nodes_table[neighbour.coord], neighbour)
-                        # self.nodes_table[neighbour.coord] = elem
+                        self.openSet.decrease_key(neighbour, f_score)
                         updated += 1
         return msg + f' -- ({updated} updated: {inserted} inserted)'
 
+
+
+class SearchFrontier:
+    """
+    The state of one direction of a bidirectional search
+    """
+
+    def __init__(self, root: GridCell, target: GridCell, root_f_score: float, forward: bool):
+        """
+        Creates a new frontier that grows from the root cell towards the target cell
+        :param root: the cell the search in this direction starts from
+        :param target: the cell the search in this direction is heading for (used for the heuristic)
+        :param root_f_score: the f_score of the root cell
+        :param forward: True if this frontier grows from the start cell and False if it grows from the goal cell
+        """
+        self.open_set = IndexedHeap()
+        self.open_set.insert(root, root_f_score)
+        self.g_score = {root: 0}
+        self.comes_from = {}
+        self.target = target
+        self.forward = forward
+
+
+class BidirectionalSearch:
+    """
+    The state of a bidirectional search: both frontiers and the best meeting point found so far
+    """
+
+    def __init__(self, start_cell: GridCell, goal_cell: GridCell, heuristic: Callable[[GridCell, GridCell], float]):
+        """
+        Creates the search state with one frontier at the start cell and one at the goal cell
+        :param start_cell: The starting cell
+        :param goal_cell: The goal cell
+        :param heuristic: the heuristic distance measure
+        """
+        self.forward = SearchFrontier(start_cell, goal_cell, heuristic(start_cell, goal_cell), True)
+        self.backward = SearchFrontier(goal_cell, start_cell, heuristic(goal_cell, start_cell), False)
+        # the cheapest path found so far goes through the meeting cell
+        self.meeting = start_cell if start_cell == goal_cell else None
+        self.best_cost = 0 if start_cell == goal_cell else float('inf')
+        self.expanded = 0
+        self.inserted = 0
+        self.updated = 0
+
+    def finished(self) -> bool:
+        """
+        The search is finished when one of the frontiers is exhausted or when the smallest priority of both frontiers
+        is at least the cost of the best path found so far. The smallest priority is a lower bound on the cost of any
+        path that has not been found yet.
+        :return: True if no more cells need to be expanded
+        """
+        if self.forward.open_set.is_empty() or self.backward.open_set.is_empty():
+            return True
+        return min(self.forward.open_set.peek_min()[1], self.backward.open_set.peek_min()[1]) >= self.best_cost
+
+    def path(self) -> List[GridCell]:
+        """
+        Joins the two halves of the path at the meeting cell
+        :return: the cells from the start cell to the goal cell (empty if the frontiers never met)
+        """
+        if self.meeting is None:
+            return []
+        path = [self.meeting]
+        while path[-1] in self.forward.comes_from:
+            path.append(self.forward.comes_from[path[-1]])
+        path.reverse()
+        while path[-1] in self.backward.comes_from:
+            path.append(self.backward.comes_from[path[-1]])
+        return path
+
+
+class PathSolverBidirectional(PathSolverAStar):
+    """
+    Finds the shortest path between the start and end point with a bidirectional A* search. One frontier grows from
+    the start cell towards the goal cell and another from the goal cell towards the start cell. Cells are prioritised
+    by max(f_score, 2 * g_score) so that neither frontier searches much further than halfway (the "meet in the
+    middle" rule) and the frontier with the lowest priority is expanded next. The search stops once the frontiers have
+    met and neither frontier can improve on the best path through a meeting cell. On long corridor-heavy mazes where
+    the heuristic is weak this expands fewer cells than the unidirectional search.
+    """
+
+    def __init__(self, cell_grid: List[List[GridCell]], start_cell: GridCell, goal_cell: GridCell,
+                 heuristic: str = 'euclidean', movement: str = 'manhattan', heuristic_weight: float = 1,
+                 adjacency: GridAdjacency = None, reachability: ReachabilityIndex = None,
+                 landmarks: 'LandmarkTable' = None):
+        """
+        Creates a new bidirectional path solver and initialises the start and end point
+        :param cell_grid: The cell grid
+        :param start_cell: The starting cell
+        :param goal_cell:  The goal cell
+        :param heuristic:  The heuristic distance measure to use. One of {'euclidean', 'manhattan', 'landmarks'}
+        :param movement: The way the agent is allowed to move. One of {'euclidean', 'manhattan', 'walls'}
+        :param heuristic_weight: The weight factor to multiply the heuristic by.
+        Larger values make the algorithm more greedy. Values >1 will not guarantee the shortest path.
+        :param adjacency: A prebuilt adjacency table of the maze (see GridMap.get_adjacency). Only used with 'walls'
+        movement. If it is not provided the table is built from the cell grid.
+        :param reachability: The connected components of the grid (see GridMap.get_reachability). If provided, a goal
+        that is not connected to the start cell is rejected without searching. Ignored with 'euclidean' movement.
+        :param landmarks: The landmark distance tables of the grid (see GridMap.get_landmarks). Required by the
+        'landmarks' heuristic, which is only a lower bound for 'manhattan' and 'walls' movement.
+        """
+        super().__init__(cell_grid, start_cell, goal_cell, heuristic=heuristic, movement=movement,
+                         heuristic_weight=heuristic_weight, adjacency=adjacency, reachability=reachability,
+                         landmarks=landmarks)
+        self.search = BidirectionalSearch(start_cell, goal_cell, self.heuristic)
+        self.openSet = self.search.forward.open_set
+        self.goal_cell.f_score = self.heuristic(self.goal_cell, self.start_cell)
+        self.goal_cell.g_score = 0
+
+    def open_set_size(self) -> int:
+        """
+        :return: the number of candidate cells waiting in both open sets
+        """
+        return self.search.forward.open_set.size() + self.search.backward.open_set.size()
+
+    def expand(self, search: BidirectionalSearch, updates: List[Any] = None) -> GridCell:
+        """
+        Expands the best cell of the frontier with the lowest priority
+        :param search: the search state to advance
+        :param updates: a list of rectangles that represent limits of the background that need to be updated at the
+        next draw. If None nothing is drawn and the cells are not modified.
+        :return: the cell that was expanded
+        """
+        if search.backward.open_set.peek_min()[1] < search.forward.open_set.peek_min()[1]:
+            frontier, other = search.backward, search.forward
+        else:
+            frontier, other = search.forward, search.backward
+        current = frontier.open_set.pop_min()[0]
+        search.expanded += 1
+        if updates is not None and current.state != START and current.state != GOAL:
+            current.state = VISITED
+            updates.append(current.draw_cell())
+            self.visited += 1
+        current_g = frontier.g_score[current]
+        for neighbour in self.neighbours(current):
+            # the backward frontier walks the path in reverse so it pays for entering the current cell
+            t_score = current_g + (neighbour.cost if frontier.forward else current.cost)
+            if t_score < frontier.g_score.get(neighbour, float('inf')):
+                frontier.comes_from[neighbour] = current
+                frontier.g_score[neighbour] = t_score
+                f_score = t_score + self.heuristic(neighbour, frontier.target) * self.heuristic_weight
+                priority = max(f_score, 2 * t_score)
+                if neighbour not in frontier.open_set:
+                    frontier.open_set.insert(neighbour, priority)
+                    search.inserted += 1
+                    if updates is not None and neighbour.state != START and neighbour.state != GOAL:
+                        neighbour.state = OPEN_SET
+                        updates.append(neighbour.draw_cell())
+                else:
+                    frontier.open_set.decrease_key(neighbour, priority)
+                    search.updated += 1
+                if updates is not None:
+                    # show the scores of the direction that reached the cell last
+                    neighbour.g_score = t_score
+                    neighbour.f_score = f_score
+                if neighbour in other.g_score and t_score + other.g_score[neighbour] < search.best_cost:
+                    search.best_cost = t_score + other.g_score[neighbour]
+                    search.meeting = neighbour
+        return current
+
+    def solve(self) -> PathResult:
+        """
+        Runs the bidirectional search to completion without drawing anything. The search state is kept separately from
+        the animated search so the cells of the grid are not modified.
+        :return: a PathResult with the path, its cost and the expansion counts
+        """
+        if self.unreachable():
+            return PathResult([], float('inf'), 0, 0, 0)
+        search = BidirectionalSearch(self.start_cell, self.goal_cell, self.heuristic)
+        while not search.finished():
+            self.expand(search)
+        return PathResult([cell.coord for cell in search.path()], search.best_cost,
+                          search.expanded, search.inserted, search.updated)
+
+    def next_step(self, updates: List[Any], render_steps: int) -> str:
+        """
+        performs the next step in the algorithm and updates the cells accordingly
+        :param updates: a list of rectangles that represent limits of the background that need to be updated at the
+        next draw
+        :param render_steps: the number of steps to process before returning. This is used to speed up the the animation
+        by not rendering every generation step
+        :return: a status message
+        """
+        search = self.search
+        msg = ''
+        if not self.done and self.unreachable():
+            self.done = True
+            return 'No path found (the goal is not connected to the start)'
+        for i in range(render_steps):
+            if search.finished():
+                self.done = True
+                path = search.path()
+                if not path:
+                    return 'No path found'
+                for cell in path:
+                    if cell.state != START and cell.state != GOAL:
+                        cell.state = PATH
+                        updates.append(cell.draw_cell())
+                return f'frontiers met at {search.meeting.coord}. Total distance: {search.best_cost}'
+            inserted = search.inserted
+            updated = search.updated
+            current = self.expand(search, updates)
+            # we want the reverse printed
+            msg = f'current = {current.coord[-1::-1]} -- ({search.updated - updated} updated: ' \
+                  f'{search.inserted - inserted} inserted)'
+        return msg
@@ -0,0 +1,538 @@
+from typing import List, Any, Tuple, Optional
+from math import sqrt
+import tracemalloc
+
+from grid_cell import GridCell, START, GOAL, PATH, VISITED, OPEN_SET
+from grid_adjacency import GridAdjacency, DIRECTIONS
+from path_solver_astar import PathSolverAStar, PathResult
+from priority_queue import IndexedHeap
+from reachability import ReachabilityIndex
+
+# the fields of a node record in FrontierSearch.nodes
+G, USED, RELAY = range(3)
+
+
+class FrontierSearch:
+    """
+    A memory-bounded A* search on the adjacency table of a grid that only needs the table (one byte per cell) and the
+    nodes it keeps in memory. Each node is a record of [g, used directions, relay] keyed by the flat
+    (row * columns + column) index of its cell. Every cell costs 1 to enter.
+    Expanded cells are kept (with their parent) only while the search fits in node_budget. After that only the open
+    set is kept (frontier search): when a cell is expanded the direction back to it is marked as used in each of its
+    neighbours, so a closed cell is never generated again even though it is no longer in memory. The path is then
+    recovered by divide and conquer (see bounded_path) from the relay of the goal cell, the last cell on its path whose
+    g is a power of two.
+    If the open set alone does not fit in the budget, the smallest f in it is a lower bound on the path length. The
+    open cells above it are dropped and from then on no cell with a larger f is generated. A dropped cell that is
+    reached again along a shorter path has lost its used directions and may generate closed cells a second time, so
+    this bounded A* search only gets as many expansions again as it had made before. If it runs out of them, its open
+    set still does not fit or it finishes without reaching the goal, the search starts over as a breadth first
+    heuristic search bounded by iterating on f: the cells are expanded one g layer at a time and cells with an f above
+    the bound are not generated. Every move of a 4-connected grid goes to the layer before or after, so keeping the
+    previous, current and next layer in memory is enough to never generate a cell twice. If the goal is not reached
+    within the bound the search starts over with the smallest f that was cut off. Any bound that is at least the path
+    length finds the shortest path. If even the layers within the bound do not fit, the cells of the next layer with
+    the largest f are dropped (beam search), after which the path is no longer guaranteed to be the shortest or to be
+    found at all. The search gives up once it has expanded rows * columns cells more than the grid has.
+    see Korf, Zhang, Thayer and Hohwald, "Frontier search", Journal of the ACM 52 (2005)
+    and Zhou and Hansen, "Breadth-first heuristic search", Artificial Intelligence 170 (2006)
+    """
+
+    def __init__(self, adjacency: GridAdjacency, start: int, goal: int, node_budget: int,
+                 heuristic: str = 'euclidean', heuristic_weight: float = 1):
+        """
+        Creates the search with only the start cell in the open set
+        :param adjacency: the adjacency table of the grid (see GridMap.get_adjacency)
+        :param start: the flat index of the start cell
+        :param goal: the flat index of the goal cell
+        :param node_budget: the largest number of nodes kept in memory
+        :param heuristic: The heuristic distance measure to use. One of {'euclidean', 'manhattan'}
+        :param heuristic_weight: The weight factor to multiply the heuristic by
+        """
+        self.cols = adjacency.cols
+        self.open_dirs = adjacency.open_dirs
+        # (direction bit, opposite bit, offset of the neighbour in the flat array) for each direction
+        self.moves = [(bit, opposite, d_row * self.cols + d_col) for bit, opposite, d_row, d_col in DIRECTIONS]
+        self.start = start
+        self.goal = goal
+        self.goal_row, self.goal_col = divmod(goal, self.cols)
+        self.node_budget = node_budget
+        self.manhattan = heuristic == 'manhattan'
+        self.heuristic_weight = heuristic_weight
+        self.nodes = {start: [0, 0, start]}
+        self.open_set = IndexedHeap()
+        self.open_set.insert(start, (self.h(start), 0))
+        # the parent of every generated cell, dropped once the search no longer fits in the budget
+        self.parents = {}
+        # no cell with a larger f is generated. Set when the open set first overflows
+        self.bound = float('inf')
+        # True once the search has switched to the bounded breadth first search
+        self.layered = False
+        # the bounded A* search switches to the breadth first search after this many expansions
+        self.pruned_expanded = 0
+        # the cells of the current g layer that are still to be expanded and the g of that layer
+        self.layer = []
+        self.depth = 0
+        # the smallest f that was cut off by the bound, the bound of the next iteration
+        self.next_bound = float('inf')
+        self.iterations = 0
+        # every cell is expanded at most once by the A* search, after that the iterations may expand rows * columns
+        # cells more before the search gives up
+        self.max_expanded = 2 * adjacency.rows * adjacency.cols
+        self.peak_nodes = 1
+        self.expanded = 0
+        self.generated = 0
+        # the number of cells that were not generated because their f was above the bound or were dropped from a layer
+        self.dropped = 0
+        # True once cells within the bound have been dropped, so not finding the goal proves nothing
+        self.narrowed = False
+        self.done = False
+        # True if the search stopped without knowing whether the goal can be reached
+        self.gave_up = False
+        self.cost = float('inf')
+        # the relay of the goal cell once it is reached
+        self.relay = start
+
+    def h(self, index: int) -> float:
+        """
+        :param index: the flat index of a cell
+        :return: the weighted heuristic distance from the cell to the goal cell
+        """
+        row, col = divmod(index, self.cols)
+        if self.manhattan:
+            return (abs(row - self.goal_row) + abs(col - self.goal_col)) * self.heuristic_weight
+        return sqrt((row - self.goal_row) ** 2 + (col - self.goal_col) ** 2) * self.heuristic_weight
+
+    def memory(self) -> int:
+        """
+        :return: the number of nodes and parent entries held in memory
+        """
+        return len(self.nodes) + (len(self.parents) if self.parents is not None else 0)
+
+    def open_size(self) -> int:
+        """
+        :return: the number of generated cells that are waiting to be expanded
+        """
+        if not self.layered:
+            return self.open_set.size()
+        return len(self.layer) + sum(1 for node in self.nodes.values() if node[G] > self.depth)
+
+    def step(self) -> Tuple[Optional[int], List[int]]:
+        """
+        Expands the open cell with the smallest f, or the next cell of the current layer once the search is bounded
+        :return: tuple of (the expanded cell or None when the search is finished without reaching the goal, the cells
+        added to the open set)
+        """
+        if self.expanded >= self.max_expanded:
+            return self.stop(True)
+        if self.layered:
+            return self.layer_step()
+        if self.open_set.is_empty():
+            if self.next_bound == float('inf'):
+                return self.stop(False)
+            # no path within the bound, the breadth first search continues from the next bound
+            self.start_layers(self.next_bound)
+            return self.layer_step()
+        if self.bound < float('inf') and self.expanded >= self.pruned_expanded:
+            self.start_layers(self.bound)
+            return self.layer_step()
+        index = self.open_set.pop_min()[0]
+        g, used, relay = self.nodes.pop(index)
+        self.expanded += 1
+        if index == self.goal:
+            return self.reach(g, relay)
+        # the children of a cell whose g is a power of two relay through it
+        if g & (g - 1) == 0 and g > 0:
+            relay = index
+        added = []
+        child_g = g + 1
+        open_dirs = self.open_dirs[index]
+        for bit, opposite, offset in self.moves:
+            if not open_dirs & bit or used & bit:
+                continue
+            n_index = index + offset
+            neighbour = self.nodes.get(n_index)
+            if neighbour is None:
+                f = child_g + self.h(n_index)
+                if f > self.bound:
+                    self.next_bound = min(self.next_bound, f)
+                    self.dropped += 1
+                    continue
+                self.nodes[n_index] = [child_g, opposite, relay]
+                self.open_set.insert(n_index, (f, -child_g))
+                self.generated += 1
+                added.append(n_index)
+            else:
+                neighbour[USED] |= opposite
+                if child_g >= neighbour[G]:
+                    continue
+                neighbour[G] = child_g
+                neighbour[RELAY] = relay
+                self.open_set.update(n_index, (child_g + self.h(n_index), -child_g))
+            if self.parents is not None:
+                self.parents[n_index] = index
+        if self.parents is not None and self.memory() > self.node_budget:
+            # from here on only the open set is kept
+            self.parents = None
+        if len(self.nodes) > self.node_budget:
+            self.prune()
+            added = [index for index in added if index in self.nodes]
+        self.peak_nodes = max(self.peak_nodes, self.memory())
+        return index, added
+
+    def prune(self):
+        """
+        Called when the open set of the A* search no longer fits. Bounds the search by the smallest f in the open set
+        and drops the open cells above it, or starts the breadth first search if the open set still does not fit
+        :return: None
+        """
+        first = self.open_set.peek_min()[0]
+        bound = self.nodes[first][G] + self.h(first)
+        if self.bound == float('inf'):
+            self.pruned_expanded = 2 * self.expanded
+        self.bound = bound
+        for index in list(self.open_set.index):
+            f = self.nodes[index][G] + self.h(index)
+            if f > bound:
+                self.next_bound = min(self.next_bound, f)
+                self.open_set.remove(index)
+                del self.nodes[index]
+                self.dropped += 1
+        if len(self.nodes) > self.node_budget:
+            self.start_layers(bound)
+
+    def layer_step(self) -> Tuple[Optional[int], List[int]]:
+        """
+        Expands the next cell of the current g layer of the bounded breadth first search
+        :return: tuple of (the expanded cell or None when the search is finished without reaching the goal, the cells
+        added to the next layer)
+        """
+        if not self.layer:
+            # the previous layer is no longer needed to recognise cells that were already expanded
+            for index in [index for index, node in self.nodes.items() if node[G] < self.depth]:
+                del self.nodes[index]
+            self.depth += 1
+            self.layer = [index for index, node in self.nodes.items() if node[G] == self.depth]
+            if not self.layer:
+                if self.next_bound == float('inf'):
+                    return self.stop(self.narrowed)
+                # grow by at least one move so that euclidean bounds do not creep up by fractions of a cell
+                self.start_layers(max(self.next_bound, self.bound + 1))
+        index = self.layer.pop()
+        relay = self.nodes[index][RELAY]
+        self.expanded += 1
+        if index == self.goal:
+            return self.reach(self.depth, relay)
+        g = self.depth
+        if g & (g - 1) == 0 and g > 0:
+            relay = index
+        added = []
+        child_g = g + 1
+        open_dirs = self.open_dirs[index]
+        for bit, opposite, offset in self.moves:
+            n_index = index + offset
+            if not open_dirs & bit or n_index in self.nodes:
+                continue
+            f = child_g + self.h(n_index)
+            if f > self.bound:
+                self.next_bound = min(self.next_bound, f)
+                self.dropped += 1
+                continue
+            self.nodes[n_index] = [child_g, opposite, relay]
+            self.generated += 1
+            added.append(n_index)
+        if len(self.nodes) > self.node_budget:
+            self.narrow()
+            added = [index for index in added if index in self.nodes]
+        self.peak_nodes = max(self.peak_nodes, self.memory())
+        return index, added
+
+    def narrow(self):
+        """
+        Drops the cells of the next layer with the largest f until an eighth of the budget is free again, or the next
+        layer is empty. The previous and current layer are needed to recognise expanded cells so they are kept, and
+        the search gives up if they alone do not fit. Dropping in batches keeps the cost of sorting the layer low.
+        :return: None
+        """
+        next_layer = sorted((index for index, node in self.nodes.items() if node[G] > self.depth), key=self.h)
+        excess = len(self.nodes) - (self.node_budget - self.node_budget // 8)
+        for index in next_layer[max(len(next_layer) - excess, 0):]:
+            del self.nodes[index]
+            self.dropped += 1
+        self.narrowed = True
+        if len(self.nodes) > self.node_budget:
+            self.stop(True)
+
+    def start_layers(self, bound: float):
+        """
+        Starts a bounded breadth first search iteration from the start cell
+        :param bound: no cell with a larger f is generated
+        :return: None
+        """
+        self.bound = bound
+        self.layered = True
+        self.next_bound = float('inf')
+        self.parents = None
+        self.nodes = {self.start: [0, 0, self.start]}
+        self.open_set = IndexedHeap()
+        self.layer = [self.start]
+        self.depth = 0
+        self.iterations += 1
+
+    def reach(self, g: int, relay: int) -> Tuple[int, List[int]]:
+        """
+        Finishes the search at the goal cell
+        :param g: the g of the goal cell
+        :param relay: the relay of the goal cell
+        :return: tuple of (the goal cell, no added cells)
+        """
+        self.done = True
+        self.cost = g
+        self.relay = relay
+        return self.goal, []
+
+    def stop(self, gave_up: bool) -> Tuple[None, List[int]]:
+        """
+        Finishes the search without reaching the goal cell
+        :param gave_up: True if the goal may still be reachable
+        :return: tuple of (None, no added cells)
+        """
+        self.done = True
+        self.gave_up = gave_up
+        return None, []
+
+    def run(self):
+        """
+        Expands cells until the goal is reached or the open set is empty
+        :return: None
+        """
+        while not self.done:
+            self.step()
+
+    def trace(self) -> List[int]:
+        """
+        :return: the flat indices from the start cell to the goal cell if the parents are still in memory
+        """
+        path = [self.goal]
+        while path[-1] != self.start:
+            path.append(self.parents[path[-1]])
+        path.reverse()
+        return path
+
+
+class BoundedStats:
+    """
+    The totals of all the searches made by bounded_path
+    """
+
+    def __init__(self):
+        self.peak_nodes = 0
+        self.expanded = 0
+        self.generated = 0
+        self.dropped = 0
+        self.searches = 0
+
+    def add(self, search: FrontierSearch):
+        """
+        Adds the counts of a finished search
+        :param search: the search
+        :return: None
+        """
+        self.peak_nodes = max(self.peak_nodes, search.peak_nodes)
+        self.expanded += search.expanded
+        self.generated += search.generated
+        self.dropped += search.dropped
+        self.searches += 1
+
+
+def finish_path(search: FrontierSearch, adjacency: GridAdjacency, stats: BoundedStats) -> List[int]:
+    """
+    Recovers the path of a finished search. The open set is released first so that only one search holds nodes at a
+    time. Without the parents the path is split at the relay of the goal cell and both halves are searched again.
+    :param search: a search that reached its goal
+    :param adjacency: the adjacency table of the grid
+    :param stats: the totals to add the searches to
+    :return: the flat indices from the start cell to the goal cell
+    """
+    stats.add(search)
+    start, goal, relay = search.start, search.goal, search.relay
+    search.nodes = {}
+    search.open_set = IndexedHeap()
+    if search.parents is not None:
+        return search.trace()
+    if search.cost <= 1:
+        return [start, goal]
+    settings = (search.node_budget, 'manhattan' if search.manhattan else 'euclidean', search.heuristic_weight)
+    first = bounded_path(adjacency, start, relay, *settings, stats=stats)
+    second = bounded_path(adjacency, relay, goal, *settings, stats=stats)
+    return first + second[1:]
+
+
+def bounded_path(adjacency: GridAdjacency, start: int, goal: int, node_budget: int, heuristic: str = 'euclidean',
+                 heuristic_weight: float = 1, stats: BoundedStats = None) -> List[int]:
+    """
+    Finds a path with at most node_budget nodes in memory per search. If the parents do not fit in the budget the
+    path is found by divide and conquer through the relay cells, so some cells are searched more than once.
+    :param adjacency: the adjacency table of the grid (see GridMap.get_adjacency)
+    :param start: the flat index of the start cell
+    :param goal: the flat index of the goal cell
+    :param node_budget: the largest number of nodes kept in memory
+    :param heuristic: The heuristic distance measure to use. One of {'euclidean', 'manhattan'}
+    :param heuristic_weight: The weight factor to multiply the heuristic by
+    :param stats: the totals to add the searches to
+    :return: the flat indices from the start cell to the goal cell (empty if no path was found)
+    """
+    if stats is None:
+        stats = BoundedStats()
+    if start == goal:
+        return [start]
+    search = FrontierSearch(adjacency, start, goal, node_budget, heuristic=heuristic,
+                            heuristic_weight=heuristic_weight)
+    search.run()
+    if search.cost == float('inf'):
+        stats.add(search)
+        return []
+    return finish_path(search, adjacency, stats)
+
+
+class PathSolverFrontier(PathSolverAStar):
+    """
+    Finds a path between the start and end point while keeping at most a fixed number of search nodes in memory (see
+    FrontierSearch). Only the first search is animated. Cells that have been expanded stay marked as visited even after
+    they have been dropped from memory. Moves are 4-connected, either through the cell walls ('walls' movement) or
+    between cells that are not walls ('manhattan' movement).
+    """
+
+    def __init__(self, cell_grid: List[List[GridCell]], start_cell: GridCell, goal_cell: GridCell,
+                 heuristic: str = 'euclidean', movement: str = 'walls', heuristic_weight: float = 1,
+                 adjacency: GridAdjacency = None, reachability: ReachabilityIndex = None, node_budget: int = 1024):
+        """
+        Creates a new memory-bounded path solver and initialises the start and end point
+        :param cell_grid: The cell grid
+        :param start_cell: The starting cell
+        :param goal_cell:  The goal cell
+        :param heuristic:  The heuristic distance measure to use. One of {'euclidean', 'manhattan'}
+        :param movement: The way the agent is allowed to move. One of {'walls', 'manhattan'}
+        :param heuristic_weight: The weight factor to multiply the heuristic by.
+        Larger values make the algorithm more greedy. Values >1 will not guarantee the shortest path.
+        :param adjacency: A prebuilt adjacency table of the maze (see GridMap.get_adjacency). If it is not provided
+        the table is built from the cell grid.
+        :param reachability: The connected components of the grid (see GridMap.get_reachability). If provided, a goal
+        that is not connected to the start cell is rejected without searching.
+        :param node_budget: The largest number of search nodes kept in memory
+        """
+        if movement not in ('walls', 'manhattan'):
+            print(f'Invalid choice for movement. The memory-bounded search needs walls or manhattan not {movement}')
+            exit(0)
+        if heuristic not in ('euclidean', 'manhattan'):
+            print(f'The memory-bounded search only supports euclidean or manhattan. Using euclidean not {heuristic}')
+            heuristic = 'euclidean'
+        super().__init__(cell_grid, start_cell, goal_cell, heuristic=heuristic, movement=movement,
+                         heuristic_weight=heuristic_weight, adjacency=adjacency, reachability=reachability)
+        if self.adjacency is None:
+            self.adjacency = GridAdjacency.from_cell_grid(cell_grid)
+        self.heuristic_name = heuristic
+        self.node_budget = node_budget
+        self.cols = len(cell_grid[0])
+        self.search = self.new_search()
+        # the peak number of nodes and the peak memory in bytes (measured with tracemalloc) of the last headless solve
+        self.peak_nodes = 0
+        self.peak_memory = 0
+
+    def new_search(self) -> FrontierSearch:
+        """
+        :return: a new memory-bounded search from the start cell to the goal cell
+        """
+        return FrontierSearch(self.adjacency, self.start_cell.coord[0] * self.cols + self.start_cell.coord[1],
+                              self.goal_cell.coord[0] * self.cols + self.goal_cell.coord[1], self.node_budget,
+                              heuristic=self.heuristic_name, heuristic_weight=self.heuristic_weight)
+
+    def open_set_size(self) -> int:
+        """
+        :return: the number of candidate cells waiting in the open set
+        """
+        return self.search.open_size()
+
+    def scores(self, cell: GridCell) -> Tuple[float, float]:
+        """
+        Looks up the scores of a cell in the nodes the animated search holds in memory. The scores are not written to
+        the cells, which would allocate score arrays for the whole grid.
+        :param cell: a cell of the grid
+        :return: the f_score and g_score of the cell (inf if the search does not hold it)
+        """
+        index = cell.coord[0] * self.cols + cell.coord[1]
+        node = self.search.nodes.get(index)
+        if node is None:
+            return float('inf'), float('inf')
+        return node[G] + self.search.h(index), node[G]
+
+    def solve(self) -> PathResult:
+        """
+        Runs the memory-bounded search to completion without drawing anything. The peak number of nodes held by any
+        search is stored in peak_nodes and the peak memory allocated while solving in peak_memory.
+        :return: a PathResult with the path, its cost and the expansion counts summed over all the searches
+        """
+        if self.unreachable():
+            return PathResult([], float('inf'), 0, 0, 0)
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        stats = BoundedStats()
+        search = self.new_search()
+        path = bounded_path(self.adjacency, search.start, search.goal, self.node_budget,
+                            heuristic=self.heuristic_name, heuristic_weight=self.heuristic_weight, stats=stats)
+        self.peak_memory = tracemalloc.get_traced_memory()[1] - base
+        if not tracing:
+            tracemalloc.stop()
+        self.peak_nodes = stats.peak_nodes
+        cost = len(path) - 1 if path else float('inf')
+        return PathResult([divmod(index, self.cols) for index in path], cost, stats.expanded, stats.generated, 0)
+
+    def next_step(self, updates: List[Any], render_steps: int) -> str:
+        """
+        performs the next step in the algorithm and updates the cells accordingly
+        :param updates: a list of rectangles that represent limits of the background that need to be updated at the
+        next draw
+        :param render_steps: the number of steps to process before returning. This is used to speed up the the animation
+        by not rendering every generation step
+        :return: a status message
+        """
+        if not self.done and self.unreachable():
+            self.done = True
+            return 'No path found (the goal is not connected to the start)'
+        search = self.search
+        cols = self.cols
+        msg = ''
+        for i in range(render_steps):
+            current, added = search.step()
+            if search.done:
+                self.done = True
+                if search.gave_up:
+                    return f'No path found (gave up after {search.expanded} expansions, ' \
+                           f'{search.dropped} cells did not fit in the node budget)'
+                if search.cost == float('inf'):
+                    return 'No path found'
+                stats = BoundedStats()
+                path = finish_path(search, self.adjacency, stats)
+                for index in path:
+                    cell = self.cell_grid[index // cols][index % cols]
+                    if cell.state != START and cell.state != GOAL:
+                        cell.state = PATH
+                        updates.append(cell.draw_cell())
+                return f'goal reached at {self.goal_cell.coord}. Total distance: {len(path) - 1} ' \
+                       f'(peak {stats.peak_nodes} nodes, {stats.searches} searches)'
+            cell = self.cell_grid[current // cols][current % cols]
+            if cell.state != START:
+                cell.state = VISITED
+                updates.append(cell.draw_cell())
+                self.visited += 1
+            for index in added:
+                cell = self.cell_grid[index // cols][index % cols]
+                if cell.state != START and cell.state != GOAL:
+                    cell.state = OPEN_SET
+                    updates.append(cell.draw_cell())
+            # we want the reverse printed
+            msg = f'current = {current % cols, current // cols} -- ({search.memory()} nodes in memory)'
+        return msg
@@ -0,0 +1,94 @@
+from typing import List, Any
+
+from grid_cell import GridCell, START, GOAL, PATH
+from grid_adjacency import GridAdjacency
+from path_solver_astar import PathSolverAStar, PathResult
+from hierarchical_solver import HierarchicalSolver
+
+
+class PathSolverHierarchical(PathSolverAStar):
+    """
+    Finds a path between the start and end point with hierarchical path-finding A* (see HierarchicalSolver). The search
+    runs over the abstract graph of cluster transitions in a single step and the refined cell path is then drawn one
+    cell per step from the start cell. Paths are usually within a few percent of the shortest path. Moves are
+    4-connected, either through the cell walls ('walls' movement) or between cells that are not walls ('manhattan'
+    movement).
+    """
+
+    def __init__(self, cell_grid: List[List[GridCell]], start_cell: GridCell, goal_cell: GridCell,
+                 heuristic: str = 'euclidean', movement: str = 'walls', heuristic_weight: float = 1,
+                 adjacency: GridAdjacency = None, hierarchy: HierarchicalSolver = None):
+        """
+        Creates a new hierarchical path solver and initialises the start and end point
+        :param cell_grid: The cell grid
+        :param start_cell: The starting cell
+        :param goal_cell:  The goal cell
+        :param heuristic:  Only used for the hover text, the abstract search always uses the manhattan distance.
+        One of {'euclidean', 'manhattan'}
+        :param movement: The way the agent is allowed to move. One of {'walls', 'manhattan'}
+        :param heuristic_weight: Not used, the abstract search is not weighted
+        :param adjacency: A prebuilt adjacency table of the maze (see GridMap.get_adjacency). If it is not provided
+        the table is built from the cell grid.
+        :param hierarchy: The clusters of the grid (see GridMap.get_hierarchy). If it is not provided they are built
+        from the adjacency table.
+        """
+        if movement not in ('walls', 'manhattan'):
+            print(f'Invalid choice for movement. The hierarchical solver needs walls or manhattan not {movement}')
+            exit(0)
+        super().__init__(cell_grid, start_cell, goal_cell, heuristic=heuristic, movement=movement,
+                         heuristic_weight=heuristic_weight, adjacency=adjacency)
+        if self.adjacency is None:
+            self.adjacency = GridAdjacency.from_cell_grid(cell_grid)
+        self.hierarchy = hierarchy if hierarchy is not None else HierarchicalSolver(self.adjacency)
+        # the result of the abstract search, found by the first step
+        self.result = None
+        # the number of path cells drawn so far
+        self.drawn = 0
+
+    def open_set_size(self) -> int:
+        """
+        :return: the number of path cells still to be drawn (there is no open set)
+        """
+        if self.done or self.result is None:
+            return 0
+        return len(self.result.path) - self.drawn
+
+    def solve(self) -> PathResult:
+        """
+        Finds the path without drawing anything
+        :return: a PathResult with the path and its cost. The counts are for the abstract graph
+        """
+        self.done = True
+        return self.hierarchy.solve(self.start_cell.coord, self.goal_cell.coord)
+
+    def next_step(self, updates: List[Any], render_steps: int) -> str:
+        """
+        performs the next step in the algorithm and updates the cells accordingly. The first step runs the abstract
+        search, every following step draws the next cell of the path.
+        :param updates: a list of rectangles that represent limits of the background that need to be updated at the
+        next draw
+        :param render_steps: the number of steps to process before returning. This is used to speed up the the animation
+        by not rendering every generation step
+        :return: a status message
+        """
+        if self.result is None:
+            self.result = self.hierarchy.solve(self.start_cell.coord, self.goal_cell.coord)
+            render_steps -= 1
+        if not self.result.path:
+            self.done = True
+            return 'No path found'
+        msg = ''
+        for i in range(render_steps):
+            if self.drawn == len(self.result.path):
+                self.done = True
+                return f'goal reached at {self.goal_cell.coord}. Total distance: {self.result.cost}'
+            row, col = self.result.path[self.drawn]
+            self.drawn += 1
+            cell = self.cell_grid[row][col]
+            if cell.state != START and cell.state != GOAL:
+                cell.state = PATH
+                updates.append(cell.draw_cell())
+            self.visited += 1
+            # we want the reverse printed
+            msg = f'current = {cell.coord[-1::-1]}'
+        return msg
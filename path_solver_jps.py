@@ -0,0 +1,304 @@
+from typing import List, Any, Tuple, Optional
+
+from grid_cell import GridCell, WALL, START, GOAL, PATH, VISITED, OPEN_SET
+from path_solver_astar import PathSolverAStar, PathResult
+from priority_queue import IndexedHeap
+from search_state import SearchState
+
+
+def sign(value: int) -> int:
+    """
+    :param value: an integer
+    :return: -1, 0 or 1 depending on the sign of the value
+    """
+    return (value > 0) - (value < 0)
+
+
+class PathSolverJPS(PathSolverAStar):
+    """
+    Finds the shortest path between the start and end point with Jump Point Search. JPS is A* on a uniform-cost
+    grid that only puts jump points in the open set: cells where the optimal path may have to change direction because
+    of a neighbouring wall. Long stretches of open cells are skipped over by scanning in a straight line, so far fewer
+    cells pass through the open set than with plain A*.
+    Only grids without cell walls are supported. 'manhattan' movement gives the 4-connected variant and 'euclidean'
+    movement the 8-connected variant (diagonal steps cost the same as straight steps and may cut corners, exactly as
+    PathSolverAStar.euclidean_neighbours allows).
+    """
+
+    def __init__(self, cell_grid: List[List[GridCell]], start_cell: GridCell, goal_cell: GridCell,
+                 heuristic: str = 'euclidean', movement: str = 'manhattan', heuristic_weight: float = 1,
+                 adjacency=None):
+        """
+        Creates a new jump point search solver and initialises the start and end point
+        :param cell_grid: The cell grid
+        :param start_cell: The starting cell
+        :param goal_cell:  The goal cell
+        :param heuristic:  The heuristic distance measure to use. One of {'euclidean', 'manhattan'}
+        :param movement: The way the agent is allowed to move. One of {'euclidean', 'manhattan'}
+        :param heuristic_weight: The weight factor to multiply the heuristic by.
+        Larger values make the algorithm more greedy. Values >1 will not guarantee the shortest path.
+        :param adjacency: Not used, JPS reads the cell types directly. Accepted so all solvers share a signature.
+        """
+        if movement not in ('euclidean', 'manhattan'):
+            print(f'Invalid choice for movement. Jump point search needs euclidean or manhattan not {movement}')
+            exit(0)
+        super().__init__(cell_grid, start_cell, goal_cell, heuristic=heuristic, movement=movement,
+                         heuristic_weight=heuristic_weight)
+        self.rows = len(cell_grid)
+        self.cols = len(cell_grid[0])
+        self.diagonal = movement == 'euclidean'
+
+    def walkable(self, row: int, col: int) -> bool:
+        """
+        :param row: the row of the cell
+        :param col: the column of the cell
+        :return: True if the coordinate is inside the grid and the cell is not a wall
+        """
+        return 0 <= row < self.rows and 0 <= col < self.cols and self.cell_grid[row][col].state != WALL
+
+    def distance(self, c_1: Tuple[int, int], c_2: Tuple[int, int]) -> int:
+        """
+        The cost of moving between two cells on the same straight or diagonal line
+        :param c_1: the first coordinate
+        :param c_2: the second coordinate
+        :return: the number of steps between the cells
+        """
+        if self.diagonal:
+            return max(abs(c_1[0] - c_2[0]), abs(c_1[1] - c_2[1]))
+        return abs(c_1[0] - c_2[0]) + abs(c_1[1] - c_2[1])
+
+    def pruned_directions(self, coord: Tuple[int, int], parent: Optional[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """
+        Returns the directions worth searching from a cell given the direction it was reached from. These are the
+        natural neighbours in the direction of travel plus any forced neighbours next to walls.
+        :param coord: the coordinate of the cell
+        :param parent: the coordinate of the jump point the cell was reached from (None for the start cell)
+        :return: a list of (row, column) directions
+        """
+        row, col = coord
+        walkable = self.walkable
+        if parent is None:
+            if self.diagonal:
+                steps = [(d_row, d_col) for d_row in (-1, 0, 1) for d_col in (-1, 0, 1) if d_row or d_col]
+            else:
+                steps = [(-1, 0), (0, -1), (0, 1), (1, 0)]
+            return [(d_row, d_col) for d_row, d_col in steps if walkable(row + d_row, col + d_col)]
+
+        d_row = sign(row - parent[0])
+        d_col = sign(col - parent[1])
+        directions = []
+        if not self.diagonal:
+            if d_col != 0:
+                candidates = ((-1, 0), (1, 0), (0, d_col))
+            else:
+                candidates = ((0, -1), (0, 1), (d_row, 0))
+            return [(r, c) for r, c in candidates if walkable(row + r, col + c)]
+
+        if d_row != 0 and d_col != 0:
+            if walkable(row + d_row, col):
+                directions.append((d_row, 0))
+            if walkable(row, col + d_col):
+                directions.append((0, d_col))
+            if walkable(row + d_row, col + d_col):
+                directions.append((d_row, d_col))
+            if not walkable(row, col - d_col) and walkable(row + d_row, col - d_col):
+                directions.append((d_row, -d_col))
+            if not walkable(row - d_row, col) and walkable(row - d_row, col + d_col):
+                directions.append((-d_row, d_col))
+        elif d_row != 0:
+            if walkable(row + d_row, col):
+                directions.append((d_row, 0))
+            if not walkable(row, col + 1) and walkable(row + d_row, col + 1):
+                directions.append((d_row, 1))
+            if not walkable(row, col - 1) and walkable(row + d_row, col - 1):
+                directions.append((d_row, -1))
+        else:
+            if walkable(row, col + d_col):
+                directions.append((0, d_col))
+            if not walkable(row + 1, col) and walkable(row + 1, col + d_col):
+                directions.append((1, d_col))
+            if not walkable(row - 1, col) and walkable(row - 1, col + d_col):
+                directions.append((-1, d_col))
+        return directions
+
+    def jump(self, row: int, col: int, d_row: int, d_col: int) -> Optional[Tuple[int, int]]:
+        """
+        Scans from a cell in a fixed direction until a jump point is found
+        :param row: the row of the first cell to scan
+        :param col: the column of the first cell to scan
+        :param d_row: the row direction of the scan
+        :param d_col: the column direction of the scan
+        :return: the coordinate of the jump point or None if the scan ran into a wall or the edge of the grid
+        """
+        walkable = self.walkable
+        goal = self.goal_cell.coord
+        while True:
+            if not walkable(row, col):
+                return None
+            if (row, col) == goal:
+                return row, col
+            if self.diagonal:
+                if d_row != 0 and d_col != 0:
+                    if (walkable(row + d_row, col - d_col) and not walkable(row, col - d_col)) or \
+                            (walkable(row - d_row, col + d_col) and not walkable(row - d_row, col)):
+                        return row, col
+                    # a diagonal step is a jump point if a straight scan from it finds one
+                    if self.jump(row + d_row, col, d_row, 0) is not None or \
+                            self.jump(row, col + d_col, 0, d_col) is not None:
+                        return row, col
+                elif d_col != 0:
+                    if (walkable(row + 1, col + d_col) and not walkable(row + 1, col)) or \
+                            (walkable(row - 1, col + d_col) and not walkable(row - 1, col)):
+                        return row, col
+                else:
+                    if (walkable(row + d_row, col + 1) and not walkable(row, col + 1)) or \
+                            (walkable(row + d_row, col - 1) and not walkable(row, col - 1)):
+                        return row, col
+            else:
+                if d_col != 0:
+                    if (walkable(row - 1, col) and not walkable(row - 1, col - d_col)) or \
+                            (walkable(row + 1, col) and not walkable(row + 1, col - d_col)):
+                        return row, col
+                else:
+                    if (walkable(row, col - 1) and not walkable(row - d_row, col - 1)) or \
+                            (walkable(row, col + 1) and not walkable(row - d_row, col + 1)):
+                        return row, col
+                    # when moving vertically a horizontal scan may find a jump point
+                    if self.jump(row, col + 1, 0, 1) is not None or self.jump(row, col - 1, 0, -1) is not None:
+                        return row, col
+            row += d_row
+            col += d_col
+
+    def successors(self, cell: GridCell, parent: Optional[GridCell]) -> List[GridCell]:
+        """
+        Returns the jump points that can be reached from a cell
+        :param cell: the jump point being expanded
+        :param parent: the jump point the cell was reached from (None for the start cell)
+        :return: a list of jump point cells
+        """
+        row, col = cell.coord
+        lst = []
+        for d_row, d_col in self.pruned_directions(cell.coord, None if parent is None else parent.coord):
+            point = self.jump(row + d_row, col + d_col, d_row, d_col)
+            if point is not None:
+                lst.append(self.cell_grid[point[0]][point[1]])
+        return lst
+
+    def expand_path(self, jump_points: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """
+        Fills in the cells between consecutive jump points
+        :param jump_points: the jump point coordinates from the start to the goal
+        :return: every cell coordinate on the path from the start to the goal
+        """
+        path = jump_points[:1]
+        for target in jump_points[1:]:
+            row, col = path[-1]
+            d_row = sign(target[0] - row)
+            d_col = sign(target[1] - col)
+            while (row, col) != target:
+                row += d_row
+                col += d_col
+                path.append((row, col))
+        return path
+
+    def solve_with(self, state: SearchState) -> PathResult:
+        """
+        Runs jump point search from the start cell to the goal cell to completion with the scores kept in the given
+        search state, so the cells of the grid are not modified (see PathSolverAStar.solve)
+        :param state: a search state that was just started (see SearchState.begin)
+        :return: a PathResult with the full cell path, its cost and the expansion counts
+        """
+        heuristic = self.heuristic
+        goal = self.goal_cell
+        weight = self.heuristic_weight
+        cell_grid = self.cell_grid
+        start_f_score = heuristic(self.start_cell, goal)
+        state.set(state.index(self.start_cell.coord), 0, start_f_score, -1)
+        open_set = IndexedHeap()
+        open_set.insert(self.start_cell, start_f_score)
+        expanded = 0
+        inserted = 0
+        updated = 0
+        while not open_set.is_empty():
+            current = open_set.pop_min()[0]
+            expanded += 1
+            index = state.index(current.coord)
+            if current == goal:
+                return PathResult(self.expand_path(state.path(index)), state.g[index], expanded, inserted, updated)
+            current_g = state.g[index]
+            parent = state.comes_from(index)
+            parent_cell = None if parent < 0 else cell_grid[parent // state.cols][parent % state.cols]
+            for point in self.successors(current, parent_cell):
+                t_score = current_g + self.distance(current.coord, point.coord)
+                p_index = state.index(point.coord)
+                if t_score < state.g_score(p_index):
+                    f_score = t_score + heuristic(point, goal) * weight
+                    state.set(p_index, t_score, f_score, index)
+                    if point not in open_set:
+                        open_set.insert(point, f_score)
+                        inserted += 1
+                    else:
+                        open_set.decrease_key(point, f_score)
+                        updated += 1
+        return PathResult([], float('inf'), expanded, inserted, updated)
+
+    def next_step(self, updates: List[Any], render_steps: int) -> str:
+        """
+        performs the next step in the algorithm and updates the cells accordingly. Only jump points are shown as
+        visited or open, the cells that are scanned over are left as they are.
+        :param updates: a list of rectangles that represent limits of the background that need to be updated at the
+        next draw
+        :param render_steps: the number of steps to process before returning. This is used to speed up the the animation
+        by not rendering every generation step
+        :return: a status message
+        """
+        updated = 0
+        inserted = 0
+        msg = ''
+        for i in range(render_steps):
+            if self.done or self.openSet.is_empty():
+                self.done = True
+                return 'No path found'
+            current = self.openSet.pop_min()[0]
+            state = self.search_state()
+            index = state.index(current.coord)
+            # we want the reverse printed
+            msg = f'current = {current.coord[-1::-1]}'
+            if current.coord == self.goal_cell.coord:
+                current.state = GOAL
+                updates.append(current.draw_cell())
+                msg = f'goal reached at {self.goal_cell.coord}. Total distance: {state.g_score(index)}'
+                # trace the jump points and fill in the cells between them
+                for row, col in self.expand_path(state.path(index)):
+                    cell = self.cell_grid[row][col]
+                    if cell.state != START and cell.state != GOAL:
+                        cell.state = PATH
+                        updates.append(cell.draw_cell())
+                self.done = True
+                return msg
+
+            if current.state != START:
+                current.state = VISITED
+                updates.append(current.draw_cell())
+                self.visited += 1
+            updated = 0
+            inserted = 0
+            current_g = state.g_score(index)
+            parent = state.comes_from(index)
+            parent_cell = None if parent < 0 else self.cell_grid[parent // state.cols][parent % state.cols]
+            for point in self.successors(current, parent_cell):
+                t_score = current_g + self.distance(current.coord, point.coord)
+                p_index = state.index(point.coord)
+                if t_score < state.g_score(p_index):
+                    f_score = t_score + self.heuristic(point, self.goal_cell) * self.heuristic_weight
+                    state.set(p_index, t_score, f_score, index)
+                    if point not in self.openSet:
+                        self.openSet.insert(point, f_score)
+                        if point.state != GOAL:
+                            point.state = OPEN_SET
+                            updates.append(point.draw_cell())
+                        inserted += 1
+                    else:
+                        self.openSet.decrease_key(point, f_score)
+                        updated += 1
+        return msg + f' -- ({updated} updated: {inserted} inserted)'
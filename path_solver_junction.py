@@ -0,0 +1,180 @@
+from typing import List, Any, Tuple
+
+from grid_cell import GridCell, EMPTY, START, GOAL, PATH, VISITED, OPEN_SET
+from grid_adjacency import GridAdjacency
+from path_solver_astar import PathSolverAStar, PathResult
+from priority_queue import IndexedHeap
+from junction_graph import JunctionGraph
+
+
+class PathSolverJunction(PathSolverAStar):
+    """
+    Finds the shortest path between the start and end point with A* on the junction graph of the maze (see
+    JunctionGraph). Corridors are crossed in a single step, so only junctions and dead ends are expanded. A start or
+    goal cell inside a corridor is linked to the nodes at both ends of its corridor. The path is expanded back into
+    cells once the goal is reached. Moves are 4-connected, either through the cell walls ('walls' movement) or between
+    cells that are not walls ('manhattan' movement).
+    """
+
+    def __init__(self, cell_grid: List[List[GridCell]], start_cell: GridCell, goal_cell: GridCell,
+                 heuristic: str = 'euclidean', movement: str = 'walls', heuristic_weight: float = 1,
+                 adjacency: GridAdjacency = None, junction_graph: JunctionGraph = None):
+        """
+        Creates a new junction graph solver and initialises the start and end point
+        :param cell_grid: The cell grid
+        :param start_cell: The starting cell
+        :param goal_cell:  The goal cell
+        :param heuristic:  The heuristic distance measure to use. One of {'euclidean', 'manhattan'}
+        :param movement: The way the agent is allowed to move. One of {'walls', 'manhattan'}
+        :param heuristic_weight: The weight factor to multiply the heuristic by.
+        Larger values make the algorithm more greedy. Values >1 will not guarantee the shortest path.
+        :param adjacency: A prebuilt adjacency table of the maze (see GridMap.get_adjacency). If it is not provided
+        the table is built from the cell grid.
+        :param junction_graph: The contracted maze (see GridMap.get_junction_graph). If it is not provided it is built
+        from the adjacency table.
+        """
+        if movement not in ('walls', 'manhattan'):
+            print(f'Invalid choice for movement. The junction graph needs walls or manhattan not {movement}')
+            exit(0)
+        super().__init__(cell_grid, start_cell, goal_cell, heuristic=heuristic, movement=movement,
+                         heuristic_weight=heuristic_weight, adjacency=adjacency)
+        if self.adjacency is None:
+            self.adjacency = GridAdjacency.from_cell_grid(cell_grid)
+        self.graph = junction_graph if junction_graph is not None else JunctionGraph(self.adjacency)
+        self.cols = len(cell_grid[0])
+        graph = self.graph
+        self.source = start_cell.coord[0] * self.cols + start_cell.coord[1]
+        self.target = goal_cell.coord[0] * self.cols + goal_cell.coord[1]
+        # the start and goal cells are linked to the nodes at the ends of their corridors
+        self.start_links = []
+        self.goal_links = {}
+        if self.source in graph.corridor_cells:
+            corridor = graph.corridor_cells[self.source][0]
+            self.start_links = [(node, distance, corridor) for node, distance in graph.links(self.source)]
+            if self.target in graph.corridor_cells and graph.corridor_cells[self.target][0] == corridor:
+                self.start_links.append((self.target, abs(graph.position(self.source, corridor) -
+                                                          graph.position(self.target, corridor)), corridor))
+        if self.target in graph.corridor_cells:
+            corridor = graph.corridor_cells[self.target][0]
+            for node, distance in graph.links(self.target):
+                if node not in self.goal_links or distance < self.goal_links[node][0]:
+                    self.goal_links[node] = (distance, corridor)
+        self.g = {self.source: 0}
+        # node -> (previous node, corridor the step follows)
+        self.came_from = {}
+        self.openSet = IndexedHeap()
+        self.openSet.insert(self.source, self.node_heuristic(self.source))
+        self.expanded = 0
+        self.inserted = 0
+        self.updated = 0
+
+    def node_cell(self, index: int) -> GridCell:
+        """
+        :param index: the flat index of a cell
+        :return: the cell
+        """
+        return self.cell_grid[index // self.cols][index % self.cols]
+
+    def node_heuristic(self, index: int) -> float:
+        """
+        :param index: the flat index of a cell
+        :return: the weighted heuristic distance from the cell to the goal cell
+        """
+        return self.heuristic(self.node_cell(index), self.goal_cell) * self.heuristic_weight
+
+    def expand(self, updates: List[Any] = None) -> int:
+        """
+        Expands the node with the lowest f_score
+        :param updates: a list of rectangles that need to be redrawn. If None nothing is drawn.
+        :return: the flat index of the expanded node
+        """
+        current = self.openSet.pop_min()[0]
+        if current == self.target:
+            return current
+        self.expanded += 1
+        current_g = self.g[current]
+        if updates is not None:
+            cell = self.node_cell(current)
+            cell.g_score = current_g
+            cell.f_score = current_g + self.node_heuristic(current)
+            if cell.state != START:
+                cell.state = VISITED
+                updates.append(cell.draw_cell())
+            self.visited += 1
+        edges = self.graph.edges.get(current, [])
+        if current == self.source:
+            edges = edges + self.start_links
+        if current in self.goal_links:
+            edges = edges + [(self.target, self.goal_links[current][0], self.goal_links[current][1])]
+        for other, length, corridor in edges:
+            t_score = current_g + length
+            if t_score < self.g.get(other, float('inf')):
+                self.came_from[other] = (current, corridor)
+                self.g[other] = t_score
+                if other in self.openSet:
+                    self.updated += 1
+                else:
+                    self.inserted += 1
+                    if updates is not None:
+                        cell = self.node_cell(other)
+                        if cell.state in (EMPTY, VISITED):
+                            cell.state = OPEN_SET
+                            updates.append(cell.draw_cell())
+                self.openSet.insert(other, t_score + self.node_heuristic(other))
+        return current
+
+    def trace_path(self) -> List[Tuple[int, int]]:
+        """
+        Follows the nodes back from the goal cell and expands every step into the cells of its corridor
+        :return: the cells from the start cell to the goal cell
+        """
+        steps = []
+        index = self.target
+        while index in self.came_from:
+            previous, corridor = self.came_from[index]
+            steps.append((previous, index, corridor))
+            index = previous
+        path = [self.source]
+        for previous, index, corridor in reversed(steps):
+            path.extend(self.graph.path_between(previous, index, corridor)[1:])
+        return [divmod(index, self.cols) for index in path]
+
+    def solve(self) -> PathResult:
+        """
+        Runs the search to completion without drawing anything
+        :return: a PathResult with the path, its cost and the node expansion counts
+        """
+        while not self.openSet.is_empty():
+            if self.expand() == self.target:
+                self.done = True
+                return PathResult(self.trace_path(), self.g[self.target], self.expanded, self.inserted, self.updated)
+        self.done = True
+        return PathResult([], float('inf'), self.expanded, self.inserted, self.updated)
+
+    def next_step(self, updates: List[Any], render_steps: int) -> str:
+        """
+        performs the next step in the algorithm and updates the cells accordingly. Only junctions and dead ends are
+        shown as visited or open, the corridor cells between them are left as they are.
+        :param updates: a list of rectangles that represent limits of the background that need to be updated at the
+        next draw
+        :param render_steps: the number of steps to process before returning. This is used to speed up the the animation
+        by not rendering every generation step
+        :return: a status message
+        """
+        msg = ''
+        for i in range(render_steps):
+            if self.openSet.is_empty():
+                self.done = True
+                return 'No path found'
+            current = self.expand(updates)
+            if current == self.target:
+                for row, col in self.trace_path():
+                    cell = self.cell_grid[row][col]
+                    if cell.state != START and cell.state != GOAL:
+                        cell.state = PATH
+                        updates.append(cell.draw_cell())
+                self.done = True
+                return f'goal reached at {self.goal_cell.coord}. Total distance: {self.g[self.target]}'
+            # we want the reverse printed
+            msg = f'current = {divmod(current, self.cols)[-1::-1]}'
+        return msg
@@ -0,0 +1,209 @@
+from typing import List, Any, Tuple
+import math
+
+from grid_cell import GridCell, EMPTY, WALL, START, GOAL, PATH, VISITED, OPEN_SET
+from grid_adjacency import GridAdjacency
+from path_solver_astar import PathSolverAStar, PathResult
+from priority_queue import IndexedHeap
+
+
+class PathSolverLPAStar(PathSolverAStar):
+    """
+    Finds the shortest path between the start and end point with Lifelong Planning A* (LPA*). LPA* keeps its search
+    state between runs: when walls are drawn or erased only the cells whose distance from the start is affected are
+    repaired, so replanning after a small edit costs a fraction of a full search.
+    Every cell has a g_score (the distance found so far) and an rhs value (the distance predicted from its neighbours).
+    Cells where the two differ are inconsistent and wait in the open set until they are repaired.
+    The weighted heuristic has to be consistent (never more than the cost of a step plus the heuristic of the next
+    cell) or the repaired g_scores can not be traced back to the start, so larger heuristic weights are lowered.
+    see Koenig, Likhachev and Furcy, "Lifelong Planning A*", Artificial Intelligence 155 (2004)
+    """
+
+    def __init__(self, cell_grid: List[List[GridCell]], start_cell: GridCell, goal_cell: GridCell,
+                 heuristic: str = 'euclidean', movement: str = 'manhattan', heuristic_weight: float = 1,
+                 adjacency: GridAdjacency = None):
+        """
+        Creates a new incremental path solver and initialises the start and end point
+        :param cell_grid: The cell grid
+        :param start_cell: The starting cell
+        :param goal_cell:  The goal cell
+        :param heuristic:  The heuristic distance measure to use. One of {'euclidean', 'manhattan'}
+        :param movement: The way the agent is allowed to move. One of {'euclidean', 'manhattan', 'walls'}
+        :param heuristic_weight: The weight factor to multiply the heuristic by. It is capped at the largest weight
+        that keeps the heuristic consistent (1 for 'manhattan' and 'walls' movement).
+        :param adjacency: A prebuilt adjacency table of the maze (see GridMap.get_adjacency). Only used with 'walls'
+        movement. If it is not provided the table is built from the cell grid.
+        """
+        if movement == 'euclidean':
+            # diagonal steps cost the same as straight ones
+            max_weight = 0.5 if heuristic == 'manhattan' else 1 / math.sqrt(2)
+        else:
+            max_weight = 1
+        if heuristic_weight > max_weight:
+            print(f'LPA* needs a consistent heuristic. Using a heuristic weight of {max_weight:.2f} '
+                  f'instead of {heuristic_weight}.')
+            heuristic_weight = max_weight
+        super().__init__(cell_grid, start_cell, goal_cell, heuristic=heuristic, movement=movement,
+                         heuristic_weight=heuristic_weight, adjacency=adjacency)
+        self.diagonal = movement == 'euclidean'
+        self.g = {}
+        self.rhs = {start_cell: 0}
+        self.openSet = IndexedHeap()
+        self.openSet.insert(start_cell, self.key(start_cell))
+        self.expanded = 0
+
+    def key(self, cell: GridCell) -> Tuple[float, float]:
+        """
+        Calculates the priority of a cell in the open set
+        :param cell: the cell
+        :return: tuple of (min(g, rhs) + weighted heuristic, min(g, rhs))
+        """
+        k = min(self.g.get(cell, float('inf')), self.rhs.get(cell, float('inf')))
+        return k + self.heuristic(cell, self.goal_cell) * self.heuristic_weight, k
+
+    def update_vertex(self, cell: GridCell, updates: List[Any] = None):
+        """
+        Recalculates the rhs value of a cell from its neighbours and puts it in the open set if it is inconsistent
+        :param cell: the cell to update
+        :param updates: a list of rectangles that need to be redrawn. If None nothing is drawn.
+        :return: None
+        """
+        if cell.coord != self.start_cell.coord:
+            if cell.state == WALL:
+                # a wall cannot be entered
+                rhs = float('inf')
+            else:
+                rhs = min((self.g.get(n, float('inf')) for n in self.neighbours(cell)), default=float('inf'))
+                rhs += cell.cost
+            self.rhs[cell] = rhs
+        if cell in self.openSet:
+            self.openSet.remove(cell)
+        if self.g.get(cell, float('inf')) != self.rhs.get(cell, float('inf')):
+            self.openSet.insert(cell, self.key(cell))
+            if updates is not None and cell.state in (EMPTY, VISITED, PATH):
+                cell.state = OPEN_SET
+                updates.append(cell.draw_cell())
+
+    def grid_neighbours(self, cell: GridCell) -> List[GridCell]:
+        """
+        Returns the cells next to a cell whether or not they are walls. These are the cells whose rhs value can change
+        when the cell is turned into a wall or cleared.
+        :param cell: the cell
+        :return: a list of the adjacent cells
+        """
+        row_lim = (max(cell.coord[0] - 1, 0), min(cell.coord[0] + 2, len(self.cell_grid)))
+        col_lim = (max(cell.coord[1] - 1, 0), min(cell.coord[1] + 2, len(self.cell_grid[0])))
+        lst = []
+        for r in range(row_lim[0], row_lim[1]):
+            for c in range(col_lim[0], col_lim[1]):
+                if (r, c) != cell.coord and (self.diagonal or r == cell.coord[0] or c == cell.coord[1]):
+                    lst.append(self.cell_grid[r][c])
+        return lst
+
+    def update_cell(self, cell: GridCell):
+        """
+        Tells the solver that a cell was turned into a wall or cleared (or that its walls changed). The cell and its
+        neighbours are queued for repair and the next call to next_step or solve replans from the current state.
+        :param cell: the cell that changed
+        :return: None
+        """
+        self.update_vertex(cell)
+        for neighbour in self.grid_neighbours(cell):
+            self.update_vertex(neighbour)
+        self.done = False
+        self.visited = 0
+
+    def finished(self) -> bool:
+        """
+        :return: True if the g_score of the goal cell is the shortest distance and no cell in the open set can improve
+        on it
+        """
+        goal_g = self.g.get(self.goal_cell, float('inf'))
+        if self.openSet.is_empty():
+            return True
+        return self.openSet.peek_min()[1] >= self.key(self.goal_cell) and \
+            self.rhs.get(self.goal_cell, float('inf')) == goal_g
+
+    def expand(self, updates: List[Any] = None) -> GridCell:
+        """
+        Repairs the inconsistent cell with the smallest key
+        :param updates: a list of rectangles that need to be redrawn. If None nothing is drawn.
+        :return: the cell that was repaired
+        """
+        current = self.openSet.pop_min()[0]
+        self.expanded += 1
+        if self.g.get(current, float('inf')) > self.rhs.get(current, float('inf')):
+            # over-consistent: a shorter path to the cell was found
+            self.g[current] = self.rhs[current]
+            if updates is not None:
+                current.g_score = self.g[current]
+                current.f_score = self.key(current)[0]
+                if current.state in (EMPTY, OPEN_SET, PATH):
+                    current.state = VISITED
+                    updates.append(current.draw_cell())
+                self.visited += 1
+            for neighbour in self.neighbours(current):
+                self.update_vertex(neighbour, updates)
+        else:
+            # under-consistent: the path to the cell got longer (e.g. a wall was drawn on it)
+            self.g[current] = float('inf')
+            if updates is not None:
+                current.g_score = float('inf')
+                self.visited += 1
+            self.update_vertex(current, updates)
+            for neighbour in self.neighbours(current):
+                self.update_vertex(neighbour, updates)
+        return current
+
+    def trace_path(self) -> List[GridCell]:
+        """
+        Follows the g_scores back from the goal cell to the start cell
+        :return: the cells from the start cell to the goal cell (empty if the goal cannot be reached)
+        """
+        if self.g.get(self.goal_cell, float('inf')) == float('inf'):
+            return []
+        path = [self.goal_cell]
+        while path[-1].coord != self.start_cell.coord:
+            path.append(min(self.neighbours(path[-1]), key=lambda n: self.g.get(n, float('inf'))))
+        path.reverse()
+        return path
+
+    def solve(self) -> PathResult:
+        """
+        Brings the search up to date without drawing anything. Unlike the other solvers this continues from the
+        current search state, so after update_cell only the affected cells are repaired.
+        :return: a PathResult with the path, its cost and the number of cells repaired by this call
+        """
+        expanded = self.expanded
+        while not self.finished():
+            self.expand()
+        self.done = True
+        path = self.trace_path()
+        cost = self.g.get(self.goal_cell, float('inf'))
+        return PathResult([cell.coord for cell in path], cost, self.expanded - expanded, 0, 0)
+
+    def next_step(self, updates: List[Any], render_steps: int) -> str:
+        """
+        performs the next step in the algorithm and updates the cells accordingly
+        :param updates: a list of rectangles that represent limits of the background that need to be updated at the
+        next draw
+        :param render_steps: the number of steps to process before returning. This is used to speed up the the animation
+        by not rendering every generation step
+        :return: a status message
+        """
+        msg = ''
+        for i in range(render_steps):
+            if self.finished():
+                self.done = True
+                path = self.trace_path()
+                if not path:
+                    return 'No path found'
+                for cell in path:
+                    if cell.state != START and cell.state != GOAL:
+                        cell.state = PATH
+                        updates.append(cell.draw_cell())
+                return f'goal reached at {self.goal_cell.coord}. Total distance: {self.g[self.goal_cell]}'
+            current = self.expand(updates)
+            # we want the reverse printed
+            msg = f'current = {current.coord[-1::-1]} -- ({self.openSet.size()} inconsistent)'
+        return msg
@@ -0,0 +1,90 @@
+from typing import List, Any
+
+from grid_cell import GridCell, START, GOAL, PATH
+from grid_adjacency import GridAdjacency
+from path_solver_astar import PathSolverAStar, PathResult
+from maze_tree import MazeTree
+
+
+class PathSolverTree(PathSolverAStar):
+    """
+    Finds the path between the start and end point of a perfect maze without searching. The maze has exactly one path
+    between any two cells, so the path is read off the rooted maze tree (see MazeTree) by walking up from the start
+    and goal cells until they meet at their lowest common ancestor. Every cell that is stepped on is part of the path.
+    """
+
+    def __init__(self, cell_grid: List[List[GridCell]], start_cell: GridCell, goal_cell: GridCell,
+                 heuristic: str = 'euclidean', movement: str = 'walls', heuristic_weight: float = 1,
+                 adjacency: GridAdjacency = None, maze_tree: MazeTree = None):
+        """
+        Creates a new maze tree solver and initialises the start and end point
+        :param cell_grid: The cell grid
+        :param start_cell: The starting cell
+        :param goal_cell:  The goal cell
+        :param heuristic:  Only used for the hover text. One of {'euclidean', 'manhattan'}
+        :param movement: The way the agent is allowed to move. Must be 'walls'
+        :param heuristic_weight: Not used, there is no search
+        :param adjacency: A prebuilt adjacency table of the maze (see GridMap.get_adjacency). If it is not provided
+        the table is built from the cell grid.
+        :param maze_tree: The rooted tree of the maze (see GridMap.get_maze_tree). If it is not provided the tree is
+        built from the adjacency table.
+        """
+        if movement != 'walls':
+            print(f'Invalid choice for movement. The maze tree solver needs walls not {movement}')
+            exit(0)
+        super().__init__(cell_grid, start_cell, goal_cell, heuristic=heuristic, movement=movement,
+                         heuristic_weight=heuristic_weight, adjacency=adjacency)
+        self.tree = maze_tree if maze_tree is not None else MazeTree(self.adjacency)
+        if not self.tree.perfect:
+            print('The maze has loops. The maze tree solver may not find the shortest path.')
+        self.cols = len(cell_grid[0])
+        self.distance = self.tree.distance(start_cell.coord, goal_cell.coord)
+        # the two ends of the walk, as flat indices into the maze tree
+        self.walkers = [start_cell.coord[0] * self.cols + start_cell.coord[1],
+                        goal_cell.coord[0] * self.cols + goal_cell.coord[1]]
+
+    def open_set_size(self) -> int:
+        """
+        :return: the number of cells still being walked from (there is no open set)
+        """
+        return 0 if self.done else 2
+
+    def solve(self) -> PathResult:
+        """
+        Finds the path without drawing anything
+        :return: a PathResult with the path and its cost. No cells are expanded so the counts are 0
+        """
+        path = self.tree.path(self.start_cell.coord, self.goal_cell.coord)
+        self.done = True
+        return PathResult(path, self.distance, 0, 0, 0)
+
+    def next_step(self, updates: List[Any], render_steps: int) -> str:
+        """
+        performs the next step in the algorithm and updates the cells accordingly. Each step moves the deeper of the
+        two walkers one cell up the maze tree.
+        :param updates: a list of rectangles that represent limits of the background that need to be updated at the
+        next draw
+        :param render_steps: the number of steps to process before returning. This is used to speed up the the animation
+        by not rendering every generation step
+        :return: a status message
+        """
+        if self.distance == float('inf'):
+            self.done = True
+            return 'No path found'
+        depth = self.tree.depth
+        msg = ''
+        for i in range(render_steps):
+            a, b = self.walkers
+            if a == b:
+                self.done = True
+                return f'goal reached at {self.goal_cell.coord}. Total distance: {self.distance}'
+            k = 0 if depth[a] >= depth[b] else 1
+            self.walkers[k] = int(self.tree.parent[self.walkers[k]])
+            cell = self.cell_grid[self.walkers[k] // self.cols][self.walkers[k] % self.cols]
+            if cell.state != START and cell.state != GOAL:
+                cell.state = PATH
+                updates.append(cell.draw_cell())
+            self.visited += 1
+            # we want the reverse printed
+            msg = f'current = {cell.coord[-1::-1]}'
+        return msg
@@ -0,0 +1,178 @@
+from typing import Any, Tuple, Hashable
+
+
+class IndexedHeap:
+    """
+    A binary min-heap with an index from item to its slot in the heap. This gives O(log n) insert, decrease-key and
+    pop-min as well as O(1) membership tests, which is what the A* open set needs.
+    Items with equal priorities are popped in last-in first-out order (an update counts as a new insert). This matches
+    the ordering of the DEPQ that was previously used as the open set so solver results are unchanged.
+    """
+
+    def __init__(self):
+        """
+        Creates a new empty heap
+        """
+        # each entry is [priority, tie_breaker, item]
+        self.heap = []
+        # maps each item to its current position in the heap
+        self.index = {}
+        self.counter = 0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self.index
+
+    def size(self) -> int:
+        """
+        :return: the number of items in the heap
+        """
+        return len(self.heap)
+
+    def is_empty(self) -> bool:
+        """
+        :return: True if there are no items in the heap
+        """
+        return len(self.heap) == 0
+
+    def insert(self, item: Hashable, priority: Any):
+        """
+        Adds a new item to the heap. If the item is already in the heap its priority is updated instead
+        :param item: the item to add (must be hashable)
+        :param priority: the priority of the item. Smaller values are popped first
+        :return: None
+        """
+        if item in self.index:
+            self.update(item, priority)
+            return
+        # count down so that the most recent insert wins a tie
+        self.counter -= 1
+        self.heap.append([priority, self.counter, item])
+        pos = len(self.heap) - 1
+        self.index[item] = pos
+        self._sift_up(pos)
+
+    def update(self, item: Hashable, priority: Any):
+        """
+        Changes the priority of an item already in the heap. Works for both decreasing and increasing the priority
+        :param item: the item to update
+        :param priority: the new priority
+        :return: None
+        """
+        pos = self.index[item]
+        entry = self.heap[pos]
+        old_priority = entry[0]
+        self.counter -= 1
+        entry[0] = priority
+        entry[1] = self.counter
+        if priority <= old_priority:
+            self._sift_up(pos)
+        else:
+            self._sift_down(pos)
+
+    def decrease_key(self, item: Hashable, priority: Any):
+        """
+        Lowers the priority of an item already in the heap
+        :param item: the item to update
+        :param priority: the new priority (must not be larger than the current one)
+        :return: None
+        """
+        pos = self.index[item]
+        entry = self.heap[pos]
+        self.counter -= 1
+        entry[0] = priority
+        entry[1] = self.counter
+        self._sift_up(pos)
+
+    def remove(self, item: Hashable):
+        """
+        Removes an item from the heap
+        :param item: the item to remove (must be in the heap)
+        :return: None
+        """
+        pos = self.index.pop(item)
+        heap = self.heap
+        last = heap.pop()
+        if pos < len(heap):
+            # move the last entry into the gap and restore the heap order from there
+            heap[pos] = last
+            self.index[last[2]] = pos
+            if pos > 0 and last < heap[(pos - 1) >> 1]:
+                self._sift_up(pos)
+            else:
+                self._sift_down(pos)
+
+    def peek_min(self) -> Tuple[Any, Any]:
+        """
+        :return: the (item, priority) with the smallest priority without removing it
+        """
+        entry = self.heap[0]
+        return entry[2], entry[0]
+
+    def pop_min(self) -> Tuple[Any, Any]:
+        """
+        Removes the item with the smallest priority
+        :return: tuple of (item, priority)
+        """
+        heap = self.heap
+        last = heap.pop()
+        if heap:
+            entry = heap[0]
+            heap[0] = last
+            self.index[last[2]] = 0
+            self._sift_down(0)
+        else:
+            entry = last
+        del self.index[entry[2]]
+        return entry[2], entry[0]
+
+    def clear(self):
+        """
+        Removes all items from the heap
+        :return: None
+        """
+        self.heap = []
+        self.index = {}
+
+    def _sift_up(self, pos: int):
+        heap = self.heap
+        index = self.index
+        entry = heap[pos]
+        while pos > 0:
+            parent_pos = (pos - 1) >> 1
+            parent = heap[parent_pos]
+            # entries compare on (priority, tie_breaker) as the tie breakers are unique
+            if entry < parent:
+                heap[pos] = parent
+                index[parent[2]] = pos
+                pos = parent_pos
+            else:
+                break
+        heap[pos] = entry
+        index[entry[2]] = pos
+
+    def _sift_down(self, pos: int):
+        heap = self.heap
+        index = self.index
+        size = len(heap)
+        entry = heap[pos]
+        child_pos = 2 * pos + 1
+        while child_pos < size:
+            right_pos = child_pos + 1
+            child = heap[child_pos]
+            if right_pos < size:
+                right = heap[right_pos]
+                if right < child:
+                    child_pos = right_pos
+                    child = right
+            if child < entry:
+                heap[pos] = child
+                index[child[2]] = pos
+                pos = child_pos
+                child_pos = 2 * pos + 1
+            else:
+                break
+        heap[pos] = entry
+        index[entry[2]] = pos
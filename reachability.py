@@ -0,0 +1,103 @@
+from typing import Tuple
+import numpy as np
+
+from grid_adjacency import GridAdjacency, EAST, SOUTH
+
+
+class ReachabilityIndex:
+    """
+    Labels the connected components of a 4-connected grid so that a query between cells in different components can
+    be rejected in O(1) without searching. The labels are found with a vectorised union-find: every passage hooks the
+    larger of its two labels onto the smaller one and pointer jumping flattens the label chains, until no passage
+    joins two different labels. A cell is labelled with the smallest flat index in its component.
+    When walls change only the components around the changed cell are labelled again, the first time a query needs
+    them (see update_cell).
+    """
+
+    def __init__(self, adjacency: GridAdjacency):
+        """
+        Labels the components of a grid
+        :param adjacency: the adjacency table of the grid (see GridMap.get_adjacency). The table is read directly, so
+        changes to it are seen once update_cell has been called for the changed cell
+        """
+        self.adjacency = adjacency
+        self.cols = adjacency.cols
+        self.labels = np.arange(adjacency.rows * adjacency.cols, dtype=np.int32)
+        # labels of the components that have to be labelled again
+        self.dirty = set()
+        self.label(np.arange(self.labels.size, dtype=np.int32))
+
+    def label(self, cells: np.ndarray):
+        """
+        Labels the components of a set of cells. The set has to be closed: no passage may lead out of it.
+        :param cells: flat indices of the cells
+        :return: None
+        """
+        open_dirs = np.frombuffer(self.adjacency.open_dirs, dtype=np.uint8)
+        labels = self.labels
+        labels[cells] = cells
+        # every passage is listed once, from its west or north cell
+        east = cells[(open_dirs[cells] & EAST) != 0]
+        south = cells[(open_dirs[cells] & SOUTH) != 0]
+        a = np.concatenate((east, south))
+        b = np.concatenate((east + 1, south + self.cols))
+        while a.size > 0:
+            label_a = labels[a]
+            label_b = labels[b]
+            joined = label_a != label_b
+            if not joined.any():
+                break
+            a = a[joined]
+            b = b[joined]
+            label_a = label_a[joined]
+            label_b = label_b[joined]
+            # hook the larger label onto the smaller one
+            np.minimum.at(labels, np.maximum(label_a, label_b), np.minimum(label_a, label_b))
+            # pointer jumping until every cell points at the root of its chain
+            while True:
+                roots = labels[labels[cells]]
+                if np.array_equal(roots, labels[cells]):
+                    break
+                labels[cells] = roots
+
+    def update_cell(self, coord: Tuple[int, int]):
+        """
+        Marks the components around a cell for labelling after its walls changed (the adjacency table must already be
+        updated). Passages may have been opened or closed between the cell and its four neighbours, which can join or
+        split their components.
+        :param coord: the (row, column) of the cell that changed
+        :return: None
+        """
+        rows = self.adjacency.rows
+        for d_row, d_col in ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)):
+            row = coord[0] + d_row
+            col = coord[1] + d_col
+            if 0 <= row < rows and 0 <= col < self.cols:
+                self.dirty.add(int(self.labels[row * self.cols + col]))
+
+    def refresh(self):
+        """
+        Labels the components that were marked by update_cell again
+        :return: None
+        """
+        if self.dirty:
+            cells = np.flatnonzero(np.isin(self.labels, list(self.dirty))).astype(np.int32)
+            self.dirty.clear()
+            self.label(cells)
+
+    def component(self, coord: Tuple[int, int]) -> int:
+        """
+        :param coord: the (row, column) of a cell
+        :return: the label of the component of the cell
+        """
+        self.refresh()
+        return int(self.labels[coord[0] * self.cols + coord[1]])
+
+    def connected(self, start: Tuple[int, int], goal: Tuple[int, int]) -> bool:
+        """
+        :param start: the (row, column) of the first cell
+        :param goal: the (row, column) of the second cell
+        :return: True if there is a path between the cells
+        """
+        self.refresh()
+        return self.labels[start[0] * self.cols + start[1]] == self.labels[goal[0] * self.cols + goal[1]]
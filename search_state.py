@@ -0,0 +1,159 @@
+from array import array
+from typing import List, Tuple
+import threading
+
+from grid_cell import GridCell
+
+
+class SearchState:
+    """
+    The g_scores, f_scores and parents of a single search, kept in flat arrays indexed by the cell id
+    (row * columns + column) instead of on the GridCell objects that every solver shares. Every entry is stamped with
+    the generation of the search that wrote it and entries with an older stamp read as unvisited, so starting a new
+    search only increments the generation and nothing has to be cleared between queries.
+    """
+
+    # the stamps are cleared once when the generation counter would overflow
+    MAX_GENERATION = 2 ** 32 - 1
+
+    def __init__(self, rows: int, cols: int):
+        """
+        Creates the tables for a grid of the given size
+        :param rows: the number of rows in the grid
+        :param cols: the number of columns in the grid
+        """
+        self.rows = rows
+        self.cols = cols
+        n = rows * cols
+        self.g = array('d', [float('inf')]) * n
+        self.f = array('d', [float('inf')]) * n
+        # the id of the cell each cell was reached from, -1 for none
+        self.parent = array('q', [-1]) * n
+        self.stamp = array('L', [0]) * n
+        self.generation = 1
+
+    @classmethod
+    def from_cell_grid(cls, cell_grid: List[List[GridCell]]) -> 'SearchState':
+        """
+        Copies the scores stored on the cells into a new search state. Used for solvers that were saved before the
+        search state was kept separately from the cells.
+        :param cell_grid: the cell grid
+        :return: the search state
+        """
+        state = cls(len(cell_grid), len(cell_grid[0]))
+        for row in cell_grid:
+            for cell in row:
+                if cell.g_score != float('inf'):
+                    parent = -1 if cell.comes_from is None else state.index(cell.comes_from.coord)
+                    state.set(state.index(cell.coord), cell.g_score, cell.f_score, parent)
+        return state
+
+    def begin(self):
+        """
+        Starts a new search. Everything written by earlier searches becomes unvisited.
+        :return: None
+        """
+        if self.generation == self.MAX_GENERATION:
+            self.stamp = array('L', [0]) * (self.rows * self.cols)
+            self.generation = 0
+        self.generation += 1
+
+    def index(self, coord: Tuple[int, int]) -> int:
+        """
+        :param coord: the (row, column) of a cell
+        :return: the id of the cell
+        """
+        return coord[0] * self.cols + coord[1]
+
+    def seen(self, index: int) -> bool:
+        """
+        :param index: the id of a cell
+        :return: True if the current search has given the cell a g_score
+        """
+        return self.stamp[index] == self.generation
+
+    def g_score(self, index: int) -> float:
+        """
+        :param index: the id of a cell
+        :return: the g_score of the cell in the current search (inf if it has not been reached)
+        """
+        return self.g[index] if self.stamp[index] == self.generation else float('inf')
+
+    def f_score(self, index: int) -> float:
+        """
+        :param index: the id of a cell
+        :return: the f_score of the cell in the current search (inf if it has not been reached)
+        """
+        return self.f[index] if self.stamp[index] == self.generation else float('inf')
+
+    def comes_from(self, index: int) -> int:
+        """
+        :param index: the id of a cell
+        :return: the id of the cell it was reached from in the current search (-1 for none)
+        """
+        return self.parent[index] if self.stamp[index] == self.generation else -1
+
+    def set(self, index: int, g_score: float, f_score: float, parent: int):
+        """
+        Records a (better) way of reaching a cell in the current search
+        :param index: the id of the cell
+        :param g_score: the distance from the start cell
+        :param f_score: the g_score plus the weighted heuristic
+        :param parent: the id of the cell it is reached from (-1 for none)
+        :return: None
+        """
+        self.stamp[index] = self.generation
+        self.g[index] = g_score
+        self.f[index] = f_score
+        self.parent[index] = parent
+
+    def path(self, index: int) -> List[Tuple[int, int]]:
+        """
+        Follows the parents back from a cell to the start cell
+        :param index: the id of the cell at the end of the path
+        :return: the (row, column) of every cell from the start cell to the given cell
+        """
+        path = [divmod(index, self.cols)]
+        index = self.comes_from(index)
+        while index >= 0:
+            path.append(divmod(index, self.cols))
+            index = self.comes_from(index)
+        path.reverse()
+        return path
+
+
+# every thread keeps its own free search states, so headless solves in different threads never share one. Only the
+# states of the grid size released last are kept, and at most POOL_SIZE of them, so a thread that solved on a large
+# grid once does not hold on to its tables.
+_pool = threading.local()
+POOL_SIZE = 2
+
+
+def acquire_state(rows: int, cols: int) -> SearchState:
+    """
+    Takes a free search state for a grid of the given size from the pool of the calling thread, or creates one if
+    there is none, and starts a new search on it
+    :param rows: the number of rows in the grid
+    :param cols: the number of columns in the grid
+    :return: the search state
+    """
+    free = getattr(_pool, 'free', None)
+    if free and (free[-1].rows, free[-1].cols) == (rows, cols):
+        state = free.pop()
+        state.begin()
+        return state
+    return SearchState(rows, cols)
+
+
+def release_state(state: SearchState):
+    """
+    Returns a search state to the pool of the calling thread once the search is finished. States of another grid size
+    are dropped from the pool.
+    :param state: the search state
+    :return: None
+    """
+    free = getattr(_pool, 'free', None)
+    if free is None or (free and (free[-1].rows, free[-1].cols) != (state.rows, state.cols)):
+        free = _pool.free = []
+    if len(free) < POOL_SIZE:
+        free.append(state)
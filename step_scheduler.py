@@ -0,0 +1,75 @@
+class StepScheduler:
+    """
+    Chooses how many maze generator or solver steps to run per frame so the app keeps its frame rate while running as
+    many steps as possible. It keeps moving averages of the time one step takes and of the time the rest of a frame
+    (drawing the text, the gui and updating the display) takes, and plans the steps of the next frame to fill what is
+    left of the frame time.
+    """
+    # only this fraction of the frame time is planned for, so timing noise does not drop frames
+    HEADROOM = 0.85
+    # the weight of the newest measurement in the moving averages
+    SMOOTHING = 0.25
+    # the steps per frame can at most double from one frame to the next
+    MAX_GROWTH = 2.0
+    # the steps per second shown on screen are measured over this many seconds
+    RATE_WINDOW = 0.5
+
+    def __init__(self, fps: int, max_steps: int = 100000):
+        """
+        :param fps: the target frame rate in frames per second
+        :param max_steps: the most steps that are run in one frame
+        """
+        self.fps = fps
+        self.max_steps = max_steps
+        self.steps = 1
+        # moving averages in seconds, None until the first measurement
+        self.step_time = None
+        self.overhead = None
+        # the measured steps per second
+        self.rate = 0.0
+        self.window_steps = 0
+        self.window_time = 0.0
+
+    def reset(self):
+        """
+        Forgets the step time when a different generator or solver starts, as its steps can take much longer
+        :return: None
+        """
+        self.steps = 1
+        self.step_time = None
+
+    def record(self, steps: int, step_time: float, busy_time: float):
+        """
+        Records the timing of a frame that ran steps and plans the steps of the next frame
+        :param steps: the number of steps that were run
+        :param step_time: the seconds spent running the steps
+        :param busy_time: the seconds the whole frame took, without the time spent waiting for the next frame
+        :return: None
+        """
+        per_step = max(step_time, 1e-7) / max(steps, 1)
+        overhead = max(busy_time - step_time, 0.0)
+        if self.step_time is None:
+            self.step_time = per_step
+        else:
+            self.step_time += self.SMOOTHING * (per_step - self.step_time)
+        if self.overhead is None:
+            self.overhead = overhead
+        else:
+            self.overhead += self.SMOOTHING * (overhead - self.overhead)
+        budget = self.HEADROOM / self.fps - self.overhead
+        planned = int(budget / self.step_time)
+        self.steps = max(1, min(planned, int(self.steps * self.MAX_GROWTH) + 1, self.max_steps))
+
+    def tick(self, steps: int, frame_time: float):
+        """
+        Updates the measured steps per second at the end of a frame
+        :param steps: the number of steps that were run in the frame
+        :param frame_time: the seconds since the previous frame
+        :return: None
+        """
+        self.window_steps += steps
+        self.window_time += frame_time
+        if self.window_time >= self.RATE_WINDOW:
+            self.rate = self.window_steps / self.window_time
+            self.window_steps = 0
+            self.window_time = 0.0
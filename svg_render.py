@@ -1,7 +1,7 @@
 from typing import List
 import drawSvg as SDraw
 from drawSvg import DrawingBasicElement, NoElement
-from grid_cell import GridCell, WalledCell, Walls
+from grid_cell import GridCell, WalledCell, Walls, EMPTY, WALL, START, GOAL, VISITED, OPEN_SET
 import os
 
 # https://coolors.co/a90f33-f78c6b-ffd166-83d483-037758-118ab2-073b4c
@@ -31,28 +31,27 @@ def render_cell(drawing: SDraw.Drawing, cell: GridCell, x_pos: int, y_pos: int):
     """
     def_width = 10
     def_off = 0
-    if isinstance(cell, WalledCell):
-        if cell.cell_type == 'path':
-            r = SDraw.Rectangle(x_pos + def_off, y_pos + def_off, def_width, def_width,
-                                fill=colorstr(GridCell.PATH_COLOUR))
-            drawing.append(r)
-        elif cell.cell_type == 'visited' and RENDER_VISITED:
-            r = SDraw.Rectangle(x_pos + 3, y_pos + 2, 5, 5, fill=colorstr(GridCell.VISITED_COLOUR))
-            drawing.append(r)
-        elif cell.cell_type == 'open_set' and RENDER_VISITED:
-            r = SDraw.Rectangle(x_pos + 3, y_pos + 2, 5, 5, fill=colorstr(GridCell.OPEN_SET_COLOUR))
-            drawing.append(r)
-        elif cell.cell_type == 'start' and RENDER_SOLUTION:
-            r = SDraw.Rectangle(x_pos + def_off, y_pos + def_off, def_width, def_width,
-                                fill=colorstr(GridCell.START_COLOUR))
-            drawing.append(r)
-        elif cell.cell_type == 'goal' and RENDER_SOLUTION:
-            r = SDraw.Rectangle(x_pos + def_off, y_pos + def_off, def_width, def_width,
-                                fill=colorstr(GridCell.GOAL_COLOUR))
-            drawing.append(r)
-        elif cell.cell_type == 'empty':
-            pass
+    code = cell.state
+    # the fill of the cell type comes from the same lookup table the cells are drawn with
+    fill = cell.FILLS[code]
+    if code == EMPTY:
+        fill = None
+    elif (code == START or code == GOAL) and not RENDER_SOLUTION:
+        fill = None
+    elif (code == VISITED or code == OPEN_SET) and not RENDER_VISITED:
+        fill = None
+    if fill is not None:
+        colour, inner = fill
+        if inner:
+            r = SDraw.Rectangle(x_pos + 3, y_pos + 2, 5, 5, fill=colorstr(colour))
+        elif code == WALL:
+            r = SDraw.Rectangle(x_pos + def_off, y_pos + def_off, def_width, def_width, stroke_width=0.5,
+                                fill=colorstr(colour))
+        else:
+            r = SDraw.Rectangle(x_pos + def_off, y_pos + def_off, def_width, def_width, fill=colorstr(colour))
+        drawing.append(r)
 
+    if isinstance(cell, WalledCell):
         # draw the walls
         if Walls.NORTH in cell.walls:
             r = SDraw.Line(x_pos, y_pos + 10, x_pos + 10, y_pos + 10,
@@ -71,30 +70,6 @@ def render_cell(drawing: SDraw.Drawing, cell: GridCell, x_pos: int, y_pos: int):
                            stroke='black', stroke_width=1, fill='none', stroke_linecap="square")
             drawing.append(r)
     else:
-        if cell.cell_type == 'path':
-            r = SDraw.Rectangle(x_pos + def_off, y_pos + def_off, def_width, def_width,
-                                fill=colorstr(GridCell.PATH_COLOUR))
-            drawing.append(r)
-        elif cell.cell_type == 'visited' and RENDER_VISITED:
-            r = SDraw.Rectangle(x_pos + 3, y_pos + 2, 5, 5, fill=colorstr(GridCell.VISITED_COLOUR))
-            drawing.append(r)
-        elif cell.cell_type == 'open_set' and RENDER_VISITED:
-            r = SDraw.Rectangle(x_pos + 3, y_pos + 2, 5, 5, fill=colorstr(GridCell.OPEN_SET_COLOUR))
-            drawing.append(r)
-        elif cell.cell_type == 'start' and RENDER_SOLUTION:
-            r = SDraw.Rectangle(x_pos + def_off, y_pos + def_off, def_width, def_width,
-                                fill=colorstr(GridCell.START_COLOUR))
-            drawing.append(r)
-        elif cell.cell_type == 'goal' and RENDER_SOLUTION:
-            r = SDraw.Rectangle(x_pos + def_off, y_pos + def_off, def_width, def_width,
-                                fill=colorstr(GridCell.GOAL_COLOUR))
-            drawing.append(r)
-        elif cell.cell_type == 'wall':
-            r = SDraw.Rectangle(x_pos + def_off, y_pos + def_off, def_width, def_width, stroke_width=0.5,
-                                fill=colorstr(GridCell.WALL_COLOUR))
-            drawing.append(r)
-        elif cell.cell_type == 'empty':
-            pass
         # draw the main box
         r = SDraw.Rectangle(x_pos + def_off, y_pos + def_off, def_width, def_width,
                             stroke='black', stroke_width=1, fill='none')
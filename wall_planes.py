@@ -0,0 +1,245 @@
+from typing import Tuple, NamedTuple, List
+import numpy as np
+
+from grid_adjacency import GridAdjacency, NORTH, SOUTH, EAST, WEST
+
+
+class WallStats(NamedTuple):
+    """
+    Summary of the walls of a grid
+    horizontal_walls: the number of closed passages between a cell and the cell below it
+    vertical_walls: the number of closed passages between a cell and the cell to its right
+    density: the fraction of all passages between neighbouring cells that are closed
+    dead_ends: the number of cells with exactly one open side
+    junctions: the number of cells with three or four open sides
+    """
+    horizontal_walls: int
+    vertical_walls: int
+    density: float
+    dead_ends: int
+    junctions: int
+
+
+class WallPlanes:
+    """
+    Stores the walls of a grid as two bit-planes held in Python integers, with one bit per cell in row-major order
+    (bit row * columns + column). Bit i of south_walls is set if the passage from cell i to the cell below it is
+    closed and bit i of east_walls if the passage to the cell on its right is closed. The sides on the edge of the grid
+    are always closed.
+    Every operation on the whole grid is a handful of shifts and masks on the planes, so each step processes 64 cells
+    per machine word. The flood fill spreads along all rows (and then all columns) at once with a Kogge-Stone fill that
+    covers a full row in log2(columns) steps, so the number of rounds it needs is the number of turns on the longest
+    shortest path rather than its length.
+    """
+
+    def __init__(self, rows: int, cols: int):
+        """
+        Creates the planes of a grid with every passage closed
+        :param rows: the number of rows in the grid
+        :param cols: the number of columns in the grid
+        """
+        self.rows = rows
+        self.cols = cols
+        n = rows * cols
+        self.full = (1 << n) - 1
+        self.south_walls = self.full
+        self.east_walls = self.full
+        # the cells in the last column and the last row, whose east and south sides are the edge of the grid
+        self.last_col = self.__from_bits(np.tile(np.arange(cols) == cols - 1, rows))
+        self.last_row = self.full ^ ((1 << (n - cols)) - 1)
+
+    @classmethod
+    def from_adjacency(cls, adjacency: GridAdjacency) -> 'WallPlanes':
+        """
+        Builds the planes from the open directions of an adjacency table
+        :param adjacency: the adjacency table of the grid (see GridMap.get_adjacency)
+        :return: the new planes
+        """
+        planes = cls(adjacency.rows, adjacency.cols)
+        open_dirs = np.frombuffer(adjacency.open_dirs, dtype=np.uint8)
+        planes.south_walls = planes.full ^ cls.__from_bits((open_dirs & SOUTH) != 0)
+        planes.east_walls = planes.full ^ cls.__from_bits((open_dirs & EAST) != 0)
+        return planes
+
+    @staticmethod
+    def __from_bits(bits: np.ndarray) -> int:
+        """
+        utility function to pack a boolean array into an integer
+        :param bits: one boolean per cell in row-major order
+        :return: the integer with bit i set if bits[i] is True
+        """
+        return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+    def to_bits(self, plane: int) -> np.ndarray:
+        """
+        Unpacks a plane or a set of cells into a boolean array
+        :param plane: an integer with one bit per cell
+        :return: a (rows, columns) boolean array
+        """
+        n = self.rows * self.cols
+        data = np.frombuffer(plane.to_bytes((n + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(data, bitorder='little')[:n].astype(bool).reshape(self.rows, self.cols)
+
+    def index(self, coord: Tuple[int, int]) -> int:
+        """
+        :param coord: the (row, column) of a cell
+        :return: the bit of the cell
+        """
+        return coord[0] * self.cols + coord[1]
+
+    def __passage(self, coord: Tuple[int, int], direction: int) -> Tuple[str, int]:
+        """
+        utility function to find the bit of the passage on one side of a cell
+        :param coord: the (row, column) of the cell
+        :param direction: one of the direction bits NORTH, SOUTH, EAST or WEST
+        :return: tuple of (plane attribute name, bit index)
+        """
+        i = self.index(coord)
+        if direction == SOUTH:
+            return 'south_walls', i
+        if direction == NORTH:
+            return 'south_walls', i - self.cols
+        if direction == EAST:
+            return 'east_walls', i
+        return 'east_walls', i - 1
+
+    def is_open(self, coord: Tuple[int, int], direction: int) -> bool:
+        """
+        :param coord: the (row, column) of the cell
+        :param direction: one of the direction bits NORTH, SOUTH, EAST or WEST
+        :return: True if the cell can be left in the given direction
+        """
+        row, col = coord
+        if (direction == NORTH and row == 0) or (direction == WEST and col == 0):
+            return False
+        plane, bit = self.__passage(coord, direction)
+        return not (getattr(self, plane) >> bit) & 1
+
+    def set_passage(self, coord: Tuple[int, int], direction: int, is_open: bool):
+        """
+        Opens or closes the passage on one side of a cell. The sides on the edge of the grid stay closed.
+        :param coord: the (row, column) of the cell
+        :param direction: one of the direction bits NORTH, SOUTH, EAST or WEST
+        :param is_open: True to remove the wall and False to add it
+        :return: None
+        """
+        row, col = coord
+        if (direction == NORTH and row == 0) or (direction == SOUTH and row == self.rows - 1) or \
+                (direction == WEST and col == 0) or (direction == EAST and col == self.cols - 1):
+            return
+        plane, bit = self.__passage(coord, direction)
+        if is_open:
+            setattr(self, plane, getattr(self, plane) & ~(1 << bit))
+        else:
+            setattr(self, plane, getattr(self, plane) | (1 << bit))
+
+    def tunnel(self, coord_1: Tuple[int, int], coord_2: Tuple[int, int]):
+        """
+        Opens the passage between two neighbouring cells (see WalledCell.tunnel_to)
+        :param coord_1: the (row, column) of the first cell
+        :param coord_2: the (row, column) of the second cell
+        :return: None
+        """
+        if coord_1[0] < coord_2[0]:
+            self.set_passage(coord_1, SOUTH, True)
+        elif coord_1[0] > coord_2[0]:
+            self.set_passage(coord_1, NORTH, True)
+        elif coord_1[1] > coord_2[1]:
+            self.set_passage(coord_1, WEST, True)
+        else:
+            self.set_passage(coord_1, EAST, True)
+
+    def open_planes(self) -> List[int]:
+        """
+        :return: the cells that can be left to the north, west, east and south as four integers
+        """
+        south = self.full & ~self.south_walls
+        east = self.full & ~self.east_walls
+        return [south << self.cols, east << 1 & self.full, east, south]
+
+    def __fill_steps(self, propagate: int, step: int, length: int) -> List[Tuple[int, int]]:
+        """
+        utility function to prepare the masks of a Kogge-Stone fill in one direction
+        :param propagate: the cells that can be entered from the neighbour one step back
+        :param step: the bit distance of one step (negative for towards the lower bits)
+        :param length: the number of cells in a line in this direction
+        :return: list of (shift, mask) pairs. Each pair doubles the distance the fill can travel
+        """
+        steps = []
+        shift = 1
+        # once no run of open passages is long enough for the next step the remaining masks are all empty
+        while shift < length and propagate:
+            steps.append((step * shift, propagate))
+            if step > 0:
+                propagate &= propagate << (step * shift)
+            else:
+                propagate &= propagate >> (-step * shift)
+            shift *= 2
+        return steps
+
+    def flood(self, seeds: int, stop: int = 0) -> int:
+        """
+        Finds every cell that can be reached from a set of cells
+        :param seeds: the start cells as an integer with one bit per cell
+        :param stop: if any of these cells is reached the fill stops early
+        :return: the reached cells as an integer with one bit per cell
+        """
+        north, west, east, south = self.open_planes()
+        # every direction fills a line at a time, the propagate mask is the set of cells that can be entered from the
+        # cell one step back
+        directions = [self.__fill_steps(east << 1, 1, self.cols),
+                      self.__fill_steps(east, -1, self.cols),
+                      self.__fill_steps(south << self.cols, self.cols, self.rows),
+                      self.__fill_steps(south, -self.cols, self.rows)]
+        reached = seeds
+        previous = -1
+        while reached != previous and not reached & stop:
+            previous = reached
+            for steps in directions:
+                for shift, propagate in steps:
+                    if shift > 0:
+                        reached |= propagate & (reached << shift)
+                    else:
+                        reached |= propagate & (reached >> -shift)
+        return reached
+
+    def reachable(self, start: Tuple[int, int], goal: Tuple[int, int]) -> bool:
+        """
+        :param start: the (row, column) of the start cell
+        :param goal: the (row, column) of the goal cell
+        :return: True if there is a path between the cells
+        """
+        goal_bit = 1 << self.index(goal)
+        return bool(self.flood(1 << self.index(start), goal_bit) & goal_bit)
+
+    def open_counts(self) -> Tuple[int, int, int]:
+        """
+        Counts the open sides of every cell with bit-sliced addition of the four direction planes
+        :return: tuple of the cells with exactly one open side, at least two and at least three
+        """
+        ones = 0
+        twos = 0
+        threes = 0
+        for plane in self.open_planes():
+            threes |= twos & plane
+            twos |= ones & plane
+            ones |= plane
+        return ones & ~twos, twos, threes
+
+    def dead_ends(self) -> int:
+        """
+        :return: the cells with exactly one open side as an integer with one bit per cell
+        """
+        return self.open_counts()[0]
+
+    def stats(self) -> WallStats:
+        """
+        Summarises the walls between neighbouring cells. The edges of the grid are not counted.
+        :return: the WallStats of the grid
+        """
+        horizontal = (self.south_walls & ~self.last_row).bit_count()
+        vertical = (self.east_walls & ~self.last_col).bit_count()
+        passages = (self.rows - 1) * self.cols + self.rows * (self.cols - 1)
+        single, _, triple = self.open_counts()
+        return WallStats(horizontal, vertical, (horizontal + vertical) / passages if passages else 0,
+                         single.bit_count(), triple.bit_count())
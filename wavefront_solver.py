@@ -0,0 +1,87 @@
+from typing import List, Tuple, Optional
+import numpy as np
+
+from grid_adjacency import GridAdjacency, DIRECTIONS
+from path_solver_astar import PathResult
+
+
+class WavefrontSolver:
+    """
+    Finds shortest paths on uniform-cost 4-connected grids with a breadth first wavefront expansion in NumPy. The grid
+    is stored as an array of open direction bits (see GridAdjacency) and every iteration moves the whole frontier one
+    step in all four directions with array operations instead of expanding one cell at a time. Every cell has a cost of
+    1 so the wavefront reaches each cell at its exact shortest distance.
+    """
+
+    def __init__(self, adjacency: GridAdjacency):
+        """
+        Creates a new wavefront solver for a grid
+        :param adjacency: the adjacency table of the grid (see GridMap.get_adjacency)
+        """
+        self.rows = adjacency.rows
+        self.cols = adjacency.cols
+        # the open direction bits of every cell as a flat array in row-major order
+        self.open_dirs = np.frombuffer(bytes(adjacency.open_dirs), dtype=np.uint8)
+        # (direction bit, offset of the neighbour in the flat array) for each direction
+        self.moves = [(bit, d_row * self.cols + d_col) for bit, opposite, d_row, d_col in DIRECTIONS]
+
+    def distances(self, start: Tuple[int, int], goal: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        Calculates the number of steps from the start cell to every cell it can reach
+        :param start: the (row, column) of the start cell
+        :param goal: if given the expansion stops as soon as this (row, column) has been reached
+        :return: an int32 array of shape (rows, columns) with the distances. Cells that were not reached are -1
+        """
+        dist = np.full(self.rows * self.cols, -1, dtype=np.int32)
+        start_index = start[0] * self.cols + start[1]
+        goal_index = -1 if goal is None else goal[0] * self.cols + goal[1]
+        dist[start_index] = 0
+        frontier = np.array([start_index], dtype=np.int64)
+        step = 0
+        while frontier.size > 0:
+            if goal_index >= 0 and dist[goal_index] >= 0:
+                break
+            step += 1
+            frontier_dirs = self.open_dirs[frontier]
+            # move the frontier in every open direction at once
+            reached = np.concatenate([frontier[(frontier_dirs & bit) != 0] + offset for bit, offset in self.moves])
+            reached = np.unique(reached[dist[reached] < 0])
+            dist[reached] = step
+            frontier = reached
+        return dist.reshape(self.rows, self.cols)
+
+    def trace_path(self, dist: np.ndarray, goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Walks back from the goal cell to the start cell by always stepping to a neighbour that is one step closer
+        :param dist: the distances calculated by distances()
+        :param goal: the (row, column) of the goal cell
+        :return: the cells from the start cell to the goal cell (empty if the goal was not reached)
+        """
+        if dist[goal] < 0:
+            return []
+        flat = dist.reshape(-1)
+        index = goal[0] * self.cols + goal[1]
+        path = [index]
+        while flat[index] > 0:
+            open_dirs = self.open_dirs[index]
+            for bit, offset in self.moves:
+                if open_dirs & bit and flat[index + offset] == flat[index] - 1:
+                    index += offset
+                    break
+            path.append(index)
+        path.reverse()
+        return [divmod(index, self.cols) for index in path]
+
+    def solve(self, start: Tuple[int, int], goal: Tuple[int, int]) -> PathResult:
+        """
+        Finds the shortest path from the start cell to the goal cell
+        :param start: the (row, column) of the start cell
+        :param goal: the (row, column) of the goal cell
+        :return: a PathResult with the path and its cost. The expanded and inserted counts are the number of cells the
+        wavefront reached
+        """
+        dist = self.distances(start, goal)
+        reached = int(np.count_nonzero(dist >= 0))
+        path = self.trace_path(dist, goal)
+        cost = int(dist[goal]) if path else float('inf')
+        return PathResult(path, cost, reached, reached, 0)
@@ -1,5 +1,5 @@
 from typing import List, Any, Tuple
-from grid_cell import WalledCell
+from grid_cell import WalledCell, EMPTY, VISITED, OPEN_SET
 from random import sample
 
 
@@ -51,14 +51,14 @@ class WilsonMaze:
 
             # have we reached a visited cell or should we continue walking?
             cell = self.cell_grid[self.current_step[0]][self.current_step[1]]
-            if cell.cell_type == 'visited':
+            if cell.state == VISITED:
                 # backtrack to find the path and remove it from the working set
                 while cell.comes_from is not None:
                     cell.tunnel_to(cell.comes_from)
                     cell = cell.comes_from
-                    if cell.cell_type == 'visited':
+                    if cell.state == VISITED:
                         break
-                    cell.cell_type = 'visited'
+                    cell.state = VISITED
                     self.working_set.remove(cell.coord)
                     updates.append(cell.draw_cell())
                 msg = f'New path found from {self.current_origin} to {cell.coord}'
@@ -72,14 +72,14 @@ class WilsonMaze:
                     self.last_origin = self.cell_grid[self.current_step[0]][self.current_step[1]].comes_from
                     self.cell_grid[self.current_step[0]][self.current_step[1]].comes_from = \
                         self.cell_grid[self.current_origin[0]][self.current_origin[1]]
-            elif cell.cell_type == 'open_set':
+            elif cell.state == OPEN_SET:
                 # this random walk resulted in a loop we need to remove it before continuing
                 while cell.comes_from is not None:
                     cell = cell.comes_from
                     if cell.coord == self.current_step:
                         break
                     else:
-                        cell.cell_type = 'empty'
+                        cell.state = EMPTY
                     updates.append(cell.draw_cell())
                 if cell.comes_from is None:
                     print('WARNING: Backtrack loop ended without finding loop origin. Maze integrity lost.')
@@ -95,7 +95,7 @@ class WilsonMaze:
             else:
                 # TODO: Add appropriate msg
                 # This should only include empty cells. All we can do is take the next random direction
-                cell.cell_type = 'open_set'
+                cell.state = OPEN_SET
                 updates.append(cell.draw_cell())
                 msg = f'Walked to {self.current_step}'
                 neighbours = self.get_neighbours(self.current_step)
@@ -126,7 +126,7 @@ class WilsonMaze:
         # pick a random cell to initialise the generator
         row = sample(self.cell_grid, 1)[0]
         last_insert = sample(row, 1)[0]
-        last_insert.cell_type = 'visited'
+        last_insert.state = VISITED
         updates.append(last_insert.draw_cell())
         self.working_set.remove(last_insert.coord)
         self.current_origin = sample(self.working_set, 1)[0]